@@ -0,0 +1,123 @@
+"""
+Benchmark: query backends side by side on an IPL-shaped table of --rows rows.
+
+  duckdb-parquet  Parquet file queried in place (view, zero ingest)
+  duckdb-csv      CSV bulk-loaded with DuckDB's parallel reader (table)
+  sqlite          row store via pandas.to_sql, an offline stand-in for a row-store server
+  mysql           upload_to_mysql + pooled MySQL (only with --mysql, BENCH_DB_* as in bench_bulk_load.py)
+
+For each: seconds until the first question can be asked (ingest), then the
+median latency of typical BI aggregations over --repeat runs.
+
+    python benchmarks/bench_backends.py --rows 1000000
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_bulk_load import DB_CONFIG, make_ipl_frame  # noqa: E402
+from mysql_module.backends import DuckDBBackend, MySQLBackend  # noqa: E402
+from mysql_module.db_pool import get_engine  # noqa: E402
+
+TABLE_NAME = "bench_matches"
+
+QUERIES = {
+    "matches per season": f"SELECT season, COUNT(*) AS matches FROM {TABLE_NAME} GROUP BY season ORDER BY season",
+    "wins per team": f"SELECT winningteam, COUNT(*) AS wins FROM {TABLE_NAME} GROUP BY winningteam ORDER BY wins DESC",
+    "avg margin, one team": f"SELECT season, AVG(margin) AS avg_margin FROM {TABLE_NAME} "
+                            f"WHERE winningteam = 'Mumbai Indians' GROUP BY season ORDER BY season",
+    "top city/venue pairs": f"SELECT city, venue, COUNT(*) AS matches FROM {TABLE_NAME} "
+                            f"GROUP BY city, venue ORDER BY matches DESC LIMIT 10",
+    "distinct teams": f"SELECT COUNT(DISTINCT team2) AS teams FROM {TABLE_NAME}",
+}
+
+
+def write_files(df, workdir):
+    """CSV via pandas, Parquet via DuckDB (no pyarrow needed)"""
+    import duckdb
+    csv_path = os.path.join(workdir, f"{TABLE_NAME}.csv")
+    parquet_path = os.path.join(workdir, f"{TABLE_NAME}.parquet")
+    df.to_csv(csv_path, index=False)
+    con = duckdb.connect()
+    con.register("frame", df)
+    con.execute(f"COPY frame TO '{parquet_path}' (FORMAT PARQUET)")
+    con.close()
+    return csv_path, parquet_path
+
+
+def load_duckdb(path, load_mode, schema_file):
+    backend = DuckDBBackend(":memory:", load_mode=load_mode)
+    backend.load_file(path, TABLE_NAME, schema_file)
+    return backend
+
+
+def load_sqlite(df, workdir):
+    db_config = {"url": f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}"}
+    df.to_sql(TABLE_NAME, get_engine(db_config), if_exists="replace", index=False, chunksize=10000)
+    return MySQLBackend(db_config)
+
+
+def load_mysql(csv_path, schema_file):
+    backend = MySQLBackend(DB_CONFIG)
+    backend.load_file(csv_path, TABLE_NAME, schema_file, chunksize=100000)
+    return backend
+
+
+def time_queries(backend, repeat):
+    timings = {}
+    for name, sql in QUERIES.items():
+        backend.run_sql(sql)   # warm-up (file cache, catalog)
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            backend.run_sql(sql)
+            runs.append(1000 * (time.perf_counter() - start))
+        timings[name] = statistics.median(runs)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mysql", action="store_true", help="also benchmark the MySQL server from BENCH_DB_*")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-backends-")
+    schema_file = os.path.join(workdir, "schema_registry.json")
+    df = make_ipl_frame(args.rows).drop(columns=["team1players", "team2players"])
+    csv_path, parquet_path = write_files(df, workdir)
+    print(f"{args.rows} rows, CSV {os.path.getsize(csv_path) / 2**20:.0f} MB, "
+          f"Parquet {os.path.getsize(parquet_path) / 2**20:.0f} MB\n")
+
+    loaders = {
+        "duckdb-parquet": lambda: load_duckdb(parquet_path, "auto", schema_file),
+        "duckdb-csv": lambda: load_duckdb(csv_path, "table", schema_file),
+        "sqlite": lambda: load_sqlite(df, workdir),
+    }
+    if args.mysql:
+        loaders["mysql"] = lambda: load_mysql(csv_path, schema_file)
+
+    results = {}
+    for name, load in loaders.items():
+        start = time.perf_counter()
+        backend = load()
+        ingest = time.perf_counter() - start
+        results[name] = (ingest, time_queries(backend, args.repeat))
+
+    names = list(results)
+    print(f"{'':<26}" + "".join(f"{n:>16}" for n in names))
+    print(f"{'ingest (s)':<26}" + "".join(f"{results[n][0]:16.2f}" for n in names))
+    for query in QUERIES:
+        print(f"{query + ' (ms)':<26}" + "".join(f"{results[n][1][query]:16.1f}" for n in names))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
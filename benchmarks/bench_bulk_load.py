@@ -0,0 +1,103 @@
+"""
+Benchmark: rows/sec for the upload_to_mysql bulk-load strategies.
+
+Runs the legacy per-row iterrows INSERT loop, batched executemany and
+LOAD DATA LOCAL INFILE on a synthetic IPL-sized frame and a 1M-row frame.
+
+Needs a reachable MySQL/MariaDB with local_infile enabled on the server:
+    BENCH_DB_HOST=127.0.0.1 BENCH_DB_USER=root BENCH_DB_PASSWORD=... BENCH_DB_NAME=edi \
+        python benchmarks/bench_bulk_load.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_module.strtomysql import map_dtype_to_mysql, insert_executemany, insert_load_data  # noqa: E402
+
+DB_CONFIG = {
+    "host": os.getenv("BENCH_DB_HOST", "127.0.0.1"),
+    "user": os.getenv("BENCH_DB_USER", "root"),
+    "password": os.getenv("BENCH_DB_PASSWORD", ""),
+    "database": os.getenv("BENCH_DB_NAME", "edi"),
+}
+TABLE_NAME = "bench_bulk_load"
+
+# the legacy loop is far too slow to run on the 1M-row frame
+ITERROWS_MAX_ROWS = 50000
+
+TEAMS = ["Mumbai Indians", "Chennai Super Kings", "Royal Challengers Bangalore", "Gujarat Titans",
+         "Rajasthan Royals", "Kolkata Knight Riders", "Delhi Capitals", "Punjab Kings"]
+CITIES = ["Ahmedabad", "Mumbai", "Chennai", "Kolkata", "Bangalore", "Delhi", "Pune", None]
+
+
+def make_ipl_frame(n_rows, seed=0):
+    """Synthetic frame shaped like uploads/ipl_matches.csv after preprocessing"""
+    rng = np.random.default_rng(seed)
+    team1 = rng.choice(TEAMS, n_rows)
+    players = "['" + "', '".join(f"Player {i}" for i in range(11)) + "']"
+    return pd.DataFrame({
+        "id": np.arange(1_000_000, 1_000_000 + n_rows, dtype="int64"),
+        "city": rng.choice(np.array(CITIES, dtype=object), n_rows),
+        "date": pd.Timestamp("2008-04-18") + pd.to_timedelta(rng.integers(0, 5000, n_rows), unit="D"),
+        "season": rng.integers(2008, 2023, n_rows),
+        "team1": team1,
+        "team2": rng.choice(TEAMS, n_rows),
+        "venue": rng.choice(["Wankhede Stadium", "Eden Gardens", "Narendra Modi Stadium, Ahmedabad"], n_rows),
+        "winningteam": team1,
+        "margin": np.where(rng.random(n_rows) < 0.05, np.nan, rng.integers(1, 140, n_rows).astype(float)),
+        "superover": rng.random(n_rows) < 0.02,
+        "team1players": players,
+        "team2players": players,
+    })
+
+
+def insert_iterrows(conn, df, table_name, batch_size=None):
+    """The pre-bulk-load upload loop, kept here as the baseline"""
+    cursor = conn.cursor()
+    for _, row in df.iterrows():
+        placeholders = ", ".join(["%s"] * len(df.columns))
+        insert_sql = f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})"
+        cursor.execute(insert_sql, tuple(None if pd.isna(v) else v for v in row))
+    conn.commit()
+
+
+def recreate_table(conn, df):
+    col_defs = ", ".join(f"`{col}` {map_dtype_to_mysql(df[col])}" for col in df.columns)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS `{TABLE_NAME}`")
+    cursor.execute(f"CREATE TABLE `{TABLE_NAME}` ({col_defs})")
+    conn.commit()
+
+
+def run_case(conn, df, name, loader, **kwargs):
+    recreate_table(conn, df)
+    start = time.perf_counter()
+    loader(conn, df, TABLE_NAME, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{len(df):>9,} rows | {name:<24} | {elapsed:8.2f}s | {len(df) / elapsed:>12,.0f} rows/sec")
+
+
+def main():
+    conn = pymysql.connect(local_infile=True, **DB_CONFIG)
+    try:
+        for label, n_rows in [("IPL-sized", 950), ("1M rows", 1_000_000)]:
+            df = make_ipl_frame(n_rows)
+            print(f"\n== {label} ==")
+            if n_rows <= ITERROWS_MAX_ROWS:
+                run_case(conn, df, "iterrows (legacy)", insert_iterrows)
+            for batch_size in (1000, 5000, 20000):
+                run_case(conn, df, f"executemany batch={batch_size}", insert_executemany, batch_size=batch_size)
+            run_case(conn, df, "load_data", insert_load_data)
+        conn.cursor().execute(f"DROP TABLE IF EXISTS `{TABLE_NAME}`")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: local chart planner/renderer vs. the Gemini code-generation path
+(generate_and_save_plot) on typical query results.
+
+    python benchmarks/bench_chart_render.py                      # local path only
+    GOOGLE_API_KEY=... python benchmarks/bench_chart_render.py   # both paths
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_module.chart_planner import plot_dataframe  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 5
+
+
+def sample_results():
+    ipl = pd.read_csv(os.path.join(ROOT, "uploads", "ipl_matches.csv"))
+    ipl["year"] = pd.to_datetime(ipl["Date"]).dt.year
+    rng = np.random.default_rng(0)
+    return [
+        ("wins by team", ipl.groupby("WinningTeam").size().reset_index(name="wins")),
+        ("matches per year", ipl.groupby("year").size().reset_index(name="matches")),
+        ("distribution of margin", ipl[["Margin"]].dropna()),
+        ("share of toss decisions as pie", ipl.groupby("TossDecision").size().reset_index(name="n")),
+        ("runs vs balls", pd.DataFrame({"runs": rng.integers(0, 120, 500), "balls": rng.integers(1, 80, 500)})),
+        ("correlation of team stats", pd.DataFrame(rng.random((200, 5)), columns=list("abcde"))),
+    ]
+
+
+def time_path(fn, df, question, out_dir):
+    latencies = []
+    for i in range(REPEAT):
+        path = os.path.join(out_dir, f"plot_{i}.png")
+        start = time.perf_counter()
+        ok = fn(df, question, path)
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            return None
+    return statistics.median(latencies)
+
+
+def main():
+    api_key = os.getenv("GOOGLE_API_KEY")
+    llm_path = None
+    if api_key:
+        from mysql_module.temp3 import generate_and_save_plot
+        llm_path = lambda df, q, path: generate_and_save_plot(df, api_key, q, output_path=path)  # noqa: E731
+
+    out_dir = tempfile.mkdtemp()
+    print(f"{'question':<32} | {'local ms':>9} | {'LLM ms':>9}")
+    for question, df in sample_results():
+        local_s = time_path(plot_dataframe, df, question, out_dir)
+        llm_s = time_path(llm_path, df, question, out_dir) if llm_path else None
+        local = f"{1000 * local_s:9.0f}" if local_s is not None else "   failed"
+        llm = "  skipped" if llm_path is None else (f"{1000 * llm_s:9.0f}" if llm_s is not None else "   failed")
+        print(f"{question:<32} | {local} | {llm}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: document ingestion embedding throughput with the offline fake
+provider (simulated network latency), comparing
+  - one request per chunk (the old get_gemini_embeddings behaviour)
+  - batched requests
+  - batched requests on a re-upload of a slightly edited document (cache hits)
+
+    python benchmarks/bench_embeddings.py --chunks 2000 --latency-ms 80
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_module.embeddings import EmbeddingCache, FakeEmbeddingProvider, embed_texts  # noqa: E402
+
+WORDS = ("revenue growth model training dataset customer churn policy cricket season "
+         "batsman runs wickets invoice payment contract clause resume skills python").split()
+
+
+def fake_document(n_chunks, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(150)) + f" chunk {i}" for i in range(n_chunks)]
+
+
+def per_chunk(texts, provider, max_workers):
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda t: provider.embed_batch([t])[0], texts))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="simulated round trip per request")
+    parser.add_argument("--per-text-ms", type=float, default=0.5, help="simulated model time per text")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--edited-fraction", type=float, default=0.05)
+    args = parser.parse_args()
+
+    texts = fake_document(args.chunks)
+    edited = list(texts)
+    for i in random.Random(1).sample(range(len(texts)), int(args.edited_fraction * len(texts))):
+        edited[i] += " (edited)"
+
+    def provider():
+        return FakeEmbeddingProvider(latency_ms=args.latency_ms, per_text_ms=args.per_text_ms)
+
+    print(f"{'mode':<28} | {'requests':>8} | {'seconds':>8} | {'chunks/s':>9}")
+
+    def report(name, fn, p):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28} | {p.requests:8d} | {elapsed:8.2f} | {len(texts) / elapsed:9.0f}")
+
+    p = provider()
+    report("one request per chunk", lambda: per_chunk(texts, p, args.workers), p)
+
+    p = provider()
+    report("batched, no cache", lambda: embed_texts(texts, p, max_workers=args.workers), p)
+
+    cache = EmbeddingCache(os.path.join(tempfile.mkdtemp(), "embeddings.sqlite"))
+    embed_texts(texts, provider(), cache=cache, max_workers=args.workers)   # first upload fills the cache
+    p = provider()
+    report(f"re-upload, {args.edited_fraction:.0%} edited", lambda: embed_texts(edited, p, cache=cache, max_workers=args.workers), p)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: query latency before and after the index / rollup advisor.
+
+An IPL-shaped table of --rows rows is loaded into SQLite (row store, gets
+indexes and rollups) and DuckDB (columnar, rollups only). A small dashboard
+workload runs a few times so the advisor sees hot shapes, the advice is
+applied, and every query is timed again through ADVISOR.rewrite().
+
+    python benchmarks/bench_index_advisor.py --rows 1000000
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_backends import TABLE_NAME, load_duckdb, load_sqlite, write_files  # noqa: E402
+from bench_bulk_load import make_ipl_frame  # noqa: E402
+from mysql_module.index_advisor import IndexAdvisor  # noqa: E402
+
+WORKLOAD = {
+    "wins per season, one team": f"SELECT season, COUNT(*) AS wins FROM {TABLE_NAME} "
+                                 f"WHERE winningteam = 'Mumbai Indians' GROUP BY season ORDER BY season",
+    "avg margin per team": f"SELECT winningteam, AVG(margin) AS avg_margin FROM {TABLE_NAME} "
+                           f"GROUP BY winningteam ORDER BY avg_margin DESC",
+    "matches per city": f"SELECT city, COUNT(*) AS matches FROM {TABLE_NAME} GROUP BY city ORDER BY matches DESC",
+    "one season, one venue": f"SELECT * FROM {TABLE_NAME} WHERE season = 2015 AND venue = 'Eden Gardens'",
+}
+
+
+def run_workload(backend, advisor, repeat):
+    """Median ms per query; every run goes through the advisor like the handler does"""
+    timings = {}
+    for name, sql in WORKLOAD.items():
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            backend.run_sql(advisor.rewrite(sql))
+            runs.append(1000 * (time.perf_counter() - start))
+            advisor.record(sql, runs[-1])
+        timings[name] = statistics.median(runs)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-advisor-")
+    df = make_ipl_frame(args.rows).drop(columns=["team1players", "team2players"])
+    _, parquet_path = write_files(df, workdir)
+
+    backends = {
+        "sqlite": load_sqlite(df, workdir),
+        "duckdb": load_duckdb(parquet_path, "table", os.path.join(workdir, "schema_registry.json")),
+    }
+    for name, backend in backends.items():
+        advisor = IndexAdvisor(min_queries=args.repeat, min_total_ms=0)
+        before = run_workload(backend, advisor, args.repeat)
+        start = time.perf_counter()
+        applied = advisor.apply(backend)
+        build = time.perf_counter() - start
+        after = run_workload(backend, advisor, args.repeat)
+
+        built = [a["name"] for a in applied if "error" not in a]
+        print(f"\n{name}: built {len(built)} of {len(applied)} advised objects in {build:.2f} s")
+        print(f"{'':<28}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+        for query in WORKLOAD:
+            print(f"{query:<28}{before[query]:14.1f}{after[query]:14.1f}{before[query] / after[query]:9.1f}x")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
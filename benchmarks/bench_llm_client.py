@@ -0,0 +1,105 @@
+"""
+Benchmark: per-call overhead of the Gemini client against a local stub server
+(no network, no API key), comparing
+  - genai.configure() + GenerativeModel() on every call (the old handler code)
+  - the shared llm_provider client (configured once, connections kept alive)
+sequentially and from concurrent threads. The stub counts TCP connections,
+so connection reuse shows up directly.
+
+    python benchmarks/bench_llm_client.py --calls 200 --threads 8 --server-ms 5
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPLY = json.dumps({
+    "candidates": [{"content": {"parts": [{"text": "SELECT 1;"}], "role": "model"},
+                    "finishReason": "STOP", "index": 0}]
+}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid the 40 ms delayed-ACK stall
+    delay = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(REPLY)))
+        self.end_headers()
+        self.wfile.write(REPLY)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(server_ms):
+    StubHandler.delay = server_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--server-ms", type=float, default=5.0, help="simulated model time per request")
+    args = parser.parse_args()
+
+    endpoint = start_stub(args.server_ms)
+    # llm_provider reads its settings at import time
+    os.environ.update(LLM_PROVIDER="gemini", LLM_TRANSPORT="rest", LLM_API_ENDPOINT=endpoint,
+                      LLM_MAX_CONCURRENCY=str(args.threads))
+    import google.generativeai as genai
+    import llm_provider
+
+    def per_call(prompt):
+        genai.configure(api_key="bench", transport="rest", client_options={"api_endpoint": endpoint})
+        model = genai.GenerativeModel("gemini-2.5-flash")
+        return model.generate_content(prompt).text
+
+    def shared(prompt):
+        return llm_provider.get_llm("gemini-2.5-flash", "bench").generate(prompt)
+
+    shared("warm-up")   # first call builds the client, like the first request after start-up
+
+    print(f"{'mode':<34} | {'seconds':>8} | {'ms/call':>8} | {'connections':>11}")
+
+    def report(name, fn, threads):
+        StubHandler.connections = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(fn, (f"question {i}" for i in range(args.calls))))
+        elapsed = time.perf_counter() - start
+        print(f"{name:<34} | {elapsed:8.2f} | {1000 * elapsed / args.calls * threads:8.1f} | {StubHandler.connections:11d}")
+
+    report("configure + new model, 1 thread", per_call, 1)
+    llm_provider._configured_key = None   # per_call reconfigured genai behind the provider's back
+    report("shared client, 1 thread", shared, 1)
+    report(f"configure + new model, {args.threads} threads", per_call, args.threads)
+    llm_provider._configured_key = None
+    report(f"shared client, {args.threads} threads", shared, args.threads)
+    print("llm_provider stats:", llm_provider.llm_stats())
+
+
+if __name__ == "__main__":
+    main()
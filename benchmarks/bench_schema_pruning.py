@@ -0,0 +1,76 @@
+"""
+Benchmark: prompt size and end-to-end NL->SQL latency vs. number of
+registered tables, with the full schema dump vs. retrieved (pruned) schema.
+
+No Gemini calls: LLM latency is simulated as a fixed round-trip plus a
+per-prompt-token prefill cost (tune with --llm-base-ms / --llm-ms-per-1k-tokens).
+
+    python benchmarks/bench_schema_pruning.py
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_module.schema_registry import get_registry  # noqa: E402
+from mysql_module.schema_retriever import relevant_schema_text  # noqa: E402
+
+SUBJECTS = ["sales", "orders", "customers", "products", "inventory", "shipments", "employees", "payroll",
+            "matches", "players", "teams", "venues", "tickets", "campaigns", "leads", "invoices"]
+FIELDS = ["amount", "price", "quantity", "region", "city", "status", "category", "score", "rating",
+          "discount", "revenue", "cost", "channel", "segment", "manager", "country", "margin", "weight"]
+TYPES = ["INT", "DOUBLE", "VARCHAR(40)", "DATETIME"]
+SAMPLES = ["north", "south", "mumbai", "delhi", "online", "retail", "gold", "silver", "active", "closed"]
+
+
+def build_registry(path, n_tables, seed=0):
+    rng = random.Random(seed)
+    registry = get_registry(path)
+    for i in range(n_tables):
+        table = f"{SUBJECTS[i % len(SUBJECTS)]}_{i}"
+        columns = [{"name": "id", "type": "INT"}, {"name": "created_date", "type": "DATETIME"}]
+        for j in range(rng.randint(20, 120)):
+            col = {"name": f"{rng.choice(FIELDS)}_{j}", "type": rng.choice(TYPES)}
+            if col["type"].startswith("VARCHAR"):
+                col["samples"] = rng.sample(SAMPLES, 3)
+            columns.append(col)
+        registry.upsert_table(table, columns)
+    return registry
+
+
+def simulated_llm_ms(prompt, base_ms, ms_per_1k_tokens):
+    tokens = len(prompt) / 4   # ~4 characters per token
+    return base_ms + ms_per_1k_tokens * tokens / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-base-ms", type=float, default=600)
+    parser.add_argument("--llm-ms-per-1k-tokens", type=float, default=120)
+    args = parser.parse_args()
+
+    question = "total revenue by region for online orders"
+    print(f"{'tables':>6} | {'full tokens':>11} | {'pruned tokens':>13} | {'retrieval ms':>12} | "
+          f"{'e2e full ms':>11} | {'e2e pruned ms':>13}")
+    for n_tables in [1, 5, 10, 25, 50, 100, 200]:
+        path = os.path.join(tempfile.mkdtemp(), "schema_registry.json")
+        registry = build_registry(path, n_tables)
+        full_prompt = registry.prompt_text()
+
+        relevant_schema_text(path, question)   # build the index once, like a warm worker
+        start = time.perf_counter()
+        pruned_prompt = relevant_schema_text(path, question)
+        retrieval_ms = 1000 * (time.perf_counter() - start)
+
+        full_ms = simulated_llm_ms(full_prompt, args.llm_base_ms, args.llm_ms_per_1k_tokens)
+        pruned_ms = retrieval_ms + simulated_llm_ms(pruned_prompt, args.llm_base_ms, args.llm_ms_per_1k_tokens)
+        print(f"{n_tables:>6} | {len(full_prompt) // 4:>11,} | {len(pruned_prompt) // 4:>13,} | "
+              f"{retrieval_ms:>12.2f} | {full_ms:>11,.0f} | {pruned_ms:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
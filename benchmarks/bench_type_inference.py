@@ -0,0 +1,113 @@
+"""
+Benchmark: legacy preprocess_dataframe + map_dtype_to_mysql vs the
+single-pass column profiler on wide frames (200+ columns).
+
+    python benchmarks/bench_type_inference.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_module.strtomysql import preprocess_and_profile  # noqa: E402
+from mysql_module.column_profiler import mysql_type_from_profile  # noqa: E402
+
+
+# ------------------ LEGACY CODE (baseline) ------------------
+def legacy_map_dtype_to_mysql(series):
+    if pd.api.types.is_integer_dtype(series):
+        min_val, max_val = series.min(), series.max()
+        if pd.isnull(min_val) or pd.isnull(max_val):
+            return "INT"
+        if min_val >= -128 and max_val <= 127:
+            return "TINYINT"
+        elif min_val >= -32768 and max_val <= 32767:
+            return "SMALLINT"
+        elif min_val >= -2147483648 and max_val <= 2147483647:
+            return "INT"
+        return "BIGINT"
+    elif pd.api.types.is_float_dtype(series):
+        if (series.dropna() % 1 == 0).all():
+            return "INT"
+        return "DOUBLE"
+    elif pd.api.types.is_bool_dtype(series):
+        return "TINYINT(1)"
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        return "DATETIME"
+    max_len = series.astype(str).map(len).max()
+    return f"VARCHAR({min(max_len + 10, 500)})"
+
+
+def legacy_preprocess_dataframe(df):
+    df = df.drop_duplicates()
+    df = df.fillna("NULL")
+    for col in df.columns:
+        if "id" in col.lower():
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+    for col in df.select_dtypes(include="object").columns:
+        if df[col].str.replace(".", "", 1).str.isnumeric().all():
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in df.columns:
+        if "date" in col.lower():
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+# ------------------ SYNTHETIC WIDE FRAME ------------------
+def make_wide_frame(n_rows, n_cols, seed=0):
+    """Mix of int, float (with NaNs), numeric-as-text, text, and date columns"""
+    rng = np.random.default_rng(seed)
+    words = np.array(["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"], dtype=object)
+    data = {}
+    for i in range(n_cols):
+        kind = i % 5
+        if kind == 0:
+            data[f"metric_{i}"] = rng.integers(0, 10_000, n_rows)
+        elif kind == 1:
+            values = rng.random(n_rows) * 100
+            values[rng.random(n_rows) < 0.1] = np.nan
+            data[f"score_{i}"] = values
+        elif kind == 2:
+            data[f"code_{i}"] = rng.integers(0, 999, n_rows).astype(str).astype(object)
+        elif kind == 3:
+            data[f"label_{i}"] = rng.choice(words, n_rows)
+        else:
+            days = pd.to_timedelta(rng.integers(0, 3000, n_rows), unit="D")
+            data[f"event_date_{i}"] = (pd.Timestamp("2015-01-01") + days).strftime("%Y-%m-%d").astype(object)
+    return pd.DataFrame(data)
+
+
+def time_it(fn, df, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df.copy())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def legacy(df):
+    df = legacy_preprocess_dataframe(df)
+    return {col: legacy_map_dtype_to_mysql(df[col]) for col in df.columns}
+
+
+def profiled(df):
+    df, profiles = preprocess_and_profile(df)
+    return {col: mysql_type_from_profile(profile) for col, profile in profiles.items()}
+
+
+def main():
+    for n_rows, n_cols in [(10_000, 200), (50_000, 250), (100_000, 400)]:
+        df = make_wide_frame(n_rows, n_cols)
+        legacy_s = time_it(legacy, df)
+        profiled_s = time_it(profiled, df)
+        print(f"{n_rows:>7,} rows x {n_cols} cols | legacy {legacy_s:7.2f}s | "
+              f"profiler {profiled_s:7.2f}s | {legacy_s / profiled_s:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
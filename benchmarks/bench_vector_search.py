@@ -0,0 +1,73 @@
+"""
+Benchmark: local vector store, exact cosine search vs. the IVF index,
+reporting recall@k against exact results and per-query latency.
+
+Vectors are synthetic and clustered (like chunk embeddings of a few documents),
+so no embedding API or Pinecone account is needed.
+
+    python benchmarks/bench_vector_search.py --vectors 100000 --dim 768
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_module.vector_store import LocalVectorStore  # noqa: E402
+
+
+def clustered_vectors(n, dim, n_topics, rng):
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    labels = rng.integers(0, n_topics, n)
+    return (topics[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)), topics
+
+
+def timed_queries(store, queries, top_k, n_probe):
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        matches = store.query("bench", q, top_k=top_k, n_probe=n_probe)
+        latencies.append(1000 * (time.perf_counter() - start))
+        results.append({m["id"] for m in matches})
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=6)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors, topics = clustered_vectors(args.vectors, args.dim, 200, rng)
+    queries = topics[rng.integers(0, len(topics), args.queries)] + rng.standard_normal((args.queries, args.dim))
+
+    store = LocalVectorStore(tempfile.mkdtemp(), dimension=args.dim, ivf_min_vectors=1)
+    start = time.perf_counter()
+    store.upsert("bench", [str(i) for i in range(args.vectors)], vectors, [{"text": ""}] * args.vectors)
+    print(f"Indexed {args.vectors} x {args.dim} vectors (with IVF training) in {time.perf_counter() - start:.1f}s")
+
+    exact, exact_ms = timed_queries(store, queries, args.top_k, None)
+    print(f"{'search':<16} | {'recall@' + str(args.top_k):>9} | {'p50 ms':>7} | {'p95 ms':>7}")
+
+    def report(name, results, latencies):
+        recall = statistics.mean(len(r & e) / len(e) for r, e in zip(results, exact))
+        p95 = sorted(latencies)[int(0.95 * len(latencies)) - 1]
+        print(f"{name:<16} | {recall:9.3f} | {statistics.median(latencies):7.2f} | {p95:7.2f}")
+
+    report("exact", exact, exact_ms)
+    n_lists = int(np.sqrt(args.vectors))
+    for n_probe in (1, 4, 8, 16, 32):
+        if n_probe <= n_lists:
+            report(f"ivf n_probe={n_probe}", *timed_queries(store, queries, args.top_k, n_probe))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Offline retrieval eval for the document chat: recall@k and query latency for
+dense-only, BM25-only, hybrid (RRF) and hybrid + rerank, over the sample
+PDF/DOCX files in uploads/.
+
+Queries are generated from the documents themselves:
+  - "terms":  the 3 rarest terms of a random chunk (names, IDs, numbers)
+  - "phrase": a 6-word span copied from a random chunk
+A query counts as answered at k when one of the top k chunks contains the
+phrase / all of the terms. Embeddings come from the offline fake provider
+unless --provider gemini is given (needs GOOGLE_API_KEY).
+
+    python benchmarks/eval_retrieval.py --queries 50
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter  # noqa: E402
+
+from pdf_module.embeddings import FakeEmbeddingProvider, GeminiEmbeddingProvider, embed_texts  # noqa: E402
+from pdf_module.hybrid_search import LexicalIndex, hybrid_search, tokenize  # noqa: E402
+from pdf_module.ingest_pipeline import iter_pages  # noqa: E402
+from pdf_module.vector_store import LocalVectorStore  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KS = (1, 3, 6, 10)
+
+
+def load_chunks(path):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100,
+                                              separators=["\n\n", "\n", ".", " ", ""])
+    texts = []
+    for _, text in iter_pages(path):
+        if text:
+            texts.extend(splitter.split_text(text))
+    return texts
+
+
+def make_queries(texts, n, rng):
+    doc_freq = {}
+    for text in texts:
+        for term in set(tokenize(text)):
+            doc_freq[term] = doc_freq.get(term, 0) + 1
+    queries = []
+    for _ in range(n):
+        text = rng.choice(texts)
+        terms = sorted(set(tokenize(text)), key=lambda t: (doc_freq[t], t))[:3]
+        if terms:
+            queries.append(("terms", " ".join(terms), lambda chunk, ts=terms: all(t in tokenize(chunk) for t in ts)))
+        words = text.split()
+        if len(words) > 6:
+            start = rng.randrange(len(words) - 6)
+            span = " ".join(words[start:start + 6])
+            queries.append(("phrase", span, lambda chunk, sp=span: sp in chunk))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", default=os.path.join(ROOT, "uploads", "*"))
+    parser.add_argument("--queries", type=int, default=50, help="random chunks per document")
+    parser.add_argument("--provider", choices=("fake", "gemini"), default="fake")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    store = LocalVectorStore(tempfile.mkdtemp())
+    lexical = LexicalIndex(tempfile.mkdtemp())
+    doc_provider = FakeEmbeddingProvider() if args.provider == "fake" else GeminiEmbeddingProvider()
+    query_provider = (FakeEmbeddingProvider() if args.provider == "fake"
+                      else GeminiEmbeddingProvider(task_type="retrieval_query"))
+
+    modes = {
+        "dense": lambda q, v, ns, k: store.query(ns, v, top_k=k),
+        "bm25": lambda q, v, ns, k: lexical.search(ns, q, top_k=k),
+        "hybrid": lambda q, v, ns, k: hybrid_search(q, v, store, lexical, ns, top_k=k, rerank=False),
+        "hybrid+rerank": lambda q, v, ns, k: hybrid_search(q, v, store, lexical, ns, top_k=k, rerank=True),
+    }
+    hits = {(mode, kind, k): [] for mode in modes for kind in ("terms", "phrase") for k in KS}
+    latency = {mode: [] for mode in modes}
+
+    for path in sorted(glob.glob(args.files)):
+        if os.path.splitext(path)[1].lower() not in (".pdf", ".docx"):
+            continue
+        texts = load_chunks(path)
+        if not texts:
+            continue
+        namespace = os.path.basename(path)
+        ids = [str(uuid.uuid4()) for _ in texts]
+        vectors = embed_texts(texts, doc_provider)
+        metadatas = [{"text": t} for t in texts]
+        store.upsert(namespace, ids, vectors, metadatas)
+        lexical.add(namespace, ids, texts, metadatas)
+
+        queries = make_queries(texts, args.queries, rng)
+        query_vectors = embed_texts([q for _, q, _ in queries], query_provider)
+        print(f"{namespace}: {len(texts)} chunks, {len(queries)} queries")
+        for (kind, query, relevant), vector in zip(queries, query_vectors):
+            for mode, search in modes.items():
+                start = time.perf_counter()
+                results = search(query, vector, namespace, max(KS))
+                latency[mode].append(1000 * (time.perf_counter() - start))
+                found = [relevant(m["metadata"]["text"]) for m in results]
+                for k in KS:
+                    hits[(mode, kind, k)].append(any(found[:k]))
+
+    header = " | ".join(f"{kind[:5]}@{k:<2}" for kind in ("terms", "phrase") for k in KS)
+    print(f"\n{'mode':<14} | {header} | p50 ms")
+    for mode in modes:
+        cells = " | ".join(f"{statistics.mean(hits[(mode, kind, k)] or [0]):8.3f}"
+                           for kind in ("terms", "phrase") for k in KS)
+        print(f"{mode:<14} | {cells} | {statistics.median(latency[mode] or [0]):6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Load test: run_sql through the shared connection pool vs. a fresh
+create_engine() per question (the old behaviour), with N concurrent users.
+
+Point it at a local MySQL/MariaDB stand-in, e.g.
+    docker run -d -p 3306:3306 -e MARIADB_ROOT_PASSWORD=bench -e MARIADB_DATABASE=edi mariadb:11
+    BENCH_DB_PASSWORD=bench python benchmarks/load_test_pool.py --users 20 --queries 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_module.db_pool import configure_pool, get_pool_stats  # noqa: E402
+from mysql_module.nl_to_sql import run_sql  # noqa: E402
+
+DB_CONFIG = {
+    "host": os.getenv("BENCH_DB_HOST", "127.0.0.1"),
+    "user": os.getenv("BENCH_DB_USER", "root"),
+    "password": os.getenv("BENCH_DB_PASSWORD", ""),
+    "database": os.getenv("BENCH_DB_NAME", "edi"),
+}
+QUERY = "SELECT 1 AS ok"
+
+
+def run_sql_unpooled(query, db_config):
+    """The pre-pool run_sql: new engine (and TCP connection + auth) per call"""
+    url = URL.create("mysql+pymysql", username=db_config["user"], password=db_config["password"],
+                     host=db_config["host"], database=db_config["database"])
+    engine = create_engine(url)
+    df = pd.read_sql(query, engine)
+    engine.dispose()
+    return df
+
+
+def user_session(runner, n_queries):
+    latencies = []
+    for _ in range(n_queries):
+        start = time.perf_counter()
+        runner(QUERY, DB_CONFIG)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def load_test(name, runner, users, n_queries):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        results = list(pool.map(lambda _: user_session(runner, n_queries), range(users)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(l for session in results for l in session)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<10} | {len(latencies) / elapsed:8.1f} queries/sec | "
+          f"p50 {1000 * statistics.median(latencies):7.2f} ms | p95 {1000 * p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=50, help="queries per user")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=10)
+    args = parser.parse_args()
+
+    configure_pool(pool_size=args.pool_size, max_overflow=args.max_overflow)
+
+    print(f"{args.users} users x {args.queries} queries against {DB_CONFIG['host']}/{DB_CONFIG['database']}")
+    load_test("unpooled", run_sql_unpooled, args.users, args.queries)
+    load_test("pooled", run_sql, args.users, args.queries)
+
+    for stats in get_pool_stats():
+        print("pool stats:", stats)
+
+
+if __name__ == "__main__":
+    main()
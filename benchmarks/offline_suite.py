@@ -0,0 +1,328 @@
+"""
+Offline benchmark suite for the whole chat pipeline: no Gemini, MySQL or Pinecone.
+
+  - LLM:        fake_llm.FakeLLM through llm_provider, scripted so the router
+                returns real SQL for the benchmark questions (optional simulated latency)
+  - database:   SQLite file loaded from uploads/ipl_matches.csv (via db_pool's {"url": ...} config),
+                or the embedded DuckDB backend with --backend duckdb
+  - vectors:    LocalVectorStore in a temp directory, fake embeddings, no embedding cache
+
+Scenarios, each at increasing scale:
+  mysql_ingest     CSV -> SQLite/DuckDB table + schema registry through the backend's
+                   load_file, as on upload (rows x scale)
+  nl_to_sql        answer_mysql_question for text questions, cold caches
+  nl_to_sql_warm   the same questions again (answer cache hits)
+  plotting         chart questions, cold plot store
+  rag_ingest       sample PDF/DOCX files ingested (files x scale) into one namespace
+  rag              answer_pdf_question against that namespace
+
+Writes a JSON report; --compare flags regressions against an earlier report
+and exits with status 1 when there are any (for CI).
+
+    python benchmarks/offline_suite.py --scales 1,10,100 --output bench-report.json
+    python benchmarks/offline_suite.py --compare bench-baseline.json --tolerance 0.25
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# provider switches are read at import time by llm_provider / updated_chatwithpdf
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("EMBEDDING_PROVIDER", "fake")
+
+CSV_PATH = os.path.join(ROOT, "uploads", "ipl_matches.csv")
+TABLE_NAME = "ipl_matches"
+
+TEXT_QUESTIONS = {
+    "How many matches were played each season?":
+        "SELECT season, COUNT(*) AS matches FROM ipl_matches GROUP BY season ORDER BY season",
+    "Which team won the most matches?":
+        "SELECT winningteam, COUNT(*) AS wins FROM ipl_matches GROUP BY winningteam ORDER BY wins DESC LIMIT 1",
+    "Who was player of the match most often?":
+        "SELECT player_of_match, COUNT(*) AS awards FROM ipl_matches GROUP BY player_of_match "
+        "ORDER BY awards DESC LIMIT 5",
+    "List every match won by Chennai Super Kings":
+        "SELECT date, team1, team2, venue, margin FROM ipl_matches WHERE winningteam = 'Chennai Super Kings'",
+    "What is the average winning margin by runs per season?":
+        "SELECT season, AVG(margin) AS avg_margin FROM ipl_matches WHERE wonby = 'Runs' "
+        "GROUP BY season ORDER BY season",
+}
+CHART_QUESTIONS = {
+    "Show wins per team as a bar chart":
+        "SELECT winningteam, COUNT(*) AS wins FROM ipl_matches GROUP BY winningteam ORDER BY wins DESC",
+    "Plot the number of matches per city":
+        "SELECT city, COUNT(*) AS matches FROM ipl_matches GROUP BY city ORDER BY matches DESC LIMIT 10",
+    "Draw a pie chart of toss decisions":
+        "SELECT tossdecision, COUNT(*) AS tosses FROM ipl_matches GROUP BY tossdecision",
+}
+RAG_QUESTIONS = [
+    "What is this document about?",
+    "Which skills and tools are mentioned?",
+    "What results or accuracy were reported?",
+    "Summarize the methodology.",
+]
+
+
+def scripted_reply(prompt):
+    """Router prompts get the known SQL for the question; everything else the default fake answer"""
+    if "Respond ONLY with JSON" not in prompt:
+        return None
+    for question, sql in {**TEXT_QUESTIONS, **CHART_QUESTIONS}.items():
+        if f'User question: "{question}"' in prompt:
+            return json.dumps({"intent": "sql", "sql": sql, "reply": None})
+    return json.dumps({"intent": "chat", "sql": None, "reply": "Hi! Ask me about your data."})
+
+
+# ------------------ MEASURING ------------------
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_requests(name, scale, fn, questions, repeat):
+    """Call fn(question) repeat x for every question; latency percentiles and mean ms per stage"""
+    import tracing
+    latencies, stages = [], {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for question in questions:
+            with tracing.trace("bench") as t:
+                began = time.perf_counter()
+                fn(question)
+                latencies.append(1000 * (time.perf_counter() - began))
+            if t is not None:
+                for s in t.summary()["spans"]:
+                    if s["depth"] == 0:
+                        stages.setdefault(s["name"], []).append(s["ms"])
+    elapsed = time.perf_counter() - start
+    n = len(latencies)
+    result = {
+        "name": name,
+        "scale": scale,
+        "requests": n,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(n / elapsed, 2),
+        "latency_ms": {"p50": round(percentile(latencies, 0.5), 2),
+                       "p95": round(percentile(latencies, 0.95), 2),
+                       "max": round(max(latencies), 2)},
+        "stages_ms": {stage: round(statistics.mean(ms), 2) for stage, ms in sorted(stages.items())},
+    }
+    print(f"{name:<16} x{scale:<4} | {n:5d} req | {result['throughput_rps']:8.1f} req/s | "
+          f"p50 {result['latency_ms']['p50']:8.1f} ms | p95 {result['latency_ms']['p95']:8.1f} ms")
+    return result
+
+
+# ------------------ MYSQL PIPELINE ------------------
+def scaled_csv(workdir, scale):
+    """ipl_matches.csv repeated scale times (ids kept unique)"""
+    import pandas as pd
+    df = pd.read_csv(CSV_PATH)
+    if scale > 1:
+        copies = []
+        for i in range(scale):
+            copy = df.copy()
+            copy["ID"] = copy["ID"] + i * 10_000_000
+            copies.append(copy)
+        df = pd.concat(copies, ignore_index=True)
+    path = os.path.join(workdir, f"ipl_matches_x{scale}.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+def mysql_scenarios(workdir, scales, repeat, backend_name, chunksize=None):
+    import mysql_module.mysql_handler as handler
+    from mysql_module.backends import DuckDBBackend, MySQLBackend
+    from mysql_module.plot_store import PlotStore
+
+    results = []
+    for scale in scales:
+        schema_file = os.path.join(workdir, f"schema_x{scale}.json")
+        csv_path = scaled_csv(workdir, scale)
+
+        if backend_name == "duckdb":
+            backend = DuckDBBackend(os.path.join(workdir, f"bench_x{scale}.duckdb"), load_mode="table")
+        else:
+            backend = MySQLBackend({"url": f"sqlite:///{os.path.join(workdir, f'bench_x{scale}.sqlite')}"})
+        # the upload path process_mysql_file takes (upload_to_mysql for SQLite)
+        start = time.perf_counter()
+        backend.load_file(csv_path, TABLE_NAME, schema_file, chunksize=chunksize or handler.upload_chunksize(csv_path))
+        seconds = time.perf_counter() - start
+        rows = int(backend.run_sql(f"SELECT COUNT(*) AS n FROM {TABLE_NAME}")["n"].iloc[0])
+        results.append({"name": "mysql_ingest", "scale": scale, "rows": rows, "seconds": round(seconds, 3),
+                        "rows_per_second": round(rows / seconds, 1)})
+        print(f"{'mysql_ingest':<16} x{scale:<4} | {rows:8d} rows | {rows / seconds:10.0f} rows/s")
+
+        handler.BACKEND = backend
+        handler.SCHEMA_FILE = schema_file
+        if scale == scales[0]:
+            # start the render worker processes outside the timed runs
+            handler.answer_mysql_question(next(iter(CHART_QUESTIONS)))
+        handler.ANSWER_CACHE.invalidate()
+        results.append(run_requests("nl_to_sql", scale, handler.answer_mysql_question, list(TEXT_QUESTIONS), 1))
+        results.append(run_requests("nl_to_sql_warm", scale, handler.answer_mysql_question,
+                                    list(TEXT_QUESTIONS), repeat))
+
+        def cold_chart(question):
+            # fresh plot store and caches: every chart is planned, queried and rendered
+            shutil.rmtree(os.path.join("static", "plots"), ignore_errors=True)
+            handler.PLOT_STORE = PlotStore(os.path.join("static", "plots"), url_prefix="plots",
+                                           fmt=handler.PLOT_FORMAT)
+            handler.ANSWER_CACHE.invalidate()
+            answer = handler.answer_mysql_question(question)
+            if answer["type"] != "image":
+                raise RuntimeError(f"expected a chart for {question!r}, got {answer}")
+
+        results.append(run_requests("plotting", scale, cold_chart, list(CHART_QUESTIONS), repeat))
+    return results
+
+
+# ------------------ RAG PIPELINE ------------------
+def rag_scenarios(workdir, scales, repeat):
+    import pdf_module.pdf_handler as pdf_handler
+    import pdf_module.updated_chatwithpdf as rag
+    from pdf_module.ingest_pipeline import ingest_document
+
+    rag.EMBEDDING_CACHE_PATH = None   # measure embedding work, not cache hits
+    rag.LEXICAL_INDEX_DIR = os.path.join(workdir, "lexical_index")
+    pdf_handler.INDEX_NAME = "local:" + os.path.join(workdir, "vectors")
+    files = sorted(glob.glob(os.path.join(ROOT, "uploads", "*.pdf")) +
+                   glob.glob(os.path.join(ROOT, "uploads", "*.docx")))
+
+    results = []
+    for scale in scales:
+        namespace = f"bench-x{scale}"
+        start = time.perf_counter()
+        counts = {"pages": 0, "chunks": 0}
+        for _ in range(scale):
+            for path in files:
+                stats = ingest_document(path, namespace, pdf_handler.INDEX_NAME)
+                counts["pages"] += stats["pages"]
+                counts["chunks"] += stats["chunks"]
+        seconds = time.perf_counter() - start
+        results.append({"name": "rag_ingest", "scale": scale, "files": scale * len(files), **counts,
+                        "seconds": round(seconds, 3), "chunks_per_second": round(counts["chunks"] / seconds, 1)})
+        print(f"{'rag_ingest':<16} x{scale:<4} | {counts['chunks']:8d} chunks | "
+              f"{counts['chunks'] / seconds:10.0f} chunks/s")
+
+        results.append(run_requests("rag", scale, lambda q: pdf_handler.answer_pdf_question(q, namespace),
+                                    RAG_QUESTIONS, repeat))
+    return results
+
+
+# ------------------ REPORT ------------------
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# per scenario: (metric path, True when higher is better)
+PRIMARY_METRIC = {
+    "mysql_ingest": (("rows_per_second",), True),
+    "rag_ingest": (("chunks_per_second",), True),
+    "nl_to_sql": (("latency_ms", "p50"), False),
+    "nl_to_sql_warm": (("latency_ms", "p50"), False),
+    "plotting": (("latency_ms", "p50"), False),
+    "rag": (("latency_ms", "p50"), False),
+}
+
+
+def _metric(result, path):
+    for key in path:
+        result = result[key]
+    return result
+
+
+def compare(report, baseline, tolerance):
+    """Regressions (worse than baseline by more than tolerance) as printable lines"""
+    old = {(r["name"], r["scale"]): r for r in baseline["scenarios"]}
+    regressions = []
+    for result in report["scenarios"]:
+        before = old.get((result["name"], result["scale"]))
+        if before is None:
+            continue
+        path, higher_is_better = PRIMARY_METRIC[result["name"]]
+        new_value, old_value = _metric(result, path), _metric(before, path)
+        if not old_value:
+            continue
+        change = (new_value - old_value) / old_value
+        worse = -change if higher_is_better else change
+        label = f"{result['name']} x{result['scale']} {'.'.join(path)}: {old_value} -> {new_value} ({change:+.0%})"
+        print(("❌ " if worse > tolerance else "✅ ") + label)
+        if worse > tolerance:
+            regressions.append(label)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="1,10,100", help="row multipliers for ipl_matches.csv")
+    parser.add_argument("--rag-scales", default="1,4", help="copies of the sample documents")
+    parser.add_argument("--scenarios", default="mysql,rag", help="mysql, rag or both")
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "duckdb"], help="database for mysql scenarios")
+    parser.add_argument("--stream-chunksize", type=int, default=None,
+                        help="stream uploads in chunks of this many rows (default: only files over the size threshold)")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the question set")
+    parser.add_argument("--llm-first-token-ms", type=float, default=0.0, help="simulated LLM latency")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0, help="0 = no streaming delay")
+    parser.add_argument("--output", default="bench-report.json")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    import llm_provider
+    llm_provider.FAKE_OPTIONS.update(first_token_ms=args.llm_first_token_ms,
+                                     tokens_per_second=args.llm_tokens_per_second, reply=scripted_reply)
+
+    output = os.path.abspath(args.output)
+    workdir = tempfile.mkdtemp(prefix="offline-bench-")
+    os.chdir(workdir)   # plots and other relative paths stay out of the repo
+    scenarios = set(args.scenarios.split(","))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "scenarios": [],
+    }
+    try:
+        if "mysql" in scenarios:
+            report["scenarios"] += mysql_scenarios(workdir, [int(s) for s in args.scales.split(",")], args.repeat,
+                                                  args.backend, args.stream_chunksize)
+        if "rag" in scenarios:
+            report["scenarios"] += rag_scenarios(workdir, [int(s) for s in args.rag_scales.split(",")], args.repeat)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
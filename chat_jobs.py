@@ -0,0 +1,280 @@
+import html
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------ BACKGROUND CHAT JOBS ------------------
+# POST a question -> get a job id right away; the LLM -> SQL -> plot pipeline
+# runs on a worker pool and the browser polls or listens (SSE) for progress.
+# Streaming jobs also emit one token event per LLM chunk, so the answer appears
+# as it is written instead of after the whole generation.
+# A job runs in the process that accepted it. With several WSGI workers, give
+# JobManager a shared job store (SQLite / Redis, like the session store) so a
+# poll or SSE stream that lands on another worker still finds the job.
+
+
+class ChatJob:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = "queued"      # queued -> running -> done / error
+        self.stage = "queued"       # last progress stage reported by the pipeline
+        self.events = []            # every status/stage change, in order (for SSE replay)
+        self.result = None
+        self.error = None
+        self.partial_html = ""      # streamed answer so far (finished blocks)
+        self.partial_tail = ""      # raw text of the block still being streamed
+        self.created_at = time.time()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "result": self.result,
+            "error": self.error,
+            "partial": self.partial_html + html.escape(self.partial_tail),
+        }
+
+
+# ------------------ SHARED JOB STORES ------------------
+class SQLiteJobStore:
+    """Job snapshots and events in a SQLite file shared by every worker process on the host"""
+
+    def __init__(self, path="sessions.db", ttl_seconds=24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, data TEXT, updated_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS job_events (job_id TEXT, seq INTEGER, event TEXT, "
+                         "PRIMARY KEY (job_id, seq))")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def record(self, job_id, snapshot, event, seq):
+        """Store the job's current state and its event number seq"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO jobs (job_id, data, updated_at) VALUES (?, ?, ?)",
+                         (job_id, json.dumps(snapshot), now))
+            conn.execute("INSERT OR REPLACE INTO job_events (job_id, seq, event) VALUES (?, ?, ?)",
+                         (job_id, seq, json.dumps(event)))
+            if seq == 0:   # once per job is often enough to forget old ones
+                expired = "SELECT job_id FROM jobs WHERE updated_at < ?"
+                conn.execute(f"DELETE FROM job_events WHERE job_id IN ({expired})", (now - self.ttl_seconds,))
+                conn.execute("DELETE FROM jobs WHERE updated_at < ?", (now - self.ttl_seconds,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+        finally:
+            conn.close()
+
+    def events(self, job_id, start=0):
+        """Events from number start on"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT event FROM job_events WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                                (job_id, start)).fetchall()
+            return [json.loads(row[0]) for row in rows]
+        finally:
+            conn.close()
+
+
+class RedisJobStore:
+    """Job snapshots and events in Redis, for workers on several hosts. Pass a client."""
+
+    def __init__(self, client, ttl_seconds=24 * 3600, prefix="chat_job:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def record(self, job_id, snapshot, event, seq):
+        # events are only appended by the one thread running the job, so seq == list position
+        key = self.prefix + job_id
+        with self.client.pipeline() as pipe:
+            pipe.set(key, json.dumps(snapshot), ex=self.ttl_seconds)
+            pipe.rpush(key + ":events", json.dumps(event))
+            pipe.expire(key + ":events", self.ttl_seconds)
+            pipe.execute()
+
+    def get(self, job_id):
+        raw = self.client.get(self.prefix + job_id)
+        return json.loads(raw) if raw else None
+
+    def events(self, job_id, start=0):
+        return [json.loads(raw) for raw in self.client.lrange(self.prefix + job_id + ":events", start, -1)]
+
+
+def create_job_store(backend="memory", **options):
+    """
+    Shared store for the session backend in use: None for "memory" (jobs stay in
+    this process), SQLiteJobStore for "sqlite" (path=...), RedisJobStore for "redis" (url=...)
+    """
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        return SQLiteJobStore(**options)
+    if backend == "redis":
+        import redis
+        url = options.pop("url", "redis://localhost:6379/0")
+        return RedisJobStore(redis.Redis.from_url(url), **options)
+    raise ValueError(f"Unknown job store backend '{backend}'. Use memory, sqlite or redis.")
+
+
+# ------------------ JOB MANAGER ------------------
+class JobManager:
+    def __init__(self, max_workers=8, keep_finished=500, store=None, poll_seconds=0.1):
+        """
+        store: shared job store (see create_job_store) that other worker
+        processes read status / events from; None keeps jobs in this process.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-job")
+        self._jobs = OrderedDict()
+        self._keep_finished = keep_finished
+        self._cond = threading.Condition()
+        self._store = store
+        self._poll_seconds = poll_seconds
+
+    # -------- submitting --------
+    def submit(self, fn, *args, on_done=None, on_error=None, stream=False, **kwargs):
+        """
+        Run fn(*args, progress=callback, **kwargs) in the background.
+        stream=True also passes on_token=callback(delta, html, tail); every call
+        becomes a token event for SSE listeners.
+        on_done(result) / on_error(exception) are called when the job finishes.
+        Returns the job id.
+        """
+        job = ChatJob(uuid.uuid4().hex)
+        with self._cond:
+            self._jobs[job.id] = job
+            self._prune()
+            self._record(job)
+        if stream:
+            kwargs["on_token"] = lambda delta, html_part, tail: self._token(job, delta, html_part, tail)
+        self._executor.submit(self._run, job, fn, args, kwargs, on_done, on_error)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs, on_done, on_error):
+        self._update(job, status="running", stage="started")
+        try:
+            result = fn(*args, progress=lambda stage: self._update(job, stage=stage), **kwargs)
+            if on_done is not None:
+                on_done(result)
+            self._update(job, status="done", stage="done", result=result)
+        except Exception as e:
+            print("❌ Chat job failed:", e)
+            if on_error is not None:
+                on_error(e)
+            self._update(job, status="error", stage="error", error=str(e))
+
+    def _update(self, job, **changes):
+        with self._cond:
+            for key, value in changes.items():
+                setattr(job, key, value)
+            self._record(job)
+            self._cond.notify_all()
+
+    def _token(self, job, delta, html_part, tail):
+        with self._cond:
+            if job.stage != "streaming":
+                job.stage = "streaming"
+            job.partial_html += html_part
+            job.partial_tail = tail
+            self._append(job, {"status": job.status, "stage": job.stage,
+                               "token": delta, "html": html_part, "tail": tail})
+            self._cond.notify_all()
+
+    def _record(self, job):
+        self._append(job, {"status": job.status, "stage": job.stage})
+
+    def _append(self, job, event):
+        job.events.append(event)
+        if self._store is not None:
+            try:
+                self._store.record(job.id, job.to_dict(), event, len(job.events) - 1)
+            except Exception as e:
+                print("⚠️ Could not write job to the shared store:", e)
+
+    def _prune(self):
+        # forget the oldest finished jobs once too many are kept around
+        finished = [jid for jid, j in self._jobs.items() if j.status in ("done", "error")]
+        for jid in finished[:max(0, len(finished) - self._keep_finished)]:
+            del self._jobs[jid]
+
+    # -------- reading --------
+    def status(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+        return self._store.get(job_id) if self._store is not None else None
+
+    def events(self, job_id, timeout=120):
+        """Yield every stage change of a job until it finishes (blocking, for SSE)"""
+        with self._cond:
+            local = job_id in self._jobs
+        if not local and self._store is not None:
+            yield from self._stored_events(job_id, timeout)
+            return
+        sent = 0
+        deadline = time.time() + timeout
+        while True:
+            with self._cond:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                while sent == len(job.events) and time.time() < deadline:
+                    self._cond.wait(timeout=max(0.0, deadline - time.time()))
+                new_events = job.events[sent:]
+                sent = len(job.events)
+                finished = job.status in ("done", "error")
+                snapshot = job.to_dict()
+            for event in new_events:
+                yield dict(event, job_id=job_id)
+            if finished:
+                yield dict(snapshot, stage="finished")
+                return
+            if time.time() >= deadline:
+                return
+
+    def _stored_events(self, job_id, timeout):
+        """events() for a job running in another worker process: polls the shared store"""
+        sent = 0
+        deadline = time.time() + timeout
+        while True:
+            new_events = self._store.events(job_id, sent)
+            sent += len(new_events)
+            snapshot = self._store.get(job_id)
+            for event in new_events:
+                yield dict(event, job_id=job_id)
+            if snapshot is None:
+                return
+            if snapshot["status"] in ("done", "error"):
+                # the snapshot may be newer than the events read above
+                for event in self._store.events(job_id, sent):
+                    yield dict(event, job_id=job_id)
+                yield dict(snapshot, stage="finished")
+                return
+            if time.time() >= deadline:
+                return
+            time.sleep(self._poll_seconds)
+
+
+def sse_format(event):
+    """One Server-Sent Events message"""
+    return f"data: {json.dumps(event)}\n\n"
@@ -0,0 +1,50 @@
+import re
+import time
+
+# ------------------ FAKE LLM ------------------
+# Offline stand-in for Gemini: a deterministic markdown answer built from the
+# prompt, emitted token by token on a fixed schedule (first-token delay, then a
+# steady tokens/second). Used to exercise the streaming path and in benchmarks.
+
+
+class FakeLLM:
+    """reply: fixed answer text, or reply(prompt) -> text (None falls back to the built-in answer)"""
+
+    def __init__(self, first_token_ms=400, tokens_per_second=40, reply=None):
+        self.first_token_ms = first_token_ms
+        self.tokens_per_second = tokens_per_second
+        self.reply = reply
+
+    def _answer(self, prompt):
+        if callable(self.reply):
+            scripted = self.reply(prompt)
+            if scripted is not None:
+                return scripted
+        elif self.reply is not None:
+            return self.reply
+        question = re.search(r"(?:Question|The user asked):\s*(.+)", prompt)
+        question = question.group(1).strip() if question else "your question"
+        # notable terms from the context / query result part of the prompt, not the instructions
+        context = re.split(r"Context:|SQL query result:", prompt, maxsplit=1)[-1]
+        words = list(dict.fromkeys(re.findall(r"[A-Za-z][A-Za-z0-9_-]{3,}", context)))[:12]
+        return (
+            f"## Answer\n\nHere is what I found about **{question}**.\n\n"
+            + "".join(f"- `{w}` appears in the provided context\n" for w in words[:4])
+            + f"\nThe context had {len(prompt)} characters and {len(words)} notable terms. "
+            "This reply was produced by the fake LLM, so it only shows the streaming path."
+        )
+
+    def tokens(self, prompt):
+        """Answer split into word-sized tokens (whitespace kept, so ''.join() restores it)"""
+        return re.findall(r"\s*\S+|\s+", self._answer(prompt))
+
+    def stream(self, prompt):
+        time.sleep(self.first_token_ms / 1000)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        for i, token in enumerate(self.tokens(prompt)):
+            if i and delay:
+                time.sleep(delay)
+            yield token
+
+    def generate(self, prompt):
+        return "".join(self.stream(prompt))
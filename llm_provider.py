@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+
+import tracing
+
+# ------------------ SHARED LLM PROVIDER ------------------
+# One Gemini client per (model, api key, generation config) for the whole
+# process, instead of genai.configure() + GenerativeModel() on every request.
+# Reusing the model keeps its transport channel (and connections) alive;
+# every call gets a timeout and goes through a process-wide concurrency limit.
+#
+#   LLM_PROVIDER         "gemini" (default) or "fake" (fake_llm.FakeLLM, offline)
+#   LLM_TIMEOUT_SECONDS  per-request timeout
+#   LLM_MAX_CONCURRENCY  LLM/embedding requests in flight per process
+#   LLM_TRANSPORT        genai transport ("grpc" default, "rest")
+#   LLM_API_ENDPOINT     override the API host, e.g. a local stub server
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TRANSPORT = os.getenv("LLM_TRANSPORT")
+LLM_API_ENDPOINT = os.getenv("LLM_API_ENDPOINT")
+# FakeLLM options (first_token_ms, tokens_per_second, reply) used by the fake provider
+FAKE_OPTIONS = {}
+
+_lock = threading.Lock()
+_UNSET = object()
+_configured_key = _UNSET
+_clients = {}
+_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_stats = {"calls": 0, "errors": 0, "total_ms": 0.0, "slot_wait_ms": 0.0, "configures": 0}
+
+
+def _record_usage(usage, prompt, completion_chars):
+    """Token counts for the current trace span (API usage metadata, or ~4 chars per token)"""
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or len(str(prompt)) // 4
+    completion_tokens = getattr(usage, "candidates_token_count", None) or completion_chars // 4
+    tracing.record(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, llm_calls=1)
+
+
+def configure(api_key=None):
+    """genai.configure, but only when the key actually changes"""
+    global _configured_key
+    import google.generativeai as genai
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    with _lock:
+        if api_key == _configured_key:
+            return
+        options = {}
+        if LLM_TRANSPORT:
+            options["transport"] = LLM_TRANSPORT
+        if LLM_API_ENDPOINT:
+            options["client_options"] = {"api_endpoint": LLM_API_ENDPOINT}
+        genai.configure(api_key=api_key, **options)
+        _configured_key = api_key
+        _stats["configures"] += 1
+
+
+class _Slot:
+    """Concurrency slot + call timing"""
+
+    def __enter__(self):
+        start = time.perf_counter()
+        _slots.acquire()
+        self.started = time.perf_counter()
+        self._record(slot_wait_ms=1000 * (self.started - start))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _slots.release()
+        self._record(calls=1, errors=int(exc_type is not None),
+                     total_ms=1000 * (time.perf_counter() - self.started))
+        return False
+
+    @staticmethod
+    def _record(**values):
+        with _lock:
+            for key, value in values.items():
+                _stats[key] += value
+
+
+class GeminiClient:
+    def __init__(self, model_name, api_key=None, timeout=None, **generation_config):
+        import google.generativeai as genai
+        self.api_key = api_key
+        self.timeout = timeout or LLM_TIMEOUT_SECONDS
+        configure(api_key)
+        self.model = genai.GenerativeModel(model_name, generation_config=generation_config or None)
+
+    def generate(self, prompt):
+        configure(self.api_key)
+        with _Slot():
+            response = self.model.generate_content(prompt, request_options={"timeout": self.timeout})
+        _record_usage(getattr(response, "usage_metadata", None), prompt, len(response.text))
+        return response.text
+
+    def stream(self, prompt):
+        """Yield text pieces as they arrive; the concurrency slot is held until the stream ends"""
+        configure(self.api_key)
+        with _Slot():
+            response = self.model.generate_content(prompt, stream=True, request_options={"timeout": self.timeout})
+            usage, size = None, 0
+            for chunk in response:
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    size += len(chunk.text)
+                    yield chunk.text
+            _record_usage(usage, prompt, size)
+
+
+class FakeClient:
+    """Same interface as GeminiClient, answered by fake_llm.FakeLLM"""
+
+    def __init__(self, **fake_options):
+        from fake_llm import FakeLLM
+        self.llm = FakeLLM(**fake_options)
+
+    def generate(self, prompt):
+        with _Slot():
+            text = self.llm.generate(prompt)
+        _record_usage(None, prompt, len(text))
+        return text
+
+    def stream(self, prompt):
+        with _Slot():
+            size = 0
+            for token in self.llm.stream(prompt):
+                size += len(token)
+                yield token
+        _record_usage(None, prompt, size)
+
+
+def get_llm(model_name="gemini-2.5-flash", api_key=None, **generation_config):
+    """Shared client for this model/key/config (created on first use)"""
+    key = (LLM_PROVIDER, model_name, api_key, tuple(sorted(generation_config.items())))
+    client = _clients.get(key)
+    if client is None:
+        client = FakeClient(**FAKE_OPTIONS) if LLM_PROVIDER == "fake" else GeminiClient(model_name, api_key, **generation_config)
+        with _lock:
+            client = _clients.setdefault(key, client)
+    return client
+
+
+def embed_content(api_key=None, **kwargs):
+    """genai.embed_content through the shared configuration, timeout and concurrency limit"""
+    import google.generativeai as genai
+    configure(api_key)
+    with _Slot():
+        return genai.embed_content(request_options={"timeout": LLM_TIMEOUT_SECONDS}, **kwargs)
+
+
+def llm_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["avg_call_ms"] = round(stats["total_ms"] / stats["calls"], 1) if stats["calls"] else 0.0
+    stats.update(provider=LLM_PROVIDER, clients=len(_clients), max_concurrency=LLM_MAX_CONCURRENCY)
+    return stats
@@ -1,23 +1,37 @@
-from flask import Flask, render_template, request
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, session
 import os
 
-from mysql_module.mysql_handler import process_mysql_file, answer_mysql_question
+from chat_jobs import JobManager, create_job_store, sse_format
+from session_store import create_session_store, new_session_id, new_message, set_message_answer
+from tracing import trace, render_metrics
+
+from mysql_module.mysql_handler import process_mysql_file, answer_mysql_question, mysql_pool_stats, mysql_cache_stats, mysql_plot_stats, mysql_advisor_stats, mysql_apply_advice
 from pdf_module.pdf_handler import process_pdf_file, answer_pdf_question
 
 app = Flask(__name__)
 app.config["UPLOAD_FOLDER"] = "uploads"
 app.config["SECRET_KEY"] = "secret123"
 
-# Global state (simple for single-user / demo use)
-chat_history = []          # list of {"user": ..., "bot": ...}
-current_mode = None        # "mysql" or "pdf"
-current_namespace = None   # used only for PDF/DOC
+# Per-user state (mode, namespace, history) lives in a session store keyed by a
+# session cookie: "memory" for one worker, "sqlite"/"redis" for many
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+sessions = create_session_store(SESSION_BACKEND)
+
+# Background workers for the async chat mode
+JOB_WORKERS = 8
+# job status / events go to the same backend as sessions, so any worker can answer a poll
+jobs = JobManager(max_workers=JOB_WORKERS, store=create_job_store(SESSION_BACKEND))
+
+
+def session_id():
+    """Session id from the signed session cookie (a new one on first visit)"""
+    if "sid" not in session:
+        session["sid"] = new_session_id()
+    return session["sid"]
 
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    global current_mode, current_namespace, chat_history
-
     if request.method == "POST":
         file = request.files.get("file")
 
@@ -30,57 +44,143 @@ def index():
         info_msg = ""
 
         # Decide module based on extension
-        if ext in ["csv", "xlsx"]:
-            current_mode = "mysql"
-            current_namespace = None
+        if ext in ["csv", "xlsx", "parquet"]:
             result = process_mysql_file(file, upload_folder=app.config["UPLOAD_FOLDER"])
             info_msg = result["message"]
-            chat_history = []   # clear history when new file uploaded
+            mode, namespace = "mysql", None
 
         elif ext in ["pdf", "doc", "docx"]:
-            current_mode = "pdf"
             result = process_pdf_file(file, upload_folder=app.config["UPLOAD_FOLDER"])
-            current_namespace = result["namespace"]
             info_msg = result["message"]
-            chat_history = []   # clear history when new file uploaded
+            mode, namespace = "pdf", result["namespace"]
 
         else:
             return render_template("index.html", error="Unsupported file type.")
 
+        # clear history when new file uploaded
+        state = {"mode": mode, "namespace": namespace, "filename": file.filename, "history": []}
+        sessions.save(session_id(), state)
+
         # Go directly to chat page after upload
-        return render_template("chat.html", messages=chat_history, info_msg=info_msg)
+        return render_template("chat.html", messages=state["history"], info_msg=info_msg)
 
     return render_template("index.html")
 
 
+def answer_question(question, mode, namespace, progress=None, on_token=None):
+    # Every stage span of this request ends up in the answer's timings
+    with trace(mode or "none") as t:
+        answer = route_question(question, mode, namespace, progress=progress, on_token=on_token)
+    if t is not None:
+        answer = dict(answer, timings=t.summary())
+    return answer
+
+
+def route_question(question, mode, namespace, progress=None, on_token=None):
+    # Decide which module to call
+    if mode == "mysql":
+        return answer_mysql_question(question, progress=progress, on_token=on_token)
+
+    elif mode == "pdf":
+        if namespace is None:
+            return {"type": "text", "content": "No document loaded. Please upload a file again."}
+        return answer_pdf_question(question, namespace, progress=progress, on_token=on_token)
+
+    return {"type": "text", "content": "Please upload a file first."}
+
+
 @app.route("/chat", methods=["GET", "POST"])
 def chat():
-    global chat_history, current_mode, current_namespace
+    sid = session_id()
+    state = sessions.get(sid)
 
     if request.method == "POST":
         question = request.form.get("question")
 
         if question:
             # Store user message
-            chat_history.append({"user": question, "bot": None})
+            message = new_message(question)
+            sessions.update(sid, lambda data: data["history"].append(message))
+
+            answer = answer_question(question, state["mode"], state["namespace"])
 
-            # Decide which module to call
-            if current_mode == "mysql":
-                answer = answer_mysql_question(question)
+            # Store bot message (string or image info)
+            set_message_answer(sessions, sid, message["id"], answer)
+            state = sessions.get(sid)
 
-            elif current_mode == "pdf":
-                if current_namespace is None:
-                    answer = {"type": "text", "content": "No document loaded. Please upload a file again."}
-                else:
-                    answer = answer_pdf_question(question, current_namespace)
+    return render_template("chat.html", messages=state["history"])
 
-            else:
-                answer = {"type": "text", "content": "Please upload a file first."}
 
-            # Store bot message (string or image info)
-            chat_history[-1]["bot"] = answer
+# Async job mode: POST returns a job id, the pipeline runs on the worker pool
+@app.route("/chat/jobs", methods=["POST"])
+def submit_chat_job():
+    question = request.form.get("question") or (request.get_json(silent=True) or {}).get("question")
+    if not question:
+        return jsonify({"error": "Missing question."}), 400
+
+    sid = session_id()
+    state = sessions.get(sid)
+    message = new_message(question)
+    sessions.update(sid, lambda data: data["history"].append(message))
+
+    def on_done(answer):
+        set_message_answer(sessions, sid, message["id"], answer)
+
+    def on_error(error):
+        set_message_answer(sessions, sid, message["id"], {"type": "text", "content": f"Error generating response: {error}"})
+
+    # stream=True: the text answer arrives as token events while the LLM writes it
+    job_id = jobs.submit(answer_question, question, state["mode"], state["namespace"],
+                         on_done=on_done, on_error=on_error, stream=True)
+    return jsonify({"job_id": job_id}), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job."}), 404
+    return jsonify(status)
+
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    if jobs.status(job_id) is None:
+        return jsonify({"error": "Unknown job."}), 404
+    stream = (sse_format(event) for event in jobs.events(job_id))
+    return Response(stream_with_context(stream), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/pool_stats")
+def pool_stats():
+    return jsonify(mysql_pool_stats())
+
+
+@app.route("/cache_stats")
+def cache_stats():
+    return jsonify(mysql_cache_stats())
+
+
+@app.route("/plot_stats")
+def plot_stats():
+    return jsonify(mysql_plot_stats())
+
+
+@app.route("/advisor_stats")
+def advisor_stats():
+    return jsonify(mysql_advisor_stats())
+
+
+@app.route("/advisor/apply", methods=["POST"])
+def advisor_apply():
+    return jsonify(mysql_apply_advice())
+
 
-    return render_template("chat.html", messages=chat_history)
+@app.route("/metrics")
+def metrics():
+    """Stage latency histograms and token/byte counters, Prometheus text format"""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
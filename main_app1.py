@@ -1,21 +1,34 @@
-from flask import Flask, render_template, request
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, session
 import os
 
+from chat_jobs import JobManager, create_job_store, sse_format
+from session_store import create_session_store, new_session_id, new_message, set_message_answer
+from tracing import trace, render_metrics
+
 app = Flask(__name__)
 app.config["UPLOAD_FOLDER"] = "uploads"
 app.config["SECRET_KEY"] = "secret123"
 
-# Global state
-chat_history = []
-current_mode = None        # "mysql" or "pdf"
-current_namespace = None   # Only for PDF/DOC
-current_filename = None 
+# Per-user state (mode, namespace, filename, history) lives in a session store
+# keyed by a session cookie: "memory" for one worker, "sqlite"/"redis" for many
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+sessions = create_session_store(SESSION_BACKEND)
+
+# Background workers for the async chat mode; throughput scales with this, not with WSGI workers
+JOB_WORKERS = 8
+# job status / events go to the same backend as sessions, so any worker can answer a poll
+jobs = JobManager(max_workers=JOB_WORKERS, store=create_job_store(SESSION_BACKEND))
+
+
+def session_id():
+    """Session id from the signed session cookie (a new one on first visit)"""
+    if "sid" not in session:
+        session["sid"] = new_session_id()
+    return session["sid"]
 
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    global current_mode, current_namespace, chat_history,current_filename
-
     if request.method == "POST":
         file = request.files.get("file")
 
@@ -23,7 +36,6 @@ def index():
             return render_template("index1.html", error="Please select a file.")
 
         filename = file.filename
-        current_filename=filename
         ext = filename.lower().split(".")[-1]
 
         info_msg = ""
@@ -32,68 +44,166 @@ def index():
         # Lazy import (important!)
         # ==============================
 
-        if ext in ["csv", "xlsx"]:
-            current_mode = "mysql"
-            current_namespace = None
-
+        if ext in ["csv", "xlsx", "parquet"]:
             from mysql_module.mysql_handler import process_mysql_file
             result = process_mysql_file(file, upload_folder=app.config["UPLOAD_FOLDER"])
             info_msg = result["message"]
-
-            chat_history = []  # clear chat
+            mode, namespace = "mysql", None
 
         elif ext in ["pdf", "doc", "docx"]:
-            current_mode = "pdf"
-
             from pdf_module.pdf_handler import process_pdf_file
             result = process_pdf_file(file, upload_folder=app.config["UPLOAD_FOLDER"])
-            current_namespace = result["namespace"]
             info_msg = result["message"]
-
-            chat_history = []
+            mode, namespace = "pdf", result["namespace"]
 
         else:
             return render_template("index1.html", error="Unsupported file type.")
 
-        return render_template("chat1.html", messages=chat_history, info_msg=info_msg,filename=current_filename,)
+        # new file -> new active dataset and a clear chat
+        state = {"mode": mode, "namespace": namespace, "filename": filename, "history": []}
+        sessions.save(session_id(), state)
+
+        return render_template("chat1.html", messages=state["history"], info_msg=info_msg,filename=filename,)
 
     return render_template("index1.html")
 
 
+def answer_question(question, mode, namespace, progress=None, on_token=None):
+    # Every stage span of this request ends up in the answer's timing footer
+    with trace(mode or "none") as t:
+        answer = route_question(question, mode, namespace, progress=progress, on_token=on_token)
+    if t is not None:
+        answer = dict(answer, timings=t.summary())
+    return answer
+
+
+def route_question(question, mode, namespace, progress=None, on_token=None):
+    # ==============================
+    # Lazy import here also
+    # ==============================
+
+    if mode == "mysql":
+        from mysql_module.mysql_handler import answer_mysql_question
+        return answer_mysql_question(question, progress=progress, on_token=on_token)
+
+    elif mode == "pdf":
+        from pdf_module.pdf_handler import answer_pdf_question
+        return answer_pdf_question(question, namespace, progress=progress, on_token=on_token)
+
+    return {"type": "text", "content": "Please upload a file first."}
+
+
+def last_sql_query(history):
+    for msg in reversed(history):
+        if msg["bot"]:
+            return msg["bot"].get("sql_query")
+    return None
+
+
 @app.route("/chat1", methods=["GET", "POST"])
 def chat():
-    global chat_history, current_mode, current_namespace,current_filename
+    sid = session_id()
+    state = sessions.get(sid)
 
-    if current_mode is None:
+    if state["mode"] is None:
         return render_template("index1.html", error="Please upload a file first.")
 
     if request.method == "POST":
         question = request.form.get("question")
 
         if question:
-            chat_history.append({"user": question, "bot": None})
+            message = new_message(question)
+            state = sessions.update(sid, lambda data: data["history"].append(message))
+            answer = answer_question(question, state["mode"], state["namespace"])
+            set_message_answer(sessions, sid, message["id"], answer)
+            state = sessions.get(sid)
+
+
+    return render_template("chat1.html", messages=state["history"],info_msg=None,
+        filename=state["filename"],sql_query=last_sql_query(state["history"]))
+
+
+# ==============================
+# Async job mode: POST returns a job id, the pipeline runs on the worker pool
+# ==============================
+
+@app.route("/chat1/jobs", methods=["POST"])
+def submit_chat_job():
+    sid = session_id()
+    state = sessions.get(sid)
+    if state["mode"] is None:
+        return jsonify({"error": "Please upload a file first."}), 400
+
+    question = request.form.get("question") or (request.get_json(silent=True) or {}).get("question")
+    if not question:
+        return jsonify({"error": "Missing question."}), 400
+
+    message = new_message(question)
+    sessions.update(sid, lambda data: data["history"].append(message))
+
+    def on_done(answer):
+        set_message_answer(sessions, sid, message["id"], answer)
+
+    def on_error(error):
+        set_message_answer(sessions, sid, message["id"], {"type": "text", "content": f"Error generating response: {error}"})
+
+    # stream=True: the text answer arrives as token events while the LLM writes it
+    job_id = jobs.submit(answer_question, question, state["mode"], state["namespace"],
+                         on_done=on_done, on_error=on_error, stream=True)
+    return jsonify({"job_id": job_id}), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job."}), 404
+    return jsonify(status)
+
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    if jobs.status(job_id) is None:
+        return jsonify({"error": "Unknown job."}), 404
+    stream = (sse_format(event) for event in jobs.events(job_id))
+    return Response(stream_with_context(stream), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/pool_stats")
+def pool_stats():
+    from mysql_module.mysql_handler import mysql_pool_stats
+    return jsonify(mysql_pool_stats())
+
+
+@app.route("/cache_stats")
+def cache_stats():
+    from mysql_module.mysql_handler import mysql_cache_stats
+    return jsonify(mysql_cache_stats())
+
 
-            # ==============================
-            # Lazy import here also
-            # ==============================
+@app.route("/plot_stats")
+def plot_stats():
+    from mysql_module.mysql_handler import mysql_plot_stats
+    return jsonify(mysql_plot_stats())
 
-            if current_mode == "mysql":
-                from mysql_module.mysql_handler import answer_mysql_question
-                answer = answer_mysql_question(question)
 
-            elif current_mode == "pdf":
-                from pdf_module.pdf_handler import answer_pdf_question
-                answer = answer_pdf_question(question, current_namespace)
+@app.route("/advisor_stats")
+def advisor_stats():
+    from mysql_module.mysql_handler import mysql_advisor_stats
+    return jsonify(mysql_advisor_stats())
 
-            else:
-                answer = {"type": "text", "content": "Please upload a file first."}
 
-            chat_history[-1]["bot"] = answer
-            current_sql_query = answer.get("sql_query", None)
+@app.route("/advisor/apply", methods=["POST"])
+def advisor_apply():
+    from mysql_module.mysql_handler import mysql_apply_advice
+    return jsonify(mysql_apply_advice())
 
 
-    return render_template("chat1.html", messages=chat_history,info_msg=None,
-        filename=current_filename,sql_query=current_sql_query)
+@app.route("/metrics")
+def metrics():
+    """Stage latency histograms and token/byte counters, Prometheus text format"""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+import json
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------ KEY NORMALIZATION ------------------
+def normalize_question(question):
+    """Lower-case, collapse whitespace and drop trailing punctuation so trivial rewordings share a key"""
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip(" ?!.")
+
+
+# ------------------ BACKENDS ------------------
+class LRUTTLCache:
+    """In-memory LRU cache where every entry also expires after ttl_seconds"""
+
+    def __init__(self, max_entries=512, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    On-disk cache with the same interface as LRUTTLCache.
+    Values are pickled; shared by every worker process that points at the same file.
+    """
+
+    def __init__(self, path, table, max_entries=5000, ttl_seconds=3600):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, last_used REAL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            conn.execute(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (now, key))
+            return pickle.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value), now + self.ttl_seconds, now),
+            )
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+            # LRU: keep only the most recently used max_entries rows
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key NOT IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+# ------------------ LAYERED ANSWER CACHE ------------------
+class AnswerCache:
+    """
+    One cache per stage of answer_mysql_question:
+        intent - question -> is it a data question?
+        sql    - question -> generated SQL
+        result - SQL -> result DataFrame
+        answer - (question, SQL) -> final NL text / plot response
+    Keys always include the schema registry version, and every layer is cleared on upload.
+    """
+
+    LAYERS = ("intent", "sql", "result", "answer")
+
+    def __init__(self, max_entries=512, ttl_seconds=3600, sqlite_path=None):
+        if sqlite_path:
+            self._layers = {
+                layer: SQLiteCache(sqlite_path, f"cache_{layer}", max_entries, ttl_seconds)
+                for layer in self.LAYERS
+            }
+        else:
+            self._layers = {layer: LRUTTLCache(max_entries, ttl_seconds) for layer in self.LAYERS}
+        self._hits = {layer: 0 for layer in self.LAYERS}
+        self._misses = {layer: 0 for layer in self.LAYERS}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts):
+        return json.dumps(parts, ensure_ascii=False)
+
+    def get(self, layer, *key_parts):
+        value = self._layers[layer].get(self.make_key(*key_parts))
+        with self._lock:
+            if value is None:
+                self._misses[layer] += 1
+            else:
+                self._hits[layer] += 1
+        return value
+
+    def set(self, layer, value, *key_parts):
+        if value is not None:
+            self._layers[layer].set(self.make_key(*key_parts), value)
+
+    def invalidate(self):
+        """Drop every layer, e.g. after a table is (re-)uploaded"""
+        for cache in self._layers.values():
+            cache.clear()
+        print("🧹 Answer cache invalidated")
+
+    def stats(self):
+        """Hit / miss counts and hit rate per layer"""
+        report = {}
+        for layer in self.LAYERS:
+            hits, misses = self._hits[layer], self._misses[layer]
+            total = hits + misses
+            report[layer] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "entries": len(self._layers[layer]),
+            }
+        return report
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+
+from sqlalchemy import text
+
+from .db_pool import pooled_connection
+from .nl_to_sql import run_sql, _with_row_cap, MAX_RESULT_ROWS
+from .sql_guard import cancel_after
+from .strtomysql import upload_to_mysql, clean_column_names, read_table_file, save_schema
+
+# ------------------ QUERY BACKENDS ------------------
+# Uploaded tables live in one query backend:
+#   MySQLBackend   rows are inserted into a MySQL server on upload (the original path)
+#   DuckDBBackend  embedded columnar engine: Parquet (and optionally CSV) is queried
+#                  in place, CSV/Excel bulk-loaded with DuckDB's parallel reader
+# Both fill the same schema registry. The LLM keeps writing MySQL; DuckDB
+# transpiles it with sqlglot before running it.
+
+NULL_MARKERS = ["", "NA", "N/A", "NULL", "null", "NaN", "nan"]
+
+
+class MySQLBackend:
+    """MySQL server from DB_CONFIG, or a SQLite database given as {"url": "sqlite:///..."}"""
+    name = "mysql"
+
+    def __init__(self, db_config):
+        self.db_config = db_config
+        url = str(db_config.get("url", ""))
+        self.dialect = "sqlite" if url.startswith("sqlite") else "mysql"
+
+    def load_file(self, file_path, table_name, schema_file, chunksize=None):
+        """Upload a CSV / Excel file and register its schema; returns {column: type}"""
+        return upload_to_mysql(
+            file_path=file_path,
+            table_name=table_name,
+            db_config=self.db_config,   # same pooled engine the queries use
+            schema_file=schema_file,
+            chunksize=chunksize,
+        )
+
+    def run_sql(self, query, max_rows=MAX_RESULT_ROWS, timeout=None):
+        return run_sql(query, self.db_config, max_rows=max_rows, timeout=timeout)
+
+    def estimate_rows(self, query):
+        """Rows MySQL expects to examine (see explain_rows). None on SQLite, whose plans carry no estimates."""
+        if self.dialect != "mysql":
+            return None
+        with pooled_connection(self.db_config) as conn:
+            # no_parameters: '%' in LIKE patterns must not be read as placeholders
+            plan = conn.execution_options(no_parameters=True).exec_driver_sql("EXPLAIN " + query)
+            return explain_rows(plan.mappings().all())
+
+    def execute(self, statement):
+        """DDL / statements without a result (CREATE INDEX, CREATE TABLE ... AS)"""
+        with pooled_connection(self.db_config) as conn:
+            conn.execute(text(statement))
+            conn.commit()
+
+
+def explain_rows(plan):
+    """
+    Rows examined according to MySQL EXPLAIN rows: within one select id the
+    tables are nested-loop joined (rows multiply); separate selects (subqueries,
+    derived tables, UNION parts) run one after another (rows add up).
+    """
+    per_select = {}
+    for row in plan:
+        if row.get("rows") is None:   # UNION RESULT, "Select tables optimized away", ...
+            continue
+        select_id = row.get("id")
+        per_select[select_id] = per_select.get(select_id, 1) * int(row["rows"])
+    return sum(per_select.values())
+
+
+def _quote(identifier):
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class DuckDBBackend:
+    """
+    database: DuckDB file (":memory:" for a throwaway one).
+    load_mode: "auto" (Parquet in place, CSV/Excel loaded), "view" (CSV/Parquet in
+    place, zero ingest) or "table" (always load into DuckDB's columnar storage).
+    """
+    name = "duckdb"
+    dialect = "duckdb"
+
+    def __init__(self, database="analytics.duckdb", load_mode="auto", threads=None):
+        if load_mode not in ("auto", "view", "table"):
+            raise ValueError(f"Unknown DuckDB load mode '{load_mode}', use auto, view or table")
+        self.database = database
+        self.load_mode = load_mode
+        self.threads = threads
+        self._con = None
+        self._lock = threading.Lock()
+
+    def _cursor(self):
+        """
+        A new handle on the shared database (DuckDB connections are not shared
+        across threads); use it as a context manager so it is closed.
+        """
+        with self._lock:
+            if self._con is None:
+                import duckdb
+                self._con = duckdb.connect(self.database)
+                if self.threads:
+                    self._con.execute(f"SET threads = {int(self.threads)}")
+            return self._con.cursor()
+
+    # -------- loading --------
+    def _source(self, cur, file_path):
+        """FROM clause reading the file, and whether it may stay a view over the file"""
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == ".parquet":
+            return f"read_parquet({_literal(file_path)})", self.load_mode != "table"
+        if ext == ".csv":
+            # same missing-value markers pandas reads as NaN on the MySQL path
+            return f"read_csv_auto({_literal(file_path)}, nullstr={NULL_MARKERS})", self.load_mode == "view"
+        # Excel has no DuckDB reader here: pandas reads it, DuckDB copies the frame
+        cur.register("upload_frame", read_table_file(file_path))
+        return "upload_frame", False
+
+    def load_file(self, file_path, table_name, schema_file, chunksize=None):
+        """
+        Make file_path queryable as table_name and register its schema from
+        DuckDB's catalog; returns {column: type}. chunksize is not needed here.
+        """
+        with self._cursor() as cur:
+            source, as_view = self._source(cur, file_path)
+            columns = [row[0] for row in cur.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+            select = ", ".join(f"{_quote(c)} AS {_quote(n)}" for c, n in zip(columns, clean_column_names(columns)))
+
+            existing = cur.execute(
+                "SELECT table_type FROM information_schema.tables WHERE table_name = ?", [table_name]
+            ).fetchone()
+            if existing:
+                kind = "VIEW" if existing[0] == "VIEW" else "TABLE"
+                cur.execute(f"DROP {kind} {_quote(table_name)}")
+            kind = "VIEW" if as_view else "TABLE"
+            cur.execute(f"CREATE {kind} {_quote(table_name)} AS SELECT {select} FROM {source}")
+
+            schema_dict, samples = self._catalog(cur, table_name)
+        save_schema(schema_file, table_name, schema_dict, samples)
+        print(f"✅ File '{file_path}' registered in DuckDB as {kind.lower()} '{table_name}'.")
+        return schema_dict
+
+    def _catalog(self, cur, table_name, n_samples=5, max_len=40):
+        """{column: type} from information_schema, plus frequent values of text columns"""
+        rows = cur.execute(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_name = ? ORDER BY ordinal_position", [table_name]
+        ).fetchall()
+        schema_dict = dict(rows)
+        samples = {}
+        for col, col_type in rows:
+            if col_type != "VARCHAR":
+                continue
+            values = cur.execute(
+                f"SELECT {_quote(col)} FROM {_quote(table_name)} WHERE {_quote(col)} IS NOT NULL "
+                f"GROUP BY 1 ORDER BY count(*) DESC LIMIT {n_samples}"
+            ).fetchall()
+            samples[col] = [str(v[0])[:max_len] for v in values]
+        return schema_dict, samples
+
+    # -------- querying --------
+    @staticmethod
+    def _transpile(query):
+        """MySQL (what the LLM is asked for) -> DuckDB SQL; unparsable SQL is passed through"""
+        import sqlglot
+        try:
+            return sqlglot.transpile(query, read="mysql", write="duckdb")[0]
+        except sqlglot.errors.ParseError:
+            return query
+
+    def run_sql(self, query, max_rows=MAX_RESULT_ROWS, timeout=None):
+        """At most max_rows rows; df.attrs["truncated"] and timeout as in nl_to_sql.run_sql"""
+        query = _with_row_cap(self._transpile(query), max_rows)
+        with self._cursor() as cur, cancel_after(timeout, cur.interrupt):
+            df = cur.execute(query).df()
+        truncated = len(df) > max_rows
+        if truncated:
+            df = df.iloc[:max_rows]
+            print(f"⚠️ Query result cut off at {max_rows} rows")
+        df.attrs["truncated"] = truncated
+        return df
+
+    def estimate_rows(self, query):
+        """Largest estimated cardinality of any operator in DuckDB's plan"""
+        with self._cursor() as cur:
+            plan = cur.execute("EXPLAIN (FORMAT JSON) " + self._transpile(query)).fetchall()
+        nodes, estimate = json.loads(plan[0][1]), 0
+        while nodes:
+            node = nodes.pop()
+            estimate = max(estimate, int(node.get("extra_info", {}).get("Estimated Cardinality", 0)))
+            nodes.extend(node.get("children", []))
+        return estimate
+
+    def execute(self, statement):
+        """DDL / statements without a result, in DuckDB SQL"""
+        with self._cursor() as cur:
+            cur.execute(statement)
+
+
+def create_backend(name, db_config=None, **options):
+    """Backend by name: "mysql" (uses db_config) or "duckdb" (uses options, e.g. database, load_mode)"""
+    if name == "mysql":
+        return MySQLBackend(db_config)
+    if name == "duckdb":
+        return DuckDBBackend(**options)
+    raise ValueError(f"Unknown query backend '{name}', use mysql or duckdb")
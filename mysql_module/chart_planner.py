@@ -0,0 +1,186 @@
+import re
+
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# ------------------ CHART PLANNING ------------------
+# Local replacement for asking Gemini to write plotting code. The rules are the
+# ones the LLM prompt in temp3.py lists, applied to the column types that
+# is_visualizable() already looks at.
+
+CHART_KEYWORDS = [
+    ("heatmap", ["heatmap", "heat map", "correlation"]),
+    ("box", ["box plot", "boxplot", "box-plot"]),
+    ("hist", ["histogram", "distribution"]),
+    ("scatter", ["scatter"]),
+    ("pie", ["pie", "share", "proportion", "percentage", "percent"]),
+    ("line", ["line", "trend", "over time", "over the years"]),
+    ("bar", ["bar", "compare", "ranking", "rank"]),
+]
+TIME_LIKE = re.compile(r"(date|time|year|season|month|week|day|quarter)", re.IGNORECASE)
+MAX_CATEGORIES = 20   # bars / pie slices; the rest is dropped (bar) or grouped as "Other" (pie)
+
+
+def _requested_kind(user_question):
+    q = (user_question or "").lower()
+    for kind, words in CHART_KEYWORDS:
+        if any(word in q for word in words):
+            return kind
+    return None
+
+
+def _column_roles(df):
+    numeric = df.select_dtypes(include="number").columns.tolist()
+    datetime = df.select_dtypes(include=["datetime", "datetimetz"]).columns.tolist()
+    categorical = [c for c in df.columns if c not in numeric and c not in datetime]
+    # integer columns named like "season"/"year" behave as a time axis, not a measure
+    time_numeric = [c for c in numeric if TIME_LIKE.search(str(c)) and pd.api.types.is_integer_dtype(df[c])]
+    return numeric, datetime, categorical, time_numeric
+
+
+def plan_chart(df: pd.DataFrame, user_question: str = ""):
+    """
+    Pick a chart for df. Returns a spec dict
+        {"kind": "bar" | "line" | "hist" | "scatter" | "pie" | "heatmap" | "box",
+         "x": column or None, "y": [columns], "title": ...}
+    or None if no rule applies.
+    """
+    if df is None or df.empty:
+        return None
+
+    numeric, datetime, categorical, time_numeric = _column_roles(df)
+    measures = [c for c in numeric if c not in time_numeric]
+    time_cols = datetime + time_numeric
+    requested = _requested_kind(user_question)
+    title = (user_question or "").strip().rstrip("?") or "Query result"
+
+    def spec(kind, x, y):
+        return {"kind": kind, "x": x, "y": list(y), "title": title}
+
+    # 1. Explicitly requested chart types, when the columns allow them
+    if requested == "heatmap":
+        if len(numeric) >= 2:
+            return spec("heatmap", None, numeric)
+        if len(categorical) >= 2:
+            return spec("heatmap", categorical[0], [categorical[1]])
+    if requested in ("hist", "box") and numeric:
+        return spec(requested, None, measures[:1] or numeric[:1])
+    if requested == "scatter" and len(numeric) >= 2:
+        return spec("scatter", numeric[0], [numeric[1]])
+    if requested == "pie":
+        if categorical and measures:
+            return spec("pie", categorical[0], measures[:1])
+        if categorical:
+            return spec("pie", categorical[0], [])
+    if requested == "line" and (time_cols or categorical) and measures:
+        return spec("line", (time_cols or categorical)[0], measures)
+    if requested == "bar" and (categorical or time_cols) and measures:
+        return spec("bar", (categorical or time_cols)[0], measures)
+
+    # 2. Automatic selection
+    if time_cols and measures:                       # time column → line plot
+        return spec("line", time_cols[0], measures)
+    if categorical and measures:                     # categorical + numerical → bar chart
+        return spec("bar", categorical[0], measures[:3])
+    if len(measures) == 1:                           # 1 numerical column → histogram
+        return spec("hist", None, measures)
+    if len(measures) == 2:                           # 2 numerical columns → scatter
+        return spec("scatter", measures[0], [measures[1]])
+    if len(measures) > 2:                            # several numerical → correlation heatmap
+        return spec("heatmap", None, measures)
+    if len(categorical) == 1:                        # categorical frequencies → bar
+        return spec("bar", categorical[0], [])
+    if len(categorical) >= 2:                        # two categoricals → crosstab heatmap
+        return spec("heatmap", categorical[0], [categorical[1]])
+    return None
+
+
+# ------------------ RENDERING ------------------
+def _bar_data(df, x, y):
+    """Values per category: given measure(s), or row counts when there is no measure"""
+    if y:
+        data = df.groupby(x, sort=False)[y].sum() if df[x].duplicated().any() else df.set_index(x)[y]
+    else:
+        data = df[x].value_counts().to_frame("count")
+    return data
+
+
+def render_chart(df: pd.DataFrame, spec: dict, output_path: str, fmt=None):
+    """Draw spec with matplotlib's object API (no global pyplot state) and save it"""
+    fig = Figure(figsize=(8, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    kind, x, y = spec["kind"], spec["x"], spec["y"]
+
+    if kind == "bar":
+        data = _bar_data(df, x, y)
+        data = data.sort_values(data.columns[0], ascending=False).head(MAX_CATEGORIES)
+        data.plot.bar(ax=ax, legend=len(data.columns) > 1)
+        ax.set_xlabel(str(x))
+        ax.set_ylabel(", ".join(map(str, y)) if y else "count")
+    elif kind == "line":
+        data = df.sort_values(x)
+        for col in y:
+            ax.plot(data[x], data[col], marker="o", label=str(col))
+        ax.set_xlabel(str(x))
+        ax.set_ylabel(", ".join(map(str, y)))
+        if len(y) > 1:
+            ax.legend()
+    elif kind == "hist":
+        ax.hist(df[y[0]].dropna(), bins="auto", edgecolor="white")
+        ax.set_xlabel(str(y[0]))
+        ax.set_ylabel("frequency")
+    elif kind == "box":
+        ax.boxplot(df[y[0]].dropna())
+        ax.set_xticks([1], [str(y[0])])
+        ax.set_ylabel(str(y[0]))
+    elif kind == "scatter":
+        ax.scatter(df[x], df[y[0]], alpha=0.7)
+        ax.set_xlabel(str(x))
+        ax.set_ylabel(str(y[0]))
+    elif kind == "pie":
+        data = _bar_data(df, x, y).iloc[:, 0].sort_values(ascending=False)
+        if len(data) > MAX_CATEGORIES:
+            data = pd.concat([data.head(MAX_CATEGORIES - 1), pd.Series({"Other": data.iloc[MAX_CATEGORIES - 1:].sum()})])
+        ax.pie(data.values, labels=[str(label) for label in data.index], autopct="%1.1f%%", startangle=90)
+        ax.axis("equal")
+    elif kind == "heatmap":
+        if x is None:
+            matrix = df[y].corr()
+        else:
+            matrix = pd.crosstab(df[x], df[y[0]])
+            matrix = matrix.loc[matrix.sum(axis=1).nlargest(MAX_CATEGORIES).index]
+        image = ax.imshow(matrix.values, cmap="viridis", aspect="auto")
+        ax.set_xticks(range(len(matrix.columns)), [str(c) for c in matrix.columns], rotation=45, ha="right")
+        ax.set_yticks(range(len(matrix.index)), [str(i) for i in matrix.index])
+        fig.colorbar(image, ax=ax)
+    else:
+        raise ValueError(f"Unknown chart kind '{kind}'")
+
+    ax.set_title(spec["title"])
+    if kind in ("bar", "line"):
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment("right")
+    fig.tight_layout()
+    fig.savefig(output_path, format=fmt)
+    return output_path
+
+
+def plot_dataframe(df: pd.DataFrame, user_question: str, output_path: str, spec=None, fmt=None):
+    """
+    Plan and render a chart locally. Returns output_path, or None when no rule
+    fits or rendering fails (the caller may then fall back to the LLM).
+    """
+    if spec is None:
+        spec = plan_chart(df, user_question)
+    if spec is None:
+        return None
+    try:
+        render_chart(df, spec, output_path, fmt)
+        print(f"✅ Plot ({spec['kind']}) saved successfully to {output_path}")
+        return output_path
+    except Exception as e:
+        print("❌ Error while rendering chart locally:", e)
+        return None
@@ -0,0 +1,154 @@
+import pandas as pd
+
+# ------------------ COLUMN PROFILING ------------------
+# One vectorized pass per column: everything upload_to_mysql (and the schema
+# registry) needs to know about a column, without casting it back and forth.
+
+def _to_python(value):
+    """numpy / pandas scalars -> plain Python so profiles stay JSON-serializable"""
+    if value is None or pd.isnull(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value.item() if hasattr(value, "item") else value
+
+
+# Values checked before running to_numeric / to_datetime on a whole text column.
+# Failing conversions are the slow path, so an obviously-text column bails out early.
+SAMPLE_SIZE = 50
+
+
+def _profile(series: pd.Series, parse_dates=None):
+    """
+    Profile a column and also hand back any converted values
+    (numbers parsed from text, dates parsed from text) so callers don't parse twice.
+    """
+    if parse_dates is None:
+        parse_dates = "date" in str(series.name).lower()
+
+    non_null = series.dropna()
+    profile = {
+        "name": series.name,
+        "kind": "text",
+        "numeric_text": False,
+        "null_count": int(len(series) - len(non_null)),
+        "count": int(len(non_null)),
+        "min": None,
+        "max": None,
+        "is_integer": False,
+        "max_len": 0,
+        "date_parseable": False,
+    }
+
+    if pd.api.types.is_bool_dtype(series):
+        profile["kind"] = "bool"
+        return profile, None
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        profile["kind"] = "datetime"
+        profile["date_parseable"] = True
+        profile["min"], profile["max"] = _to_python(non_null.min()), _to_python(non_null.max())
+        return profile, None
+
+    converted = None
+    if pd.api.types.is_numeric_dtype(series):
+        numeric = non_null
+    elif len(non_null) and pd.to_numeric(non_null.iloc[:SAMPLE_SIZE], errors="coerce").notna().all():
+        # a single to_numeric call replaces the str.replace(...).isnumeric() test
+        numeric = pd.to_numeric(non_null, errors="coerce")
+        if numeric.isna().any():
+            numeric = None
+        else:
+            profile["numeric_text"] = True
+            converted = numeric
+    else:
+        numeric = None
+
+    if numeric is not None:
+        is_integer = bool(pd.api.types.is_integer_dtype(numeric) or (numeric % 1 == 0).all())
+        profile["kind"] = "int" if is_integer else "float"
+        profile["is_integer"] = is_integer
+        profile["min"], profile["max"] = _to_python(numeric.min()), _to_python(numeric.max())
+        return profile, converted
+
+    as_text = non_null.astype(str)
+    profile["max_len"] = int(as_text.str.len().max()) if len(as_text) else 0
+    if parse_dates and len(as_text) and pd.to_datetime(as_text.iloc[:SAMPLE_SIZE], errors="coerce").notna().all():
+        parsed = pd.to_datetime(as_text, errors="coerce")
+        if parsed.notna().all():
+            profile["date_parseable"] = True
+            converted = parsed
+    return profile, converted
+
+
+def profile_column(series: pd.Series, parse_dates=None) -> dict:
+    """
+    Profile a single column.
+
+    Returns a dict with:
+        kind           - "int", "float", "bool", "datetime" or "text"
+        numeric_text   - True if an object column holds only numbers stored as text
+        null_count, count
+        min, max       - for numeric / datetime kinds
+        is_integer     - True if every numeric value is a whole number
+        max_len        - longest value as text (text kind only)
+        date_parseable - True if every text value parses as a date; only checked
+                         when parse_dates is True (defaults to "date" in the name)
+    """
+    profile, _ = _profile(series, parse_dates)
+    return profile
+
+
+def profile_and_convert(series: pd.Series):
+    """
+    Profile a column and return it converted to its profiled kind:
+    numbers stored as text become numeric, parseable dates become datetime64.
+    Returns (converted_series, profile).
+    """
+    profile, converted = _profile(series)
+    if converted is None:
+        return series, profile
+
+    converted = converted.reindex(series.index)
+    if profile["date_parseable"]:
+        profile.update(kind="datetime", max_len=0,
+                       min=_to_python(converted.min()), max=_to_python(converted.max()))
+    profile["numeric_text"] = False
+    return converted, profile
+
+
+def profile_dataframe(df: pd.DataFrame) -> dict:
+    """Profile every column -> {column_name: profile}"""
+    return {col: profile_column(df[col]) for col in df.columns}
+
+
+def sample_values(series: pd.Series, n=5, max_len=40) -> list:
+    """Most frequent values of a text column, stored in the schema registry for table retrieval"""
+    values = series.dropna().astype(str).value_counts().head(n).index
+    return [value[:max_len] for value in values]
+
+
+# ------------------ PROFILE -> MYSQL TYPE ------------------
+def mysql_type_from_profile(profile: dict) -> str:
+    """Pick the narrowest MySQL type for a column profile"""
+    kind = profile["kind"]
+    if kind == "bool":
+        return "TINYINT(1)"
+    if kind == "datetime":
+        return "DATETIME"
+    if kind == "int":
+        min_val, max_val = profile["min"], profile["max"]
+        if min_val is None or max_val is None:
+            return "INT"
+        if min_val >= -128 and max_val <= 127:
+            return "TINYINT"
+        elif min_val >= -32768 and max_val <= 32767:
+            return "SMALLINT"
+        elif min_val >= -2147483648 and max_val <= 2147483647:
+            return "INT"
+        else:
+            return "BIGINT"
+    if kind == "float":
+        return "DOUBLE"
+    varchar_len = min(profile["max_len"] + 10, 500)
+    return f"VARCHAR({varchar_len})"
@@ -0,0 +1,131 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+
+# ------------------ POOL SETTINGS ------------------
+# Defaults for every engine created by get_engine(); override with configure_pool()
+POOL_OPTIONS = {
+    "pool_size": 5,         # connections kept open
+    "max_overflow": 10,     # extra connections allowed under burst load
+    "pool_timeout": 30,     # seconds to wait for a free connection
+    "pool_recycle": 1800,   # reconnect before MySQL's wait_timeout drops us
+    "pool_pre_ping": True,  # test connections on checkout, drop dead ones
+}
+
+_engines = {}   # {db_config key: Engine}; LOAD DATA uploads get their own engine (see get_engine)
+_waits = {}     # {db_config key: {"checkouts", "total_wait", "max_wait"}}
+_lock = threading.Lock()
+
+
+def _config_key(db_config, local_infile=False):
+    key = tuple(sorted(db_config.items()))
+    return key + (("local_infile", True),) if local_infile else key
+
+
+def configure_pool(**options):
+    """Change pool options; existing engines are disposed and rebuilt on next use"""
+    unknown = set(options) - set(POOL_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown pool option(s): {', '.join(sorted(unknown))}")
+    with _lock:
+        POOL_OPTIONS.update(options)
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _waits.clear()
+
+
+# ------------------ ENGINE CACHE ------------------
+def get_engine(db_config, local_infile=False):
+    """
+    Return the process-wide pooled engine for db_config, creating it once.
+    db_config is a MySQL {host, user, password, database} dict, or {"url": ...}
+    with any SQLAlchemy URL (e.g. "sqlite:///bench.db" for offline benchmarks).
+    local_infile=True gives a separate MySQL engine that allows LOAD DATA LOCAL
+    INFILE, for the load_data bulk loader only: the default engine runs
+    LLM-written SQL and must not be able to read client files.
+    """
+    key = _config_key(db_config, local_infile)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        if key not in _engines:
+            if "url" in db_config:
+                _engines[key] = create_engine(db_config["url"], **POOL_OPTIONS)
+            else:
+                url = URL.create(
+                    "mysql+pymysql",
+                    username=db_config["user"],
+                    password=db_config["password"],  # URL.create escapes '#', '@', ...
+                    host=db_config["host"],
+                    port=db_config.get("port"),
+                    database=db_config["database"],
+                )
+                _engines[key] = create_engine(url, connect_args={"local_infile": local_infile}, **POOL_OPTIONS)
+            _waits[key] = {"checkouts": 0, "total_wait": 0.0, "max_wait": 0.0}
+        return _engines[key]
+
+
+def _record_wait(db_config, waited, local_infile=False):
+    with _lock:
+        stats = _waits.get(_config_key(db_config, local_infile))
+        if stats is None:
+            return
+        stats["checkouts"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+
+@contextmanager
+def pooled_connection(db_config):
+    """SQLAlchemy Connection from the pool; records how long the checkout waited"""
+    engine = get_engine(db_config)
+    start = time.perf_counter()
+    conn = engine.connect()
+    _record_wait(db_config, time.perf_counter() - start)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def pooled_raw_connection(db_config, local_infile=False):
+    """Raw DB-API (pymysql) connection from the pool, for cursor-level bulk loading"""
+    engine = get_engine(db_config, local_infile)
+    start = time.perf_counter()
+    conn = engine.raw_connection()
+    _record_wait(db_config, time.perf_counter() - start, local_infile)
+    try:
+        yield conn
+    finally:
+        conn.close()  # returns it to the pool
+
+
+# ------------------ STATS ------------------
+def get_pool_stats():
+    """Pool usage per engine: size, checked-out, overflow and checkout wait times"""
+    stats = []
+    with _lock:
+        items = [(key, engine, dict(_waits[key])) for key, engine in _engines.items()]
+    for key, engine, waits in items:
+        config = dict(key)
+        pool = engine.pool
+        checkouts = waits["checkouts"]
+        stats.append({
+            "database": config.get("url") or f"{config['host']}/{config['database']}",
+            "local_infile": config.get("local_infile", False),
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": checkouts,
+            "avg_wait_ms": round(1000 * waits["total_wait"] / checkouts, 3) if checkouts else 0.0,
+            "max_wait_ms": round(1000 * waits["max_wait"], 3),
+        })
+    return stats
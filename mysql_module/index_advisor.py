@@ -0,0 +1,363 @@
+import hashlib
+import threading
+import time
+
+# ------------------ INDEX + ROLLUP ADVISOR ------------------
+# Every executed query is recorded with its run time, grouped by "shape":
+# table, filtered columns, GROUP BY columns and aggregates. Hot shapes get
+#   - a composite index (equality filters, then range filters, then GROUP BY
+#     columns) on row-store backends (MySQL/SQLite; DuckDB scans columns anyway)
+#   - a rollup table: the table pre-aggregated by the shape's filter + group
+#     columns with COUNT/SUM/MIN/MAX per measured column
+# Later queries of that shape are rewritten to read the rollup. Every rollup is
+# checked against the original query before it is used; speedups are reported.
+
+MIN_QUERIES = 3            # a shape is hot after this many runs ...
+MIN_TOTAL_MS = 100.0       # ... that took at least this long together
+MAX_INDEX_COLUMNS = 3
+MAX_ROLLUP_DIMS = 4
+MAX_ROLLUP_RATIO = 0.1     # rollup must have at most 10% of the table's rows
+RANGE_OPS = ("GT", "GTE", "LT", "LTE", "Between")
+ROLLUP_PREFIX = "rollup_"
+
+
+def _sqlglot():
+    import sqlglot
+    from sqlglot import exp
+    return sqlglot, exp
+
+
+# ------------------ QUERY SHAPES ------------------
+def analyze_query(sql):
+    """
+    Shape of a single-table SELECT, or None for anything else (joins,
+    subqueries, window functions, unparsable SQL):
+    {"table", "eq", "range", "group", "measures", "dims"}
+    measures: set of (function, column) with column None for COUNT(*).
+    """
+    sqlglot, exp = _sqlglot()
+    try:
+        tree = sqlglot.parse_one(sql, read="mysql")
+    except sqlglot.errors.ParseError:
+        return None
+    if not isinstance(tree, exp.Select) or tree.args.get("joins") or tree.find(exp.Subquery, exp.Window):
+        return None
+    tables = list(tree.find_all(exp.Table))
+    if len(tables) != 1:
+        return None
+
+    eq, ranges = [], []
+    where = tree.args.get("where")
+    if where is not None:
+        predicates = where.this.flatten() if isinstance(where.this, exp.And) else [where.this]
+        for predicate in predicates:
+            column = predicate.find(exp.Column)
+            if column is None:
+                continue
+            if isinstance(predicate, (exp.EQ, exp.In)):
+                eq.append(column.name)
+            elif type(predicate).__name__ in RANGE_OPS:
+                ranges.append(column.name)
+            else:
+                ranges.append(column.name)   # LIKE etc.: usable as a rollup dim, weak for an index
+    group = [c.name for e in (tree.args["group"].expressions if tree.args.get("group") else [])
+             for c in e.find_all(exp.Column)]
+
+    measures = set()
+    for agg in tree.find_all(exp.AggFunc):
+        name = type(agg).__name__.upper()
+        arg = agg.this
+        if isinstance(arg, exp.Star) and name == "COUNT":
+            measures.add(("COUNT", None))
+        elif isinstance(arg, exp.Column) and name in ("COUNT", "SUM", "AVG", "MIN", "MAX"):
+            measures.add((name, arg.name))
+        else:
+            measures.add((name, "?"))    # COUNT(DISTINCT ...), expressions: no rollup
+
+    dims = tuple(sorted(set(eq) | set(ranges) | set(group)))
+    return {"table": tables[0].name, "eq": tuple(dict.fromkeys(eq)), "range": tuple(dict.fromkeys(ranges)),
+            "group": tuple(dict.fromkeys(group)), "measures": frozenset(measures), "dims": dims}
+
+
+def _index_columns(shape):
+    columns = list(dict.fromkeys(shape["eq"] + shape["range"] + shape["group"]))
+    return tuple(columns[:MAX_INDEX_COLUMNS])
+
+
+def _rollup_name(table, dims):
+    digest = hashlib.sha1(",".join(dims).encode()).hexdigest()[:8]
+    return f"{ROLLUP_PREFIX}{table}_{digest}"
+
+
+# ------------------ ROLLUP SQL ------------------
+def rollup_select(table, dims, columns, dialect):
+    """SELECT building the rollup: dims, cnt, and sum_/cnt_/min_/max_ per measured column"""
+    _, exp = _sqlglot()
+    parts = [exp.column(d) for d in dims]
+    parts.append(exp.alias_(exp.Count(this=exp.Star()), "cnt"))
+    for col in sorted(columns):
+        c = exp.column(col)
+        # * 1.0 keeps AVG = SUM(sum_x) / SUM(cnt_x) from turning into integer division
+        parts.append(exp.alias_(exp.Sum(this=exp.Mul(this=c.copy(), expression=exp.Literal.number("1.0"))),
+                                f"sum_{col}"))
+        parts.append(exp.alias_(exp.Count(this=c.copy()), f"cnt_{col}"))
+        parts.append(exp.alias_(exp.Min(this=c.copy()), f"min_{col}"))
+        parts.append(exp.alias_(exp.Max(this=c.copy()), f"max_{col}"))
+    select = exp.select(*parts).from_(exp.to_table(table))
+    if dims:
+        select = select.group_by(*[exp.column(d) for d in dims])
+    return select.sql(dialect=dialect)
+
+
+def rewrite_for_rollup(sql, rollup):
+    """sql reading rollup["name"] instead of the base table, or None if the rollup cannot answer it"""
+    sqlglot, exp = _sqlglot()
+    shape = analyze_query(sql)
+    if (shape is None or shape["table"] != rollup["table"] or not set(shape["dims"]) <= set(rollup["dims"])
+            or not shape["measures"] or any(col == "?" for _, col in shape["measures"])
+            or any(col is not None and col not in rollup["columns"] for _, col in shape["measures"])):
+        return None
+
+    def measure(name, col):
+        return exp.Sum(this=exp.column(f"{name}_{col}"))
+
+    def count(column):
+        # SUM of counts is DECIMAL / HUGEINT; keep COUNT's integer type
+        return exp.Cast(this=exp.Sum(this=exp.column(column)), to=exp.DataType.build("BIGINT"))
+
+    def replace(node):
+        if not isinstance(node, exp.AggFunc):
+            return node
+        name, arg = type(node).__name__.upper(), node.this
+        if name == "COUNT" and isinstance(arg, exp.Star):
+            return count("cnt")
+        col = arg.name
+        if name == "COUNT":
+            return count(f"cnt_{col}")
+        if name == "SUM":
+            return measure("sum", col)
+        if name == "AVG":
+            return exp.Div(this=measure("sum", col),
+                           expression=exp.Nullif(this=measure("cnt", col), expression=exp.Literal.number(0)))
+        return (exp.Min if name == "MIN" else exp.Max)(this=exp.column(f"{name.lower()}_{col}"))
+
+    tree = sqlglot.parse_one(sql, read="mysql")
+    # every plain column (SELECT, WHERE, HAVING, ORDER BY) must exist in the rollup;
+    # ORDER BY may also name an output alias
+    aliases = {e.alias for e in tree.expressions if isinstance(e, exp.Alias)}
+    for node in tree.find_all(exp.Column, exp.Star):
+        if node.find_ancestor(exp.AggFunc) is not None:
+            continue
+        if isinstance(node, exp.Star) or (node.name not in rollup["dims"] and node.name not in aliases):
+            return None
+
+    # an unaliased aggregate keeps its original column label
+    tree.set("expressions", [e if isinstance(e, exp.Alias) or not e.find(exp.AggFunc)
+                             else exp.alias_(e, e.sql(dialect="mysql"), quoted=True) for e in tree.expressions])
+    tree = tree.transform(replace)
+    for table in tree.find_all(exp.Table):
+        table.set("this", exp.to_identifier(rollup["name"]))
+    return tree.sql(dialect="mysql")
+
+
+def _same_result(a, b):
+    """Equal frames up to row order, column dtypes, label case and float rounding"""
+    if [str(c).lower() for c in a.columns] != [str(c).lower() for c in b.columns] or len(a) != len(b):
+        return False
+    a = a.astype(object).where(a.notna(), None)
+    b = b.astype(object).where(b.notna(), None)
+
+    def norm(df):
+        rows = [tuple(round(float(v), 6) if isinstance(v, (int, float)) and not isinstance(v, bool) else str(v)
+                      for v in row) for row in df.itertuples(index=False)]
+        return sorted(rows, key=repr)
+    return norm(a) == norm(b)
+
+
+# ------------------ ADVISOR ------------------
+class IndexAdvisor:
+    def __init__(self, min_queries=MIN_QUERIES, min_total_ms=MIN_TOTAL_MS):
+        self.min_queries = min_queries
+        self.min_total_ms = min_total_ms
+        self._shapes = {}     # (table, dims, measures) -> stats + latest sql
+        self._rollups = {}    # rollup name -> {"name", "table", "dims", "columns"}
+        self._applied = []    # one entry per index / rollup created, with before/after timings
+        self._lock = threading.Lock()
+        self._worker = None
+
+    # -------- recording --------
+    def record(self, sql, elapsed_ms, rows=None):
+        """Log one executed query; returns its shape (None if it is not analyzable)"""
+        shape = analyze_query(sql)
+        if shape is None:
+            return None
+        key = (shape["table"], shape["dims"], shape["measures"])
+        with self._lock:
+            stats = self._shapes.setdefault(key, {"shape": shape, "count": 0, "total_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["sql"] = sql
+            stats["rows"] = rows
+        return shape
+
+    def _hot(self):
+        with self._lock:
+            shapes = [dict(s) for s in self._shapes.values()]
+        hot = [s for s in shapes if s["count"] >= self.min_queries and s["total_ms"] >= self.min_total_ms]
+        return sorted(hot, key=lambda s: s["total_ms"], reverse=True)
+
+    # -------- advice --------
+    def recommend(self, dialect="mysql"):
+        """Indexes and rollups worth creating for the hot query shapes, most expensive first"""
+        advice, rollups = {}, {}
+        applied = {a["name"] for a in self._applied}
+        for stats in self._hot():
+            shape = stats["shape"]
+            columns = _index_columns(shape)
+            if dialect != "duckdb" and columns:
+                name = (f"idx_{shape['table']}_" + "_".join(columns))[:64]
+                if name not in advice and name not in applied:
+                    advice[name] = {"kind": "index", "name": name, "table": shape["table"],
+                                    "columns": list(columns), "queries": stats["count"],
+                                    "total_ms": round(stats["total_ms"], 1), "sql": stats["sql"]}
+            measured = {col for _, col in shape["measures"] if col}
+            if (shape["measures"] and "?" not in measured and shape["group"]
+                    and len(shape["dims"]) <= MAX_ROLLUP_DIMS):
+                name = _rollup_name(shape["table"], shape["dims"])
+                if name in applied:
+                    continue
+                # shapes over the same dims share one rollup holding all their measures
+                item = rollups.setdefault(name, {"kind": "rollup", "name": name, "table": shape["table"],
+                                                 "dims": list(shape["dims"]), "columns": [], "queries": 0,
+                                                 "total_ms": 0.0, "sql": stats["sql"]})
+                item["columns"] = sorted(set(item["columns"]) | measured)
+                item["queries"] += stats["count"]
+                item["total_ms"] = round(item["total_ms"] + stats["total_ms"], 1)
+                advice.setdefault(name, item)
+        return list(advice.values())
+
+    # -------- applying --------
+    @staticmethod
+    def _time(backend, sql, runs=3):
+        best, df = None, None
+        for _ in range(runs):
+            start = time.perf_counter()
+            df = backend.run_sql(sql)
+            elapsed = 1000 * (time.perf_counter() - start)
+            best = elapsed if best is None else min(best, elapsed)
+        return best, df
+
+    def _create_index(self, backend, item):
+        _, exp = _sqlglot()
+        before, _ = self._time(backend, item["sql"])
+        index = exp.Create(this=exp.Index(this=exp.to_identifier(item["name"]), table=exp.to_table(item["table"]),
+                                          params=exp.IndexParameters(columns=[exp.column(c) for c in item["columns"]])),
+                           kind="INDEX")
+        backend.execute(index.sql(dialect=backend.dialect))
+        after, _ = self._time(backend, item["sql"])
+        if after >= before:
+            # e.g. a filter matching a large share of the rows: the scan was cheaper
+            name = exp.to_identifier(item["name"]).sql(dialect=backend.dialect)
+            on_table = f" ON {item['table']}" if backend.dialect == "mysql" else ""
+            backend.execute(f"DROP INDEX {name}{on_table}")
+            raise ValueError(f"index did not help ({before:.1f} ms -> {after:.1f} ms), dropped")
+        return before, after
+
+    def _create_rollup(self, backend, item):
+        _, exp = _sqlglot()
+        table_rows = backend.run_sql(f"SELECT COUNT(*) AS n FROM {item['table']}")["n"].iloc[0]
+        dims_sql = ", ".join(exp.column(d).sql(dialect=backend.dialect) for d in item["dims"])
+        groups = backend.run_sql(f"SELECT COUNT(*) AS n FROM (SELECT DISTINCT {dims_sql} "
+                                 f"FROM {item['table']}) AS g")["n"].iloc[0]
+        if table_rows and groups > MAX_ROLLUP_RATIO * table_rows:
+            raise ValueError(f"rollup would keep {groups} of {table_rows} rows")
+
+        rollup = {"name": item["name"], "table": item["table"], "dims": item["dims"], "columns": item["columns"]}
+        quoted = exp.to_identifier(item["name"]).sql(dialect=backend.dialect)
+        backend.execute(f"DROP TABLE IF EXISTS {quoted}")
+        backend.execute(f"CREATE TABLE {quoted} AS "
+                        + rollup_select(item["table"], item["dims"], item["columns"], backend.dialect))
+
+        rewritten = rewrite_for_rollup(item["sql"], rollup)
+        if rewritten is None:
+            backend.execute(f"DROP TABLE IF EXISTS {quoted}")
+            raise ValueError("rollup cannot answer the sample query")
+        before, original = self._time(backend, item["sql"])
+        after, result = self._time(backend, rewritten)
+        if not _same_result(original, result):
+            backend.execute(f"DROP TABLE IF EXISTS {quoted}")
+            raise ValueError("rollup result differs from the base table")
+        if after >= before:
+            # small tables / fast columnar scans: routing queries to the rollup would slow them down
+            backend.execute(f"DROP TABLE IF EXISTS {quoted}")
+            raise ValueError(f"rollup did not help ({before:.1f} ms -> {after:.1f} ms), dropped")
+        with self._lock:
+            self._rollups[item["name"]] = rollup
+        return before, after
+
+    def apply(self, backend, advice=None):
+        """Create the recommended indexes / rollups; returns what was done, with measured speedups"""
+        done = []
+        for item in advice if advice is not None else self.recommend(backend.dialect):
+            try:
+                create = self._create_index if item["kind"] == "index" else self._create_rollup
+                before, after = create(backend, item)
+                entry = {"kind": item["kind"], "name": item["name"], "table": item["table"],
+                         "before_ms": round(before, 2), "after_ms": round(after, 2),
+                         "speedup": round(before / after, 1) if after else None}
+                print(f"✅ Created {item['kind']} {item['name']}: {before:.1f} ms -> {after:.1f} ms")
+            except Exception as e:
+                entry = {"kind": item["kind"], "name": item["name"], "table": item["table"], "error": str(e)}
+                print(f"⚠️ Skipped {item['kind']} {item['name']}: {e}")
+            with self._lock:
+                self._applied.append(entry)
+            done.append(entry)
+        return done
+
+    def apply_in_background(self, backend):
+        """apply() on a daemon thread when there is new advice; one run at a time"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+        advice = self.recommend(backend.dialect)
+        if not advice:
+            return False
+        worker = threading.Thread(target=self.apply, args=(backend, advice), daemon=True)
+        with self._lock:
+            self._worker = worker
+        worker.start()
+        return True
+
+    # -------- query time --------
+    def rewrite(self, sql):
+        """sql against the smallest rollup that can answer it, or sql unchanged"""
+        with self._lock:
+            rollups = list(self._rollups.values())
+        for rollup in sorted(rollups, key=lambda r: len(r["dims"])):
+            rewritten = rewrite_for_rollup(sql, rollup)
+            if rewritten is not None:
+                return rewritten
+        return sql
+
+    def forget_table(self, table, backend=None):
+        """Table was re-uploaded: its rollups are stale (indexes went with the old table)"""
+        with self._lock:
+            names = [n for n, r in self._rollups.items() if r["table"] == table]
+            for name in names:
+                del self._rollups[name]
+            self._shapes = {k: v for k, v in self._shapes.items() if k[0] != table}
+            self._applied = [a for a in self._applied if a["table"] != table]
+        if backend is not None:
+            _, exp = _sqlglot()
+            for name in names:
+                backend.execute(f"DROP TABLE IF EXISTS {exp.to_identifier(name).sql(dialect=backend.dialect)}")
+
+    def stats(self):
+        with self._lock:
+            shapes = sorted(self._shapes.values(), key=lambda s: s["total_ms"], reverse=True)
+            return {
+                "shapes": [{"table": s["shape"]["table"], "dims": list(s["shape"]["dims"]),
+                            "queries": s["count"], "total_ms": round(s["total_ms"], 1)} for s in shapes[:20]],
+                "rollups": sorted(self._rollups),
+                "applied": list(self._applied),
+            }
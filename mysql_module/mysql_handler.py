@@ -1,10 +1,21 @@
 import os
-import uuid
-from .strtomysql import upload_to_mysql
-from .nl_to_sql import generate_sql, run_sql, sql_result_to_nl
-from .temp import is_sql_related, handle_greetings
+import html
+import time
+
+from tracing import span
+from .backends import create_backend
+from .index_advisor import IndexAdvisor
+from .nl_to_sql import generate_sql, sql_result_to_nl, rewrite_sql
+from .sql_guard import check_sql, SQLRejected
+from .temp import is_sql_related, handle_greetings, classify_small_talk, route_and_generate_sql, SMALL_TALK_REPLIES
 from .is_visulizable import is_visualizable
-from .temp3 import generate_and_save_plot
+from .temp3 import generate_and_save_plot, generate_plot_code
+from .chart_planner import plan_chart, plot_dataframe
+from .plot_store import PlotStore
+from .render_pool import RenderPool
+from .db_pool import configure_pool, get_pool_stats
+from .answer_cache import AnswerCache, normalize_question
+from .schema_registry import get_registry
 
 API_KEY = "your_api_key"   # <- put your key here
 DB_CONFIG = {
@@ -14,13 +25,96 @@ DB_CONFIG = {
     "database": "edi"
 }
 
+# One pooled SQLAlchemy engine per DB_CONFIG is shared by run_sql and uploads
+POOL_CONFIG = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+}
+configure_pool(**POOL_CONFIG)
+
+# Where uploaded tables live and questions are run: "mysql" (DB_CONFIG above) or
+# "duckdb" (embedded columnar engine, no server; Parquet is queried in place,
+# CSV/Excel bulk-loaded). DUCKDB_LOAD_MODE: "auto", "view" or "table".
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+DUCKDB_PATH = "analytics.duckdb"
+DUCKDB_LOAD_MODE = "auto"
+BACKEND = create_backend(DB_BACKEND, DB_CONFIG, database=DUCKDB_PATH, load_mode=DUCKDB_LOAD_MODE)
+
+# Query shapes are logged per table; hot ones (ADVISOR_MIN_QUERIES runs taking
+# ADVISOR_MIN_TOTAL_MS together) get a composite index and a pre-aggregated
+# rollup table that later queries are rewritten to. See /advisor_stats.
+# ADVISOR_AUTO_APPLY builds them in the background; otherwise POST /advisor/apply.
+ADVISOR_AUTO_APPLY = False
+ADVISOR_MIN_QUERIES = 3
+ADVISOR_MIN_TOTAL_MS = 100
+ADVISOR = IndexAdvisor(ADVISOR_MIN_QUERIES, ADVISOR_MIN_TOTAL_MS)
+
 SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "schema_registry.json")
 
+# True: one LLM call classifies the question and writes the SQL.
+# False: the old two-step path (is_sql_related, then generate_sql), kept for A/B latency tests.
+USE_COMBINED_ROUTER = True
+
+# Shown (and never cached) when the LLM could not classify the question
+CLASSIFY_FAILED_REPLY = "Sorry, I could not reach the language model just now. Please ask again in a moment."
+
+# Charts are planned and drawn locally; set True to let Gemini write plotting
+# code when no local rule fits (slower, and the generated code is exec'd)
+PLOT_LLM_FALLBACK = False
+
+# Charts live in static/plots, named by a hash of the result and chart spec.
+# PLOT_FORMAT: "png", "svg" (small, sharp) or "webp" (needs Pillow).
+PLOT_DIR = os.path.join("static", "plots")
+PLOT_FORMAT = "png"
+PLOT_MAX_MB = 200
+PLOT_MAX_AGE_DAYS = 7
+PLOT_STORE = PlotStore(PLOT_DIR, url_prefix="plots", max_bytes=PLOT_MAX_MB * 1024 * 1024,
+                       max_age_seconds=PLOT_MAX_AGE_DAYS * 24 * 3600, fmt=PLOT_FORMAT)
+
+# Charts are drawn in worker processes (started on first use) with a per-render
+# timeout. RENDER_WORKERS = 0 draws in the request thread instead.
+RENDER_WORKERS = 2
+RENDER_TIMEOUT_SECONDS = 30
+RENDER_POOL = RenderPool(RENDER_WORKERS, RENDER_TIMEOUT_SECONDS) if RENDER_WORKERS else None
+
+# Layered cache for repeated questions (intent, SQL, result frame, final answer).
+# Set CACHE_SQLITE_PATH to share it on disk between worker processes.
+CACHE_MAX_ENTRIES = 512
+CACHE_TTL_SECONDS = 3600
+CACHE_SQLITE_PATH = None
+ANSWER_CACHE = AnswerCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, CACHE_SQLITE_PATH)
+
+# Query results: at most RESULT_MAX_ROWS rows are fetched, and the LLM gets the
+# full rows only while they fit LLM_RESULT_TOKEN_BUDGET (a compact digest otherwise)
+RESULT_MAX_ROWS = 10000
+LLM_RESULT_TOKEN_BUDGET = 3000
+
+# LLM-written SQL must parse as one read-only SELECT and is capped with a LIMIT.
+# EXPLAIN may estimate at most SQL_MAX_ROWS_SCANNED rows touched (None: no cost
+# check), and it is cancelled on the server after QUERY_TIMEOUT_SECONDS.
+# Rejected / timed-out SQL goes back to the LLM up to SQL_REWRITE_ATTEMPTS times.
+SQL_MAX_ROWS_SCANNED = 50_000_000
+QUERY_TIMEOUT_SECONDS = 30
+SQL_REWRITE_ATTEMPTS = 1
+
+# Files bigger than this are streamed into MySQL in chunks instead of read at once
+STREAM_THRESHOLD_MB = 100
+STREAM_CHUNKSIZE = 50000
+
+
+
+def upload_chunksize(file_path):
+    """Rows per chunk for streaming the file in, or None to load it in one go"""
+    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    return STREAM_CHUNKSIZE if file_size_mb > STREAM_THRESHOLD_MB else None
 
 
 def process_mysql_file(file_storage, upload_folder="uploads"):
     """
-    Save CSV / Excel, upload to MySQL, update schema_registry.json.
+    Save CSV / Excel / Parquet, load it into the query backend, update schema_registry.json.
     Used once when file is uploaded.
     """
     os.makedirs(upload_folder, exist_ok=True)
@@ -29,53 +123,229 @@ def process_mysql_file(file_storage, upload_folder="uploads"):
 
     table_name = os.path.splitext(file_storage.filename)[0]
 
-    schema = upload_to_mysql(
-        file_path=filepath,
-        table_name=table_name,
-        db_user=DB_CONFIG["user"],
-        db_password=DB_CONFIG["password"],
-        db_host=DB_CONFIG["host"],
-        db_name=DB_CONFIG["database"]
-    )
+    # rollups of the old table would answer from old data
+    ADVISOR.forget_table(table_name, BACKEND)
+    schema = BACKEND.load_file(filepath, table_name, SCHEMA_FILE, chunksize=upload_chunksize(filepath))
+
+    # new data -> every cached intent / SQL / result / answer may be stale
+    ANSWER_CACHE.invalidate()
+
+    print(f"✅ {BACKEND.name} schema generated:", schema)
+    engine = {"mysql": "MySQL", "sqlite": "SQLite", "duckdb": "DuckDB"}[BACKEND.dialect]
+    return {"message": f"CSV/Excel uploaded successfully! {engine} BI module activated."}
+
+
+def mysql_pool_stats():
+    """Connection pool usage (checked-out, overflow, wait time) for the status page"""
+    return get_pool_stats()
+
+
+def mysql_cache_stats():
+    """Hit rate per answer cache layer"""
+    return ANSWER_CACHE.stats()
+
 
-    print("✅ MySQL schema generated:", schema)
-    return {"message": "CSV/Excel uploaded successfully! MySQL BI module activated."}
+def mysql_plot_stats():
+    """Chart store hits, evictions and disk usage, plus render pool timings"""
+    stats = PLOT_STORE.stats()
+    if RENDER_POOL is not None:
+        stats["render_pool"] = RENDER_POOL.stats()
+    return stats
 
 
-def answer_mysql_question(user_question):
+def mysql_advisor_stats():
+    """Logged query shapes, advised indexes / rollups and the ones already built"""
+    stats = ADVISOR.stats()
+    stats["advice"] = ADVISOR.recommend(BACKEND.dialect)
+    return stats
+
+
+def mysql_apply_advice():
+    """Build the advised indexes / rollups now; returns before/after timings per item"""
+    return ADVISOR.apply(BACKEND)
+
+
+def answer_mysql_question(user_question, progress=None, on_token=None):
     """
     Take user question and return:
     - {"type": "text", "content": "..."}  OR
     - {"type": "image", "path": "generated_plot_x.png"}
+    progress(stage) is called as the pipeline moves on (used by background chat jobs).
+    on_token(delta, html, tail) streams a text summary while the LLM writes it.
     """
-    # 1) Is it a SQL/data question?
-    if is_sql_related(user_question, SCHEMA_FILE, API_KEY):
-        # Step 1: NL → SQL
-        sql_query = generate_sql(user_question, SCHEMA_FILE, API_KEY)
+    progress = progress or _no_progress
+    version = get_registry(SCHEMA_FILE).version
+    question_key = normalize_question(user_question)
+
+    # 0) Obvious small talk is answered locally, without any LLM call
+    small_talk = classify_small_talk(user_question, _schema_words())
+    if small_talk:
+        return {"type": "text", "content": SMALL_TALK_REPLIES[small_talk], "sql_query": None}
+
+    # 1) Is it a SQL/data question? (+ Step 1: NL → SQL)
+    progress("classifying")
+    is_data_question = ANSWER_CACHE.get("intent", version, question_key)
+    sql_query = ANSWER_CACHE.get("sql", version, question_key) if is_data_question else None
+    chat_reply = None
+
+    if USE_COMBINED_ROUTER:
+        if is_data_question is None or (is_data_question and sql_query is None):
+            # one call classifies and writes the SQL, so it is timed as "classify"
+            with span("classify"):
+                routed = route_and_generate_sql(user_question, SCHEMA_FILE, API_KEY)
+            if routed["intent"] == "error":
+                # failed classification: answer nothing and cache nothing, the next try may work
+                return {"type": "text", "content": CLASSIFY_FAILED_REPLY, "sql_query": None}
+            is_data_question = routed["intent"] == "sql"
+            sql_query, chat_reply = routed["sql"], routed["reply"]
+            ANSWER_CACHE.set("intent", is_data_question, version, question_key)
+            ANSWER_CACHE.set("sql", sql_query, version, question_key)
+    else:
+        if is_data_question is None:
+            with span("classify"):
+                is_data_question = is_sql_related(user_question, SCHEMA_FILE, API_KEY)
+            if is_data_question is None:
+                # failed classification: answer nothing and cache nothing, the next try may work
+                return {"type": "text", "content": CLASSIFY_FAILED_REPLY, "sql_query": None}
+            ANSWER_CACHE.set("intent", is_data_question, version, question_key)
+        if is_data_question and sql_query is None:
+            progress("generating SQL")
+            with span("sql_generation"):
+                sql_query = generate_sql(user_question, SCHEMA_FILE, API_KEY)
+            ANSWER_CACHE.set("sql", sql_query, version, question_key)
+
+    if is_data_question:
+        cached_answer = ANSWER_CACHE.get("answer", version, question_key, sql_query)
+        if cached_answer is not None and _answer_still_valid(cached_answer):
+            return cached_answer
 
         # Step 2: run SQL
-        df = run_sql(sql_query, DB_CONFIG)
+        df = ANSWER_CACHE.get("result", version, sql_query)
+        if df is None:
+            progress("querying")
+            try:
+                checked_sql, df = _run_checked_sql(sql_query, user_question, progress)
+            except SQLRejected as e:
+                print(f"❌ SQL not run ({e.reason}): {e}")
+                return {"type": "text", "content": f"I could not run a safe query for this question: {e}",
+                        "sql_query": sql_query}
+            if checked_sql != sql_query:
+                # remember the rewrite, so the question does not fail the guard again
+                sql_query = checked_sql
+                ANSWER_CACHE.set("sql", sql_query, version, question_key)
+            ANSWER_CACHE.set("result", df, version, sql_query)
 
         # Step 3: is it visualizable?
-        if is_visualizable(df, user_question):
-            unique_id = str(uuid.uuid4())[:8]
-            image_filename = f"generated_plot_{unique_id}.png"
-            image_path = os.path.join("static", image_filename)
-
-            generate_and_save_plot(
-                df,
-                API_KEY,
-                user_question,
-                output_path=image_path
-            )
+        with span("visualizable"):
+            visualizable = is_visualizable(df, user_question)
+        if visualizable:
+            progress("plotting")
+            # Same result + same chart -> same file; rendered only on a miss
+            with span("plot"):
+                spec = plan_chart(df, user_question)
+                if spec is not None:
+                    saved_path = PLOT_STORE.get_or_render(
+                        df, spec, lambda path: _render_spec(df, user_question, spec, path)
+                    )
+                elif PLOT_LLM_FALLBACK:
+                    saved_path = PLOT_STORE.get_or_render(
+                        df, {"llm_question": question_key}, lambda path: _render_with_llm(df, user_question, path)
+                    )
+                else:
+                    saved_path = None
 
-            return {"type": "image", "path": image_filename,"sql_query": sql_query}
+            if saved_path:
+                answer = {"type": "image", "path": saved_path,"sql_query": sql_query}
+                ANSWER_CACHE.set("answer", answer, version, question_key, sql_query)
+                return answer
 
-        else:
-            # Step 4: result → natural language
-            nl_answer = sql_result_to_nl(df, user_question, API_KEY)
-            return {"type": "text", "content": nl_answer,"sql_query": sql_query}
+        # Step 4: result → natural language (also when no chart could be drawn)
+        progress("summarizing")
+        stream = None
+        if on_token is not None:
+            # text answers are shown as-is, so every piece is final html right away
+            def stream(delta):
+                on_token(delta, html.escape(delta), "")
+        with span("generation"):
+            nl_answer = sql_result_to_nl(df, user_question, API_KEY, LLM_RESULT_TOKEN_BUDGET, on_token=stream)
+        answer = {"type": "text", "content": nl_answer,"sql_query": sql_query}
+        ANSWER_CACHE.set("answer", answer, version, question_key, sql_query)
+        return answer
 
     # 2) Otherwise, treat it as greeting / small talk
-    nl_answer = handle_greetings(user_question, API_KEY)
-    return {"type": "text", "content": nl_answer,"sql_query": None}
+    # (the reply is cached next to the intent, so a repeat costs no LLM call)
+    cached_answer = ANSWER_CACHE.get("answer", version, question_key, None)
+    if not chat_reply and cached_answer is not None:
+        return cached_answer
+    if chat_reply:
+        nl_answer = chat_reply
+    else:
+        with span("generation"):
+            nl_answer = handle_greetings(user_question, API_KEY)
+        if nl_answer is None:
+            return {"type": "text", "content": CLASSIFY_FAILED_REPLY, "sql_query": None}
+    answer = {"type": "text", "content": nl_answer,"sql_query": None}
+    ANSWER_CACHE.set("answer", answer, version, question_key, None)
+    return answer
+
+
+def _no_progress(stage):
+    pass
+
+
+def _run_checked_sql(sql_query, user_question, progress):
+    """
+    SQL guard, then the query (on a rollup when the advisor has one). Rejected or
+    timed-out SQL is rewritten by the LLM and tried again. Returns (sql_query, df).
+    """
+    for attempt in range(SQL_REWRITE_ATTEMPTS + 1):
+        try:
+            with span("sql_guard"):
+                safe_sql = check_sql(ADVISOR.rewrite(sql_query), BACKEND, RESULT_MAX_ROWS, SQL_MAX_ROWS_SCANNED)
+            with span("query") as s:
+                start = time.perf_counter()
+                df = BACKEND.run_sql(safe_sql, max_rows=RESULT_MAX_ROWS, timeout=QUERY_TIMEOUT_SECONDS)
+                s.set(rows=len(df), bytes=int(df.memory_usage(index=False).sum()))
+        except SQLRejected as e:
+            if not e.rewritable or attempt == SQL_REWRITE_ATTEMPTS:
+                raise
+            print(f"⚠️ SQL rejected ({e.reason}): {e}")
+            progress("rewriting SQL")
+            with span("sql_rewrite"):
+                sql_query = rewrite_sql(sql_query, str(e), user_question, SCHEMA_FILE, API_KEY)
+            continue
+        ADVISOR.record(sql_query, 1000 * (time.perf_counter() - start), len(df))
+        if ADVISOR_AUTO_APPLY:
+            ADVISOR.apply_in_background(BACKEND)
+        return sql_query, df
+
+
+def _render_spec(df, user_question, spec, output_path):
+    if RENDER_POOL is None:
+        return plot_dataframe(df, user_question, output_path, spec=spec)
+    return RENDER_POOL.render(df, spec, output_path)
+
+
+def _render_with_llm(df, user_question, output_path):
+    """Gemini writes the plotting code; it is exec'd in a render worker, never in this thread"""
+    if RENDER_POOL is None:
+        return generate_and_save_plot(df, API_KEY, user_question, output_path=output_path,
+                                      token_budget=LLM_RESULT_TOKEN_BUDGET)
+    code = generate_plot_code(df, API_KEY, user_question, output_path, LLM_RESULT_TOKEN_BUDGET)
+    return RENDER_POOL.run_code(df, code, output_path)
+
+
+def _schema_words():
+    """Table and column names, so the small-talk filter never swallows a data question"""
+    words = set()
+    for info in get_registry(SCHEMA_FILE).schema().values():
+        words.add(info["table_name"].lower())
+        words.update(col["name"].lower() for col in info["columns"])
+    return words
+
+
+def _answer_still_valid(answer):
+    """A cached plot answer is only usable while its image is still on disk"""
+    if answer["type"] == "image":
+        return PLOT_STORE.contains(answer["path"])
+    return True
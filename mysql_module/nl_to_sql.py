@@ -1,8 +1,13 @@
 import json
-import google.generativeai as genai
+import re
+from llm_provider import get_llm
 #import pymysql
 import pandas as pd 
-from sqlalchemy import create_engine
+from .db_pool import pooled_connection
+from .sql_guard import cancel_after, QueryTimeout
+from .schema_registry import format_table_for_prompt, PROMPT_HEADER
+from .schema_retriever import relevant_schema_text
+from .result_summarizer import summarize_result, DEFAULT_TOKEN_BUDGET
 
 
 # ------------------ LOAD SCHEMA ------------------
@@ -13,24 +18,16 @@ def load_schema(schema_file):
 
 # ------------------ FORMAT PROMPT ------------------
 def format_schema_for_prompt(schema):
-    prompt = "The database has the following tables:\n\n"
-    for table, info in schema.items():
-        prompt += f"Table: {info['table_name']}\nColumns:\n"
-        for col in info["columns"]:
-            prompt += f"- {col['name']} ({col['type']})\n"
-        prompt += "\n"
-    return prompt
+    return PROMPT_HEADER + "".join(format_table_for_prompt(info) for info in schema.values())
 
 # ------------------ GENERATE SQL ------------------
 
 def generate_sql(user_question, schema_file, api_key):
-    # Load schema
-    schema = load_schema(schema_file)
-    formatted_schema = format_schema_for_prompt(schema)
+    # Only the tables/columns relevant to the question (whole schema when it is small)
+    formatted_schema = relevant_schema_text(schema_file, user_question)
 
-    # Configure Gemini
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.5-flash")  # you can switch model here
+    # Shared Gemini client (one per model/key for the whole process)
+    llm = get_llm("gemini-2.5-flash", api_key)  # you can switch model here
 
     # Build prompt
     prompt = f"""
@@ -44,40 +41,113 @@ def generate_sql(user_question, schema_file, api_key):
 #Only return the SQL query, nothing else.
 """
 
-    response = model.generate_content(prompt)
-    sql_query = response.text.strip()
+    sql_query = llm.generate(prompt).strip()
 
     # 🔹 Clean SQL output: remove ```sql ... ``` wrappers
     sql_query = sql_query.replace("```sql", "").replace("```", "").strip()
     print(sql_query)
     return sql_query
+
+# ------------------ REWRITE REJECTED SQL ------------------
+def rewrite_sql(sql_query, problem, user_question, schema_file, api_key):
+    """Ask the LLM for a valid / cheaper query after the SQL guard rejected sql_query"""
+    formatted_schema = relevant_schema_text(schema_file, user_question)
+    llm = get_llm("gemini-2.5-flash", api_key)
+
+    prompt = f"""
+You are an expert SQL query generator.
+Here is the database schema:
+{formatted_schema}
+
+User Question: {user_question}
+
+This MySQL query was rejected before running:
+{sql_query}
+
+Reason: {problem}
+
+Write one read-only MySQL SELECT that answers the question and avoids the problem:
+join only on key columns, filter and aggregate early, select only the columns needed.
+Only return the SQL query, nothing else.
+"""
+    sql_query = llm.generate(prompt).strip()
+    sql_query = sql_query.replace("```sql", "").replace("```", "").strip()
+    print("🔁 Rewritten SQL:", sql_query)
+    return sql_query
 #-------------------------------------------------------------------------------
 
 
 
 
 # ------------------ RUN SQL QUERY ON MYSQL ------------------
-def run_sql(query, db_config, default_limit=1000):
-    # 🔹 add LIMIT if user didn’t specify
-    #if "limit" not in query.lower():
-      #  query = query.rstrip(";") + f" LIMIT {default_limit};"
-    #conn = pymysql.connect(**db_config)
-    #df = pd.read_sql(query, conn)
-    #conn.close()
-    engine = create_engine(
-        f"mysql+pymysql://{db_config['user']}:{db_config['password']}@"
-        f"{db_config['host']}/{db_config['database']}"
-    )
-    df = pd.read_sql(query, engine)
+# Hard cap on rows pulled into pandas. Rows are fetched through a server-side
+# cursor in chunks, so an oversized result never fully materializes.
+MAX_RESULT_ROWS = 10000
+FETCH_CHUNKSIZE = 2000
+_TRAILING_LIMIT = re.compile(r"\blimit\s+\d+(\s*(,|offset)\s*\d+)?\s*$", re.IGNORECASE)
+
+
+def _with_row_cap(query, max_rows):
+    """Append LIMIT max_rows+1 to a SELECT without one (the extra row tells us it was cut off)"""
+    query = query.strip().rstrip(";").strip()
+    is_select = re.match(r"(select|with)\b", query, re.IGNORECASE)
+    if is_select and not _TRAILING_LIMIT.search(query):
+        query += f" LIMIT {max_rows + 1}"
+    return query
+
+
+def run_sql(query, db_config, max_rows=MAX_RESULT_ROWS, chunksize=FETCH_CHUNKSIZE, timeout=None):
+    """
+    Run a query on the pooled engine and return at most max_rows rows.
+    df.attrs["truncated"] is True when the result had more rows than that.
+    timeout: seconds before the query is cancelled on the server (QueryTimeout).
+    """
+    query = _with_row_cap(query, max_rows)
+    chunks, fetched = [], 0
+    # reuse the process-wide pooled engine instead of a new one per question
+    with pooled_connection(db_config) as conn:
+        cancel = _query_canceller(conn, db_config) if timeout else None
+        try:
+            with cancel_after(timeout, cancel):
+                stream = conn.execution_options(stream_results=True)
+                for chunk in pd.read_sql(query, stream, chunksize=chunksize):
+                    chunks.append(chunk)
+                    fetched += len(chunk)
+                    if fetched > max_rows:
+                        break
+        except QueryTimeout:
+            conn.invalidate()   # never hand a killed / interrupted session back to the pool
+            raise
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+    truncated = len(df) > max_rows
+    if truncated:
+        df = df.iloc[:max_rows]
+        print(f"⚠️ Query result cut off at {max_rows} rows")
+    df.attrs["truncated"] = truncated
     return df
 
-def sql_result_to_nl(result_df, user_question, api_key):
-    """Send SQL results back to LLM to summarize in natural language"""
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.5-flash")
 
-    # Convert DataFrame to JSON or string for LLM
-    result_str = result_df.to_json(orient="records")
+def _query_canceller(conn, db_config):
+    """Function stopping the query running on conn, from another thread"""
+    if conn.dialect.name == "mysql":
+        connection_id = conn.exec_driver_sql("SELECT CONNECTION_ID()").scalar()
+
+        def kill():
+            # a second pooled connection asks the server to stop the first one's query
+            with pooled_connection(db_config) as other:
+                other.exec_driver_sql(f"KILL QUERY {int(connection_id)}")
+        return kill
+    return conn.connection.dbapi_connection.interrupt   # sqlite3
+
+def sql_result_to_nl(result_df, user_question, api_key, token_budget=DEFAULT_TOKEN_BUDGET, on_token=None):
+    """
+    Send SQL results back to LLM to summarize in natural language.
+    With on_token, the answer is streamed: on_token(text) per piece, full text returned.
+    """
+
+    # Full records JSON for small results, a compact digest (stats, top groups,
+    # head/tail rows) once that would blow the token budget
+    result_str = summarize_result(result_df, token_budget)
     
     prompt = f"""
 You are a helpful assistant. 
@@ -91,8 +161,15 @@ Now, answer the user's question in simple natural language, not as a table.
 Be clear and concise.
 """
 
-    response = model.generate_content(prompt)
-    return response.text.strip()
+    llm = get_llm("gemini-2.5-flash", api_key)
+    if on_token is None:
+        return llm.generate(prompt).strip()
+
+    text = []
+    for piece in llm.stream(prompt):
+        text.append(piece)
+        on_token(piece)
+    return "".join(text).strip()
 
 
 
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+# ------------------ CONTENT-ADDRESSED PLOT STORE ------------------
+# Charts are saved as <sha256 of result + chart spec + format>.<format>, so the
+# same result drawn the same way is rendered once and shared by every answer.
+# The directory is bounded by total size and file age; a hit refreshes the
+# file's mtime, so size eviction drops the least recently used charts first.
+
+FORMATS = ("png", "svg", "webp")
+
+
+def _frame_digest(df: pd.DataFrame):
+    """Stable hash of a DataFrame's columns, dtypes and values"""
+    h = hashlib.sha256()
+    h.update(json.dumps([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+class PlotStore:
+    def __init__(self, directory, url_prefix="", max_bytes=200 * 1024 * 1024,
+                 max_age_seconds=7 * 24 * 3600, fmt="png"):
+        """
+        directory: where charts are written (normally inside Flask's static folder)
+        url_prefix: the directory relative to the static folder, used for the paths handed to templates
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported plot format '{fmt}', use one of {FORMATS}")
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.fmt = fmt
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "render_failures": 0, "evicted": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, df, spec, fmt=None):
+        payload = json.dumps(spec, sort_keys=True, default=str) + (fmt or self.fmt)
+        return hashlib.sha256((_frame_digest(df) + payload).encode()).hexdigest()[:32]
+
+    def _filename(self, key, fmt=None):
+        return f"{key}.{fmt or self.fmt}"
+
+    def _url_path(self, filename):
+        return f"{self.url_prefix}/{filename}" if self.url_prefix else filename
+
+    def get_or_render(self, df, spec, render, fmt=None):
+        """
+        Return the static path of the chart for (df, spec), calling render(output_path)
+        only on a miss. render returns a falsy value on failure; then None is returned.
+        """
+        fmt = fmt or self.fmt
+        filename = self._filename(self.key(df, spec, fmt), fmt)
+        final_path = os.path.join(self.directory, filename)
+
+        if os.path.exists(final_path):
+            try:
+                os.utime(final_path)   # refresh for LRU eviction
+            except OSError:
+                pass                   # evicted by another worker in between; fine, still counts as served
+            self._count("hits")
+            return self._url_path(filename)
+
+        self._count("misses")
+        # Render to a private temp name, then rename: concurrent renders of the
+        # same chart never expose a half-written file
+        tmp_path = os.path.join(self.directory, f".tmp-{uuid.uuid4().hex[:8]}-{filename}")
+        try:
+            saved = render(tmp_path)
+        except Exception as e:
+            print("❌ Error while rendering chart:", e)
+            saved = None
+        if not saved or not os.path.exists(tmp_path):
+            self._count("render_failures")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, final_path)
+        self.evict()
+        return self._url_path(filename)
+
+    def contains(self, url_path):
+        """Whether a path returned by get_or_render is still on disk"""
+        return os.path.exists(os.path.join(self.directory, os.path.basename(url_path)))
+
+    # ------------------ EVICTION ------------------
+    def _files(self):
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    files.append((st.st_mtime, st.st_size, entry.path, entry.name))
+        return files
+
+    def evict(self):
+        """Drop charts older than max_age_seconds, then the least recently used ones until under max_bytes"""
+        now = time.time()
+        files = sorted(self._files())
+        total = sum(size for _, size, _, _ in files)
+        removed = 0
+        for mtime, size, path, name in files:
+            if name.startswith(".tmp-") and now - mtime < 300:
+                continue   # another render is still writing it
+            expired = now - mtime > self.max_age_seconds
+            # stale temp files from crashed renders are also cleaned up here
+            if not (expired or total > self.max_bytes):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            self._count("evicted", removed)
+        return removed
+
+    # ------------------ METRICS ------------------
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+    def stats(self):
+        files = [f for f in self._files() if not f[3].startswith(".tmp-")]
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 3) if lookups else 0.0
+        counts.update(
+            files=len(files),
+            disk_bytes=sum(size for _, size, _, _ in files),
+            max_bytes=self.max_bytes,
+            max_age_seconds=self.max_age_seconds,
+            format=self.fmt,
+        )
+        return counts
@@ -0,0 +1,228 @@
+import io
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+# ------------------ RENDER POOL ------------------
+# Charts are drawn in worker processes, so a large figure never blocks a Flask
+# worker thread and exec'd LLM plotting code (which uses pyplot's global state)
+# can't trample another user's figure. Frames travel as NumPy buffers: numeric
+# and datetime columns as-is, text columns factorized into int codes + uniques.
+
+
+def pack_frame(df: pd.DataFrame, columns=None):
+    """DataFrame -> list of (name, kind, values, uniques), cheap to pickle"""
+    packed = []
+    for name in columns if columns is not None else df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy(dtype="float64", na_value=np.nan) if series.hasnans else series.to_numpy()
+            packed.append((name, "array", values, None))
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            packed.append((name, "array", series.to_numpy(), None))
+        else:
+            codes, uniques = pd.factorize(series)
+            packed.append((name, "factorized", codes.astype(np.int32), np.asarray(uniques, dtype=object)))
+    return packed
+
+
+def unpack_frame(packed):
+    data = {}
+    for name, kind, values, uniques in packed:
+        if kind == "factorized":
+            restored = np.empty(len(values), dtype=object)
+            present = values >= 0
+            restored[present] = uniques[values[present]]
+            restored[~present] = None
+            values = restored
+        data[name] = values
+    return pd.DataFrame(data)
+
+
+def _spec_columns(df, spec):
+    """Only the columns the chart actually draws"""
+    columns = [c for c in [spec.get("x")] + list(spec.get("y") or []) if c is not None]
+    return list(dict.fromkeys(columns)) or list(df.columns)
+
+
+# ------------------ WORKER SIDE ------------------
+_started_queue = None   # in each worker: tells the parent when a render leaves the queue
+
+
+def _init_worker(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _tracked(task_id, fn, *args):
+    _started_queue.put(task_id)
+    return fn(*args)
+
+
+def _render_spec_worker(packed, spec, fmt):
+    from .chart_planner import render_chart
+    buffer = io.BytesIO()
+    render_chart(unpack_frame(packed), spec, buffer, fmt)
+    return buffer.getvalue()
+
+
+def _run_code_worker(packed, code, output_path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    try:
+        exec(code, {"pd": pd, "plt": plt, "df": unpack_frame(packed)})
+    finally:
+        plt.close("all")
+    return os.path.exists(output_path)
+
+
+# ------------------ POOL ------------------
+class RenderPool:
+    """
+    timeout_seconds counts from the moment a worker starts the render, so time
+    queued behind other renders never times out; queue_timeout_seconds bounds that wait.
+    """
+
+    def __init__(self, workers=2, timeout_seconds=30, max_tasks_per_child=200, queue_timeout_seconds=120):
+        self.workers = workers
+        self.timeout_seconds = timeout_seconds
+        self.max_tasks_per_child = max_tasks_per_child
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._executor = None
+        self._started_queue = None
+        self._started = {}   # task id -> Event set when a worker picks the task up
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._counts = {"renders": 0, "failures": 0, "timeouts": 0, "queue_timeouts": 0, "restarts": 0,
+                        "render_ms_total": 0.0}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: forking a threaded Flask process can copy held locks
+                context = multiprocessing.get_context("spawn")
+                self._started_queue = context.Queue()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    max_tasks_per_child=self.max_tasks_per_child,
+                    initializer=_init_worker,
+                    initargs=(self._started_queue,),
+                )
+                threading.Thread(target=self._listen, args=(self._started_queue,), daemon=True).start()
+            return self._executor, self._started_queue
+
+    def _listen(self, started_queue):
+        """Marks tasks as running as workers report them; stops at the None a restart/shutdown sends"""
+        while True:
+            try:
+                task_id = started_queue.get()
+            except (EOFError, OSError):
+                return
+            if task_id is None:
+                return
+            with self._lock:
+                event = self._started.get(task_id)
+            if event is not None:
+                event.set()
+
+    def _stop_listener(self, started_queue):
+        if started_queue is not None:
+            started_queue.put(None)
+
+    def _restart(self, executor, started_queue):
+        """
+        Kill the workers of a pool with a stuck render. ProcessPoolExecutor can't
+        cancel a running task, so the whole pool is replaced; other renders that
+        were in flight on it fail and fall back to the text answer.
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = self._started_queue = None
+                self._counts["restarts"] += 1
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._stop_listener(started_queue)
+
+    def _run(self, fn, *args):
+        executor, started_queue = self._get_executor()
+        task_id = next(self._ids)
+        started = threading.Event()
+        with self._lock:
+            self._started[task_id] = started
+        try:
+            future = executor.submit(_tracked, task_id, fn, *args)
+            future.add_done_callback(lambda f: started.set())   # finished before the start message arrived
+            # queued behind other renders: waiting here never restarts the pool
+            if not started.wait(self.queue_timeout_seconds):
+                future.cancel()
+                print(f"⚠️ Chart render still queued after {self.queue_timeout_seconds}s, skipped")
+                self._count("queue_timeouts")
+                return None
+            start = time.perf_counter()
+            result = future.result(timeout=self.timeout_seconds)
+        except FuturesTimeout:
+            print(f"❌ Chart render timed out after {self.timeout_seconds}s")
+            self._count("timeouts")
+            self._restart(executor, started_queue)
+            return None
+        except BrokenProcessPool as e:
+            print("❌ Render worker died:", e)
+            self._count("failures")
+            self._restart(executor, started_queue)
+            return None
+        except Exception as e:
+            print("❌ Error while rendering chart:", e)
+            self._count("failures")
+            return None
+        finally:
+            with self._lock:
+                self._started.pop(task_id, None)
+        self._count("renders")
+        self._count("render_ms_total", 1000 * (time.perf_counter() - start))
+        return result
+
+    def render(self, df, spec, output_path, fmt=None):
+        """Render a chart spec in a worker and write the returned bytes. Returns output_path or None."""
+        fmt = fmt or os.path.splitext(output_path)[1].lstrip(".") or "png"
+        image = self._run(_render_spec_worker, pack_frame(df, _spec_columns(df, spec)), spec, fmt)
+        if image is None:
+            return None
+        with open(output_path, "wb") as f:
+            f.write(image)
+        return output_path
+
+    def run_code(self, df, code, output_path):
+        """Exec LLM plotting code (which saves to output_path itself) in a worker"""
+        saved = self._run(_run_code_worker, pack_frame(df), code, output_path)
+        return output_path if saved else None
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            started_queue, self._started_queue = self._started_queue, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._stop_listener(started_queue)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        total_ms = counts.pop("render_ms_total")
+        counts["avg_render_ms"] = round(total_ms / counts["renders"], 1) if counts["renders"] else 0.0
+        counts.update(workers=self.workers, timeout_seconds=self.timeout_seconds,
+                      queue_timeout_seconds=self.queue_timeout_seconds)
+        return counts
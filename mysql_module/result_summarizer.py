@@ -0,0 +1,88 @@
+import json
+import pandas as pd
+
+# ------------------ RESULT SUMMARIZER ------------------
+# Query results are sent to the LLM as-is only while they fit the token budget.
+# Bigger frames are replaced by a compact digest: shape, per-column stats,
+# top groups for text columns and as many head/tail rows as still fit.
+
+DEFAULT_TOKEN_BUDGET = 3000
+CHARS_PER_TOKEN = 4          # rough estimate, good enough for budgeting prompts
+TOP_K_GROUPS = 5
+MAX_SAMPLE_ROWS = 10
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _records_json(df):
+    return df.to_json(orient="records", date_format="iso", default_handler=str)
+
+
+def _round(value):
+    return round(float(value), 4) if pd.notnull(value) else None
+
+
+def _column_stats(series, top_k):
+    """Short description of one column: numbers get min/max/mean/sum, everything else top-k values"""
+    stats = {"dtype": str(series.dtype), "nulls": int(series.isna().sum())}
+    if pd.api.types.is_bool_dtype(series):
+        stats["top"] = {str(k): int(v) for k, v in series.value_counts().head(top_k).items()}
+    elif pd.api.types.is_numeric_dtype(series):
+        stats.update(
+            min=_round(series.min()),
+            max=_round(series.max()),
+            mean=_round(series.mean()),
+            sum=_round(series.sum()),
+        )
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        stats.update(min=str(series.min()), max=str(series.max()))
+    else:
+        counts = series.astype(str).where(series.notna()).value_counts()
+        stats["distinct"] = int(counts.size)
+        if counts.size < series.notna().sum():   # all-unique columns have no useful "top"
+            stats["top"] = {k[:60]: int(v) for k, v in counts.head(top_k).items()}
+    return stats
+
+
+def _digest(df, n_rows, top_k, truncated):
+    shape_line = f"{len(df)} rows x {len(df.columns)} columns"
+    if truncated:
+        shape_line += f" (query result was cut off at {len(df)} rows; stats cover only these rows)"
+    stats = {col: _column_stats(df[col], top_k) for col in df.columns}
+    parts = [
+        f"Result too large to send in full: {shape_line}.",
+        "Column stats: " + json.dumps(stats, default=str),
+    ]
+    if n_rows:
+        head = df.head(n_rows)
+        parts.append(f"First {len(head)} rows: " + _records_json(head))
+        if len(df) > 2 * n_rows:
+            parts.append(f"Last {n_rows} rows: " + _records_json(df.tail(n_rows)))
+    return "\n".join(parts)
+
+
+def summarize_result(df, token_budget=DEFAULT_TOKEN_BUDGET, top_k=TOP_K_GROUPS):
+    """
+    Text representation of a query result for an LLM prompt, kept under token_budget.
+    Small results are returned as the usual records JSON.
+    """
+    truncated = bool(df.attrs.get("truncated"))
+    if not truncated:
+        full = _records_json(df)
+        if estimate_tokens(full) <= token_budget:
+            return full
+
+    # Shrink the sample rows first, then the number of groups per column
+    for k in (top_k, 3, 1):
+        n_rows = min(MAX_SAMPLE_ROWS, len(df))
+        while True:
+            text = _digest(df, n_rows, k, truncated)
+            if estimate_tokens(text) <= token_budget or n_rows == 0:
+                break
+            n_rows //= 2
+        if estimate_tokens(text) <= token_budget:
+            return text
+    # Very wide frames: the stats alone exceed the budget, hard-cut the text
+    return text[: token_budget * CHARS_PER_TOKEN]
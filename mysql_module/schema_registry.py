@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import threading
+
+# ------------------ SCHEMA REGISTRY ------------------
+PROMPT_HEADER = "The database has the following tables:\n\n"
+
+
+def format_table_for_prompt(info):
+    """Prompt fragment for one table (same text format_schema_for_prompt produces)"""
+    fragment = f"Table: {info['table_name']}\nColumns:\n"
+    for col in info["columns"]:
+        fragment += f"- {col['name']} ({col['type']})\n"
+    return fragment + "\n"
+
+
+class SchemaRegistry:
+    """
+    Owns schema_registry.json for the whole process.
+
+    The parsed schema and the rendered prompt fragments are cached in memory
+    and only rebuilt when the file's mtime/size changes (e.g. another worker
+    uploaded a table). Uploads merge one table into the file and write it
+    atomically, so other tables are never lost.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._schema = {}
+        self._fragments = {}
+
+    # -------- reading --------
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            if stamp is None:
+                schema = {}
+            else:
+                with open(self.path, "r") as f:
+                    schema = json.load(f)
+            self._schema = schema
+            self._fragments = {table: format_table_for_prompt(info) for table, info in schema.items()}
+            self._stamp = stamp
+
+    @property
+    def version(self):
+        """Changes whenever the registry file changes; use it in cache keys"""
+        self._refresh()
+        return "no-schema" if self._stamp is None else f"{self._stamp[0]}-{self._stamp[1]}"
+
+    def schema(self):
+        """{table_name: {"table_name": ..., "columns": [{"name", "type"}, ...]}}"""
+        self._refresh()
+        return self._schema
+
+    def table_names(self):
+        return list(self.schema())
+
+    def prompt_text(self, tables=None):
+        """Schema text for LLM prompts; `tables` limits it to a subset"""
+        self._refresh()
+        fragments = self._fragments
+        names = fragments if tables is None else [t for t in tables if t in fragments]
+        return PROMPT_HEADER + "".join(fragments[t] for t in names)
+
+    # -------- writing --------
+    def upsert_table(self, table_name, columns):
+        """Add or replace one table's entry, keeping every other table"""
+        with self._lock:
+            self._refresh()
+            schema = dict(self._schema)
+            schema[table_name] = {"table_name": table_name, "columns": columns}
+            self._write(schema)
+
+    def remove_table(self, table_name):
+        with self._lock:
+            self._refresh()
+            schema = dict(self._schema)
+            if schema.pop(table_name, None) is not None:
+                self._write(schema)
+
+    def _write(self, schema):
+        # write to a temp file next to the registry, then swap it in atomically
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".schema_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(schema, f, indent=4)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._stamp = None   # force a reload (and re-render) on next read
+        self._refresh()
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(path):
+    """Process-wide SchemaRegistry for a registry file path"""
+    path = os.path.abspath(path)
+    with _registries_lock:
+        if path not in _registries:
+            _registries[path] = SchemaRegistry(path)
+        return _registries[path]
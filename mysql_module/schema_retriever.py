@@ -0,0 +1,153 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from tracing import span
+
+from .schema_registry import get_registry, format_table_for_prompt, PROMPT_HEADER
+
+# ------------------ SETTINGS ------------------
+TOP_K_TABLES = 5             # tables sent to the LLM
+MAX_COLUMNS_PER_TABLE = 40   # wider tables only keep their best-matching columns
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "by", "and", "or", "is", "are", "was", "were",
+    "me", "show", "give", "list", "what", "which", "who", "how", "many", "much", "with", "from",
+    "all", "each", "per", "did", "do", "does", "has", "have", "most", "top", "their", "there",
+}
+
+
+# ------------------ TOKENIZING ------------------
+def tokenize(text):
+    """Lower-case word tokens; splits snake_case / camelCase and drops a plural 's'"""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(text))
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+# ------------------ BM25 ------------------
+class BM25Index:
+    """Small in-memory BM25 over a list of token lists"""
+
+    def __init__(self, docs, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_lens = [len(doc) for doc in docs]
+        self.avg_len = (sum(self.doc_lens) / len(docs)) if docs else 0.0
+        self.postings = defaultdict(list)   # token -> [(doc_id, term_freq)]
+        for doc_id, doc in enumerate(docs):
+            for token, tf in Counter(doc).items():
+                self.postings[token].append((doc_id, tf))
+        n_docs = len(docs)
+        self.idf = {
+            token: math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for token, posting in self.postings.items()
+        }
+
+    def scores(self, query_tokens):
+        """{doc_id: score} for docs sharing at least one token with the query"""
+        scores = defaultdict(float)
+        for token in set(query_tokens):
+            for doc_id, tf in self.postings.get(token, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[doc_id] / (self.avg_len or 1))
+                scores[doc_id] += self.idf[token] * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+
+# ------------------ SCHEMA RETRIEVER ------------------
+class SchemaRetriever:
+    """
+    Index of every column in the registry (table name + column name + sample values),
+    used to pick only the tables/columns relevant to a question.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.columns = []   # [(table, column_dict)]
+        docs = []
+        for table, info in schema.items():
+            table_tokens = tokenize(table)
+            for col in info["columns"]:
+                self.columns.append((table, col))
+                samples = " ".join(str(v) for v in col.get("samples", []))
+                # names count twice so they outweigh sample values
+                docs.append(table_tokens + tokenize(col["name"]) * 2 + tokenize(samples))
+        self.index = BM25Index(docs)
+
+    def select(self, question, top_k=TOP_K_TABLES, max_columns=MAX_COLUMNS_PER_TABLE):
+        """Return {table: [column_dict, ...]} for the top_k most relevant tables"""
+        column_scores = self.index.scores(tokenize(question))
+
+        per_table = defaultdict(list)
+        for doc_id, score in column_scores.items():
+            table, col = self.columns[doc_id]
+            per_table[table].append((score, col["name"]))
+
+        # a table scores as its best column, plus a little for every other matching column
+        table_scores = {}
+        for table, scored in per_table.items():
+            best = max(score for score, _ in scored)
+            table_scores[table] = best + 0.1 * (sum(score for score, _ in scored) - best)
+
+        ranked = sorted(table_scores, key=table_scores.get, reverse=True)[:top_k]
+        if not ranked:
+            # nothing matched: fall back to the first tables rather than an empty prompt
+            ranked = list(self.schema)[:top_k]
+
+        selected = {}
+        for table in ranked:
+            columns = self.schema[table]["columns"]
+            if len(columns) > max_columns:
+                # best-scoring columns first, then identifier / date columns (needed for
+                # joins and filters) while there is room, then the rest in schema order
+                keys = [c["name"] for c in columns if c["name"] == "id"
+                        or c["name"].endswith("_id") or "date" in c["name"]]
+                order = [name for _, name in sorted(per_table[table], reverse=True)]
+                order += keys + [c["name"] for c in columns]
+                chosen = set(list(dict.fromkeys(order))[:max_columns])
+                columns = [c for c in columns if c["name"] in chosen]
+            selected[table] = columns
+        return selected
+
+
+_retrievers = {}   # registry path -> (registry version, SchemaRetriever)
+_retrievers_lock = threading.Lock()
+
+
+def get_retriever(schema_file):
+    """SchemaRetriever for the registry file, rebuilt only when the registry changes"""
+    registry = get_registry(schema_file)
+    version = registry.version
+    with _retrievers_lock:
+        cached = _retrievers.get(registry.path)
+        if cached is None or cached[0] != version:
+            cached = (version, SchemaRetriever(registry.schema()))
+            _retrievers[registry.path] = cached
+        return cached[1]
+
+
+def relevant_schema_text(schema_file, question, top_k=TOP_K_TABLES, max_columns=MAX_COLUMNS_PER_TABLE):
+    """
+    Schema prompt text with only the tables/columns relevant to `question`.
+    Small registries (<= top_k tables, none too wide) are sent whole.
+    """
+    with span("schema_load") as s:
+        registry = get_registry(schema_file)
+        schema = registry.schema()
+        if len(schema) <= top_k and all(len(info["columns"]) <= max_columns for info in schema.values()):
+            text = registry.prompt_text()
+        else:
+            selected = get_retriever(schema_file).select(question, top_k, max_columns)
+            text = PROMPT_HEADER + "".join(
+                format_table_for_prompt({"table_name": table, "columns": columns})
+                for table, columns in selected.items()
+            )
+        s.set(bytes=len(text))
+    return text
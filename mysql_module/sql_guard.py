@@ -0,0 +1,160 @@
+import threading
+from contextlib import contextmanager
+
+# ------------------ SQL GUARD ------------------
+# LLM-written SQL is checked before it reaches the database:
+#   1. sqlglot parse: exactly one read-only SELECT / UNION, no row locks, no
+#      SELECT ... INTO, no SLEEP()-style functions, no join without a join condition
+#   2. a LIMIT is added (or lowered) so the server never builds more rows than we fetch
+#   3. the backend's EXPLAIN estimate of rows touched must stay under max_rows_scanned
+# The query then runs under cancel_after(), which cancels it on the server when
+# it overruns (KILL QUERY on MySQL, interrupt() on SQLite / DuckDB).
+# Rejected and timed-out queries go back to the LLM for a cheaper rewrite
+# (nl_to_sql.rewrite_sql).
+
+DEFAULT_MAX_ROWS_SCANNED = 50_000_000
+BLOCKED_FUNCTIONS = {"SLEEP", "BENCHMARK", "LOAD_FILE", "GET_LOCK", "RELEASE_LOCK", "SYS_EXEC", "SYS_EVAL"}
+
+
+class SQLRejected(Exception):
+    """
+    reason: "invalid", "not_select", "too_expensive" or "timeout".
+    All but "not_select" are worth sending back to the LLM for a rewrite.
+    """
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+    @property
+    def rewritable(self):
+        return self.reason != "not_select"
+
+
+class QueryTimeout(SQLRejected):
+    def __init__(self, seconds):
+        super().__init__("timeout", f"query cancelled after {seconds:g} s")
+
+
+def _sqlglot():
+    import sqlglot
+    from sqlglot import exp
+    return sqlglot, exp
+
+
+# ------------------ STATIC CHECKS ------------------
+def _cartesian_join(select, exp):
+    """
+    Name of a table joined without ON / USING / WHERE equality to it, else None.
+    Without the schema an unqualified column (WinningTeam = TeamName) could belong
+    to any table, so such an equality counts as linking every joined table.
+    """
+    where = select.args.get("where")
+    linked, unqualified = set(), False
+    if where is not None:
+        for eq in where.find_all(exp.EQ):
+            if isinstance(eq.this, exp.Column) and isinstance(eq.expression, exp.Column):
+                tables = {eq.this.table, eq.expression.table}
+                unqualified = unqualified or "" in tables
+                linked.update(tables)
+    for join in select.args.get("joins") or []:
+        if join.args.get("on") is not None or join.args.get("using"):
+            continue
+        name = join.this.alias_or_name
+        if name not in linked and not unqualified:
+            return name
+    return None
+
+
+def validate_sql(sql, max_rows):
+    """
+    Parse sql as MySQL and return it with a LIMIT of at most max_rows + 1
+    (the extra row tells run_sql the result was cut off). Raises SQLRejected.
+    """
+    sqlglot, exp = _sqlglot()
+    try:
+        statements = [s for s in sqlglot.parse(sql, read="mysql") if s is not None]
+    except sqlglot.errors.ParseError as e:
+        raise SQLRejected("invalid", f"SQL does not parse: {e}") from e
+    if len(statements) != 1:
+        raise SQLRejected("not_select", f"expected one statement, got {len(statements)}")
+    tree = statements[0]
+    if isinstance(tree, (exp.DML, exp.DDL, exp.Command, exp.Show, exp.Set)):
+        raise SQLRejected("not_select", f"only SELECT queries may run, got {tree.key.upper()}")
+    if not isinstance(tree, exp.Query):
+        raise SQLRejected("invalid", "not a SELECT query")
+
+    for node in tree.walk():
+        if isinstance(node, (exp.DML, exp.DDL, exp.Command, exp.Into, exp.Lock)):
+            raise SQLRejected("not_select", f"{node.key.upper()} is not allowed in a read-only query")
+        if isinstance(node, exp.Func):
+            name = (node.name if isinstance(node, exp.Anonymous) else node.sql_name()).upper()
+            if name in BLOCKED_FUNCTIONS:
+                raise SQLRejected("not_select", f"function {name} is not allowed")
+    for select in tree.find_all(exp.Select):
+        table = _cartesian_join(select, exp)
+        if table:
+            raise SQLRejected("too_expensive", f"'{table}' is joined without a join condition (cartesian product)")
+
+    limit = tree.args.get("limit")
+    row_count = limit.expression if limit is not None else None
+    if row_count is None or (isinstance(row_count, exp.Literal) and int(row_count.this) > max_rows + 1):
+        if row_count is not None:
+            limit.set("expression", exp.Literal.number(max_rows + 1))
+        else:
+            tree = tree.limit(max_rows + 1)
+    return tree.sql(dialect="mysql")
+
+
+# ------------------ COST CHECK ------------------
+def check_sql(sql, backend=None, max_rows=10000, max_rows_scanned=DEFAULT_MAX_ROWS_SCANNED):
+    """
+    validate_sql(), then the backend's EXPLAIN estimate (when it has one).
+    Returns the SQL to run; raises SQLRejected.
+    """
+    safe_sql = validate_sql(sql, max_rows)
+    if backend is None or not max_rows_scanned:
+        return safe_sql
+    try:
+        estimate = backend.estimate_rows(safe_sql)
+    except Exception as e:
+        # unknown table / column etc.: the LLM can fix those
+        raise SQLRejected("invalid", f"EXPLAIN failed: {e}") from e
+    if estimate is not None and estimate > max_rows_scanned:
+        raise SQLRejected("too_expensive", f"estimated {estimate:,} rows scanned, limit is {max_rows_scanned:,}")
+    return safe_sql
+
+
+# ------------------ TIMEOUT ------------------
+@contextmanager
+def cancel_after(seconds, cancel):
+    """
+    Run the block; if it is still running after seconds, cancel() stops the
+    query on the server and QueryTimeout is raised. No-op when seconds is falsy.
+    """
+    if not seconds:
+        yield
+        return
+    fired = threading.Event()
+
+    def fire():
+        fired.set()
+        try:
+            cancel()
+        except Exception as e:
+            print(f"⚠️ Could not cancel query: {e}")
+
+    timer = threading.Timer(seconds, fire)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except Exception as e:
+        if fired.is_set():
+            raise QueryTimeout(seconds) from e
+        raise
+    finally:
+        timer.cancel()
+        timer.join()   # a cancel that is already running finishes before we go on
+    if fired.is_set():
+        # finished right at the deadline, but the cancel may have hit the connection
+        raise QueryTimeout(seconds)
@@ -1,7 +1,8 @@
 import pandas as pd
-from sqlalchemy import create_engine
-import pymysql
-import re, json
+import re, json, csv, os, tempfile
+from .column_profiler import profile_column, profile_and_convert, mysql_type_from_profile, sample_values
+from .db_pool import get_engine, pooled_raw_connection
+from .schema_registry import get_registry
 
 # ------------------ COLUMN CLEANING ------------------
 def clean_column_names(columns):
@@ -24,123 +25,348 @@ def clean_column_names(columns):
 # ------------------ TYPE MAPPING ------------------
 def map_dtype_to_mysql(series: pd.Series):
     """Map pandas dtype to optimal MySQL type"""
-    if pd.api.types.is_integer_dtype(series):
-        min_val, max_val = series.min(), series.max()
-        if pd.isnull(min_val) or pd.isnull(max_val):
-            return "INT"
-        if min_val >= -128 and max_val <= 127:
-            return "TINYINT"
-        elif min_val >= -32768 and max_val <= 32767:
-            return "SMALLINT"
-        elif min_val >= -2147483648 and max_val <= 2147483647:
-            return "INT"
-        else:
-            return "BIGINT"
-    elif pd.api.types.is_float_dtype(series):
-        # If all floats are actually integers, downgrade to INT
-        if (series.dropna() % 1 == 0).all():
-            return "INT"
+    return mysql_type_from_profile(profile_column(series))
+
+# ------------------ TYPE WIDENING (streaming mode) ------------------
+INT_TYPES = ["TINYINT", "SMALLINT", "INT", "BIGINT"]
+
+
+def _varchar_len(mysql_type):
+    match = re.match(r"VARCHAR\((\d+)\)", mysql_type)
+    return int(match.group(1)) if match else None
+
+
+def widen_mysql_type(current, new):
+    """
+    Return the narrowest MySQL type that can hold values of both `current` and `new`.
+    Used when a later chunk does not fit the type inferred from the first one.
+    """
+    if current == new:
+        return current
+
+    # TINYINT(1) is a boolean, but widens like any other integer
+    current_base = "TINYINT" if current == "TINYINT(1)" else current
+    new_base = "TINYINT" if new == "TINYINT(1)" else new
+
+    if current_base in INT_TYPES and new_base in INT_TYPES:
+        return max(current_base, new_base, key=INT_TYPES.index)
+    if {current_base, new_base} <= set(INT_TYPES) | {"DOUBLE"}:
         return "DOUBLE"
-    elif pd.api.types.is_bool_dtype(series):
-        return "TINYINT(1)"
-    elif pd.api.types.is_datetime64_any_dtype(series):
-        return "DATETIME"
-    else:
-        max_len = series.astype(str).map(len).max()
-        varchar_len = min(max_len + 10, 500)
-        return f"VARCHAR({varchar_len})"
+
+    # anything else falls back to text, long enough for either side.
+    # Text columns grow by at least 2x so a long file only triggers a few ALTER TABLEs.
+    current_len = _varchar_len(current) or 32
+    new_len = _varchar_len(new) or 32
+    if new_len > current_len:
+        new_len = max(new_len, current_len * 2)
+    return f"VARCHAR({min(max(current_len, new_len), 500)})"
 
 # ------------------ PREPROCESSING ------------------
-def preprocess_dataframe(df):
-    """Basic preprocessing before uploading to MySQL"""
+def preprocess_and_profile(df):
+    """
+    Basic preprocessing before uploading to MySQL.
+    Returns the cleaned frame and {column: profile} for the cleaned columns,
+    so the MySQL types can be picked without scanning the data again.
+    """
     print(f"Before cleaning: {len(df)} rows")
     # 1. Drop duplicate rows
     df = df.drop_duplicates()
 
-    # 2. Drop rows with missing values
-    #df = df.dropna()
-    df = df.fillna("NULL")
-
+    # 2. Missing values stay as NaN/NaT and are inserted as SQL NULL
     print(f"After cleaning: {len(df)} rows")
 
-    # 3. Force integer type if column looks like an ID
+    profiles = {}
     for col in df.columns:
-        if "id" in col.lower():
-            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")  # nullable int
+        # 3. Numbers stored as text become real numbers,
+        # 4. columns whose name suggests a date become datetime (if they parse)
+        series = df[col]
+        converted, profile = profile_and_convert(series)
+        if converted is not series:
+            df[col] = converted
 
-    # 3. Try converting numeric-looking strings to numbers
-    for col in df.select_dtypes(include="object").columns:
-        if df[col].str.replace(".", "", 1).str.isnumeric().all():
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+        # 5. Force nullable integer type if column looks like an ID
+        if "id" in col.lower() and profile["kind"] == "int":
+            df[col] = df[col].astype("Int64")
 
-    # 4. Convert datetime only if column name suggests it's a date
-    for col in df.columns:
-        if "date" in col.lower():
-            df[col] = pd.to_datetime(df[col], errors="coerce")
+        profiles[col] = profile
+
+    return df, profiles
 
+
+def preprocess_dataframe(df):
+    """Basic preprocessing before uploading to MySQL"""
+    df, _ = preprocess_and_profile(df)
     return df
 
 
-# ------------------ MAIN UPLOAD FUNCTION ------------------
-def upload_to_mysql(file_path, table_name, db_user, db_password, db_host, db_name, schema_file="schema_registry.json"):
-    # 1. Read file
+# ------------------ BULK LOADERS ------------------
+def _rows_for_insert(df):
+    """Convert a DataFrame slice to plain Python rows, NaN/NaT -> None"""
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def insert_executemany(conn, df, table_name, batch_size=5000, placeholder="%s"):
+    """
+    Insert df in batches with cursor.executemany (one multi-row INSERT per batch).
+    placeholder is the driver's parameter marker ("?" for sqlite3).
+    """
+    cols = ", ".join(f"`{col}`" for col in df.columns)
+    placeholders = ", ".join([placeholder] * len(df.columns))
+    insert_sql = f"INSERT INTO `{table_name}` ({cols}) VALUES ({placeholders})"
+
+    cursor = conn.cursor()
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        cursor.executemany(insert_sql, _rows_for_insert(batch))
+    conn.commit()
+    cursor.close()
+
+
+def insert_load_data(conn, df, table_name, batch_size=100000):
+    """
+    Stream df into a temporary TSV file and load it with LOAD DATA LOCAL INFILE.
+    Needs local_infile enabled on both the client connection and the server.
+    """
+    cols = ", ".join(f"`{col}`" for col in df.columns)
+    bool_cols = df.select_dtypes(include="bool").columns
+
+    fd, tsv_path = tempfile.mkstemp(suffix=".tsv")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            for start in range(0, len(df), batch_size):
+                batch = df.iloc[start:start + batch_size]
+                if len(bool_cols):
+                    batch = batch.astype({col: "int8" for col in bool_cols})
+                batch.to_csv(
+                    f, sep="\t", header=False, index=False, na_rep="NULL",
+                    quoting=csv.QUOTE_MINIMAL, quotechar='"', lineterminator="\n",
+                    date_format="%Y-%m-%d %H:%M:%S",
+                )
+
+        load_sql = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table_name}` "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            "LINES TERMINATED BY '\\n' "
+            f"({cols})"
+        )
+        cursor = conn.cursor()
+        cursor.execute(load_sql, (tsv_path,))
+        conn.commit()
+        cursor.close()
+    finally:
+        os.remove(tsv_path)
+
+
+BULK_LOADERS = {
+    "executemany": insert_executemany,
+    "load_data": insert_load_data,
+}
+
+
+def _insert_sqlite(conn, df, table_name, batch_size=5000):
+    """insert_executemany for sqlite3, which cannot bind pandas Timestamps: dates go in as DATETIME text"""
+    dates = df.select_dtypes(include=["datetime", "datetimetz"]).columns
+    if len(dates):
+        df = df.assign(**{col: df[col].dt.strftime("%Y-%m-%d %H:%M:%S") for col in dates})
+    insert_executemany(conn, df, table_name, batch_size, placeholder="?")
+
+
+def _bulk_loader(load_strategy, dialect):
+    """BULK_LOADERS[load_strategy], adapted to a SQLite target (offline runs / benchmarks)"""
+    if dialect != "sqlite":
+        return BULK_LOADERS[load_strategy]
+    if load_strategy != "executemany":
+        raise ValueError(f"Load strategy '{load_strategy}' needs MySQL, use executemany on SQLite")
+    return _insert_sqlite
+
+
+# ------------------ FILE READING ------------------
+def read_table_file(file_path):
+    """Read a whole CSV / Excel / Parquet file into one DataFrame"""
     ext = file_path.split(".")[-1].lower()
     if ext == "csv":
-        df = pd.read_csv(file_path)
+        return pd.read_csv(file_path)
     elif ext in ["xls", "xlsx"]:
-        df = pd.read_excel(file_path)
-    else:
-        raise ValueError("Unsupported file format. Use CSV or Excel.")
+        return pd.read_excel(file_path)
+    elif ext == "parquet":
+        return pd.read_parquet(file_path)
+    raise ValueError("Unsupported file format. Use CSV, Excel or Parquet.")
 
-    # 2. Clean column names
-    df.columns = clean_column_names(df.columns)
 
-    # 3. Preprocess data
-    df = preprocess_dataframe(df)
+def _iter_xlsx_chunks(file_path, chunksize):
+    """Stream rows of the first sheet with openpyxl's read-only mode"""
+    from openpyxl import load_workbook
 
-    # 4. Connect to MySQL
-    conn = pymysql.connect(host=db_host, user=db_user, password=db_password, database=db_name)
-    cursor = conn.cursor()
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
 
-    # 5. Build CREATE TABLE with intelligent mapping
-    col_defs = []
-    schema_dict = {}
-    for col in df.columns:
-        mysql_type = map_dtype_to_mysql(df[col])
-        schema_dict[col] = mysql_type
-        col_defs.append(f"`{col}` {mysql_type}")
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunksize:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        wb.close()
 
+
+def iter_table_file(file_path, chunksize):
+    """Yield a CSV / Excel file as DataFrames of at most `chunksize` rows"""
+    ext = file_path.split(".")[-1].lower()
+    if ext == "csv":
+        yield from pd.read_csv(file_path, chunksize=chunksize)
+    elif ext == "xlsx":
+        yield from _iter_xlsx_chunks(file_path, chunksize)
+    elif ext in ["xls", "parquet"]:
+        # legacy .xls (and Parquet) are read whole and sliced
+        df = read_table_file(file_path)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        raise ValueError("Unsupported file format. Use CSV, Excel or Parquet.")
+
+
+# ------------------ TABLE HELPERS ------------------
+def create_table(cursor, table_name, schema_dict):
+    """Drop and recreate `table_name` with the given {column: mysql_type} mapping"""
+    col_defs = [f"`{col}` {mysql_type}" for col, mysql_type in schema_dict.items()]
     create_table_sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(col_defs)});"
 
     cursor.execute(f"DROP TABLE IF EXISTS {table_name};")  # fresh table
     cursor.execute(create_table_sql)
 
-    # 6. Insert data
-    for _, row in df.iterrows():
-        placeholders = ", ".join(["%s"] * len(df.columns))
-        insert_sql = f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({placeholders})"
-        cursor.execute(insert_sql, tuple(row))
-    conn.commit()
 
+def text_column_samples(df, profiles):
+    """{column: [frequent values]} for text columns, used by the schema retriever"""
+    return {col: sample_values(df[col]) for col, profile in profiles.items() if profile["kind"] == "text"}
+
+
+def save_schema(schema_file, table_name, schema_dict, samples=None):
+    """Merge this table into the schema registry (other tables are kept)"""
+    samples = samples or {}
+    columns = []
+    for col, mysql_type in schema_dict.items():
+        column = {"name": col, "type": mysql_type}
+        if samples.get(col):
+            column["samples"] = samples[col]
+        columns.append(column)
+    get_registry(schema_file).upsert_table(table_name, columns)
+
+
+# ------------------ STREAMING UPLOAD ------------------
+def _stream_file_to_mysql(conn, file_path, table_name, chunksize, load_strategy, batch_size, dialect="mysql"):
+    """
+    Upload a file chunk by chunk so peak memory stays around one chunk.
+
+    Types are inferred from the first chunk (the sample) and widened with
+    ALTER TABLE whenever a later chunk does not fit. All-null chunks of a
+    column are ignored for typing. Duplicate rows are only
+    dropped within a chunk, not across the whole file. SQLite columns take
+    any value, so there only the registered type is widened.
+    Returns (schema_dict, samples), samples taken from the first chunk.
+    """
+    cursor = conn.cursor()
+    loader = _bulk_loader(load_strategy, dialect)
+    schema_dict = None
+    samples = {}
+    total_rows = 0
+    null_so_far = set()   # columns without a single value yet: their type is only a placeholder
+
+    for chunk in iter_table_file(file_path, chunksize):
+        chunk.columns = clean_column_names(chunk.columns)
+        chunk, profiles = preprocess_and_profile(chunk)
+        chunk_types = {col: mysql_type_from_profile(profile) for col, profile in profiles.items()}
+
+        if schema_dict is None:
+            # first chunk is the sample that decides the initial table layout
+            schema_dict = chunk_types
+            samples = text_column_samples(chunk, profiles)
+            create_table(cursor, table_name, schema_dict)
+            null_so_far = {col for col, profile in profiles.items() if profile["count"] == 0}
+        else:
+            for col, new_type in chunk_types.items():
+                if profiles[col]["count"] == 0:
+                    # an all-null chunk says nothing about the type (it profiles as INT)
+                    continue
+                if col in null_so_far:
+                    widened = new_type
+                    null_so_far.discard(col)
+                else:
+                    widened = widen_mysql_type(schema_dict[col], new_type)
+                if widened != schema_dict[col]:
+                    print(f"Widening `{col}`: {schema_dict[col]} -> {widened}")
+                    if dialect != "sqlite":
+                        cursor.execute(f"ALTER TABLE {table_name} MODIFY COLUMN `{col}` {widened};")
+                    schema_dict[col] = widened
+
+        loader(conn, chunk, table_name, batch_size=batch_size)
+        total_rows += len(chunk)
+        print(f"Inserted {total_rows} rows so far")
+
+    if schema_dict is None:
+        raise ValueError(f"File '{file_path}' has no rows to upload.")
+    return schema_dict, samples
+
+
+# ------------------ MAIN UPLOAD FUNCTION ------------------
+def upload_to_mysql(file_path, table_name, db_user=None, db_password=None, db_host=None, db_name=None,
+                    schema_file="schema_registry.json", load_strategy="executemany", batch_size=5000, chunksize=None,
+                    db_config=None):
+    """
+    Upload a CSV / Excel file to MySQL and save its schema.
+    With `chunksize` set the file is streamed in chunks of that many rows
+    instead of being read into memory at once.
+    db_config (a DB_CONFIG dict or {"url": ...}, see db_pool.get_engine) replaces
+    the db_* arguments; a SQLite URL loads into that SQLite database.
+    """
+    if load_strategy not in BULK_LOADERS:
+        raise ValueError(f"Unknown load strategy '{load_strategy}'. Use one of: {', '.join(BULK_LOADERS)}")
 
+    if db_config is None:
+        db_config = {"host": db_host, "user": db_user, "password": db_password, "database": db_name}
+    dialect = get_engine(db_config).dialect.name
+    loader = _bulk_loader(load_strategy, dialect)
+    # only LOAD DATA gets a connection that may read local files
+    local_infile = load_strategy == "load_data"
+
+    if chunksize:
+        # 1-6. Stream: read, clean, widen types and insert chunk by chunk
+        with pooled_raw_connection(db_config, local_infile) as conn:
+            schema_dict, samples = _stream_file_to_mysql(conn, file_path, table_name, chunksize, load_strategy,
+                                                         batch_size, dialect)
+    else:
+        # 1. Read file
+        df = read_table_file(file_path)
+
+        # 2. Clean column names
+        df.columns = clean_column_names(df.columns)
+
+        # 3. Preprocess data (profiles every column once)
+        df, profiles = preprocess_and_profile(df)
+
+        # 4. Build CREATE TABLE with intelligent mapping
+        schema_dict = {col: mysql_type_from_profile(profile) for col, profile in profiles.items()}
+        samples = text_column_samples(df, profiles)
+
+        # 5. Borrow a connection from the shared MySQL pool
+        with pooled_raw_connection(db_config, local_infile) as conn:
+            create_table(conn.cursor(), table_name, schema_dict)
+
+            # 6. Insert data (bulk)
+            loader(conn, df, table_name, batch_size=batch_size)
 
     # 7. Save schema as JSON
-    schema_json = {
-    table_name: {
-        "table_name": table_name,
-        "columns": [
-            {"name": col, "type": mysql_type}
-            for col, mysql_type in schema_dict.items()
-        ]
-    }
-    }
-
-    with open(schema_file, "w") as f:
-        json.dump(schema_json, f, indent=4)
-
-    conn.close()
-
-    print(f"✅ File '{file_path}' uploaded to MySQL as '{table_name}'.")
+    save_schema(schema_file, table_name, schema_dict, samples)
+
+    print(f"✅ File '{file_path}' uploaded to {'SQLite' if dialect == 'sqlite' else 'MySQL'} as '{table_name}'.")
     print(f"✅ Schema saved to '{schema_file}'.")
     return schema_dict
 
@@ -2,28 +2,29 @@ import pandas as pd
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
-import google.generativeai as genai
+from llm_provider import get_llm
+from .result_summarizer import summarize_result
 
-def generate_and_save_plot(df: pd.DataFrame, api_key: str ,user_question : str,output_path="static/generated_plot.png"):
+def generate_plot_code(df: pd.DataFrame, api_key: str, user_question: str, output_path="static/generated_plot.png", token_budget=2000):
     """
-    Automatically generates and executes visualization code for the given DataFrame using Gemini LLM.
-    The plot is saved as a PNG image.
+    Ask Gemini for matplotlib code that draws df and saves it to output_path.
+    Returns the code without executing it (render_pool runs it in a worker process).
     """
 
-    # Configure Gemini API
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    # Shared Gemini client
+    llm = get_llm("gemini-2.5-flash", api_key)
 
 
-    # Convert DataFrame to JSON
-    df_json = df.to_json(orient="records")
+    # The generated code runs against the real df; the prompt only needs enough
+    # of it (all rows when small, otherwise stats + sample rows) to pick a chart
+    df_json = summarize_result(df, token_budget)
 
     # Deep, precise prompt for code generation
     prompt = f"""
 You are a professional Data Visualization Expert and Python Developer.
 
 A user request: "{user_question}"
-You are given a pandas DataFrame in JSON format:
+You are given a pandas DataFrame `df` (JSON records, or a summary if it is large):
 {df_json}
 
 Your task:
@@ -50,13 +51,19 @@ Output only the Python code.
     """
 
     # Generate visualization code
-    response = model.generate_content(prompt)
-    code = response.text.strip()
+    code = llm.generate(prompt).strip()
 
     # Remove any extra formatting
     code = code.replace("```python", "").replace("```", "").strip()
+    return code
 
-    
+
+def generate_and_save_plot(df: pd.DataFrame, api_key: str ,user_question : str,output_path="static/generated_plot.png", token_budget=2000):
+    """
+    Automatically generates and executes visualization code for the given DataFrame using Gemini LLM.
+    The plot is saved as a PNG image.
+    """
+    code = generate_plot_code(df, api_key, user_question, output_path, token_budget)
 
     # Execute safely
     try:
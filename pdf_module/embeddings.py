@@ -0,0 +1,181 @@
+import hashlib
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# ------------------ EMBEDDING PROVIDERS ------------------
+# A provider turns a list of texts into a list of vectors in ONE request.
+# embed_texts() adds the batching, retries and the on-disk cache on top.
+
+
+class RateLimitError(Exception):
+    """Provider said "slow down" (HTTP 429 / quota exhausted)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GeminiEmbeddingProvider:
+    max_batch_size = 100   # embed_content accepts up to 100 texts per call
+
+    def __init__(self, model="models/text-embedding-004", task_type="retrieval_document"):
+        self.model = model
+        self.task_type = task_type
+        self.name = f"gemini:{model}:{task_type}"
+
+    def embed_batch(self, texts):
+        from llm_provider import embed_content
+        options = {"title": "chunk"} if self.task_type == "retrieval_document" else {}
+        try:
+            res = embed_content(model=self.model, content=list(texts), task_type=self.task_type, **options)
+        except Exception as e:
+            if "429" in str(e) or type(e).__name__ in ("ResourceExhausted", "TooManyRequests"):
+                raise RateLimitError(str(e)) from e
+            raise
+        return res["embedding"]
+
+
+class FakeEmbeddingProvider:
+    """
+    Deterministic offline embeddings for tests and throughput benchmarks:
+    hashed bag of words, so texts sharing words get similar vectors.
+    latency_ms / per_text_ms simulate the network round trip and model time.
+    """
+    max_batch_size = 100
+
+    def __init__(self, dimension=768, latency_ms=0.0, per_text_ms=0.0):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.per_text_ms = per_text_ms
+        self.name = f"fake:{dimension}"
+        self.requests = 0
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.md5(word.encode()).digest()[:8], "little")
+            vector[h % self.dimension] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_batch(self, texts):
+        self.requests += 1
+        if self.latency_ms or self.per_text_ms:
+            time.sleep((self.latency_ms + self.per_text_ms * len(texts)) / 1000)
+        return [self._embed(t) for t in texts]
+
+
+# ------------------ EMBEDDING CACHE ------------------
+class EmbeddingCache:
+    """
+    SQLite cache of vectors keyed by sha256(provider name + text), so a re-upload
+    of the same (or a slightly edited) document only embeds the changed chunks.
+    """
+
+    def __init__(self, path="embedding_cache.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def key(provider_name, text):
+        return hashlib.sha256(f"{provider_name}\n{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(keys), 500):   # stay under SQLite's bound-parameter limit
+                part = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                found.update((k, np.frombuffer(v, dtype=np.float32).tolist()) for k, v in rows)
+        return found
+
+    def set_many(self, items):
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items],
+            )
+
+
+# ------------------ BATCHED EMBEDDING ------------------
+class _Backoff:
+    """Shared across worker threads: a 429 on one batch pauses every batch"""
+
+    def __init__(self):
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        delay = self._pause_until - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.time() + seconds)
+
+
+def _embed_with_retry(provider, texts, backoff, max_retries, base_delay):
+    for attempt in range(max_retries + 1):
+        backoff.wait()
+        try:
+            vectors = provider.embed_batch(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(vectors)}")
+            return vectors
+        except Exception as e:
+            if attempt == max_retries:
+                print(f"❌ Embedding batch of {len(texts)} failed after {max_retries + 1} attempts: {e}")
+                return [None] * len(texts)
+            delay = base_delay * (2 ** attempt) * (0.5 + random.random())
+            if isinstance(e, RateLimitError):
+                delay = max(delay, e.retry_after or 0)
+                backoff.pause(delay)
+            print(f"⚠️ Embedding batch failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def embed_texts(texts, provider, cache=None, batch_size=None, max_workers=4, max_retries=4, base_delay=1.0):
+    """
+    Embed texts in batches of batch_size texts per request, max_workers requests in flight.
+    Duplicate and cached texts are not sent. Returns one vector per text, in order;
+    a text whose batch still fails after max_retries gets None.
+    """
+    batch_size = min(batch_size or provider.max_batch_size, provider.max_batch_size)
+    keys = [EmbeddingCache.key(provider.name, t) for t in texts]
+    vectors = cache.get_many(list(set(keys))) if cache is not None else {}
+
+    missing = list(dict.fromkeys(
+        (key, text) for key, text in zip(keys, texts) if key not in vectors
+    ))
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    backoff = _Backoff()
+
+    def run(batch):
+        result = _embed_with_retry(provider, [text for _, text in batch], backoff, max_retries, base_delay)
+        embedded = [(key, vec) for (key, _), vec in zip(batch, result) if vec is not None]
+        if cache is not None and embedded:
+            cache.set_many(embedded)
+        return embedded
+
+    if batches:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for embedded in executor.map(run, batches):
+                vectors.update(embedded)
+
+    print(f"✅ Embedded {len(missing)} new texts in {len(batches)} requests "
+          f"({len(texts) - len(missing)} cached or duplicate)")
+    return [vectors.get(key) for key in keys]
@@ -0,0 +1,208 @@
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+import uuid
+from collections import Counter
+
+# ------------------ HYBRID RETRIEVAL ------------------
+# Dense vectors miss exact terms (names, invoice numbers, "clause 4.2"), so every
+# namespace also gets a BM25 inverted index over the same chunk ids. The two
+# ranked lists are merged with reciprocal rank fusion and, optionally, reordered
+# by a cheap local reranker before the top_k chunks go to the LLM.
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "by", "and", "or", "is", "are", "was", "were",
+    "be", "it", "this", "that", "what", "which", "who", "how", "does", "do", "did", "with", "from",
+    "as", "at", "me", "tell", "about", "document", "give", "show", "can", "you", "i",
+}
+RRF_K = 60
+
+
+# ------------------ TOKENIZING ------------------
+def tokenize(text):
+    """
+    Lower-case terms. Identifiers like "INV-2041", "4.2.1" or "gpt-4" are kept
+    whole AND split into parts, so both "inv-2041" and "2041" match.
+    """
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+(?:[.\-_/][a-z0-9]+)*", str(text).lower()):
+        parts = re.split(r"[.\-_/]", token)
+        if len(parts) > 1:
+            tokens.append(token)
+        tokens.extend(p for p in parts if p and p not in STOPWORDS)
+    return tokens
+
+
+# ------------------ BM25 INDEX ------------------
+class _NamespaceIndex:
+    def __init__(self):
+        self.log = None      # file name of the append log written since this snapshot
+        self.ids = []
+        self.metadatas = []
+        self.doc_lens = []
+        self.postings = {}   # term -> {doc position: term frequency}
+
+    def add(self, ids, texts, metadatas):
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            pos = len(self.ids)
+            tokens = tokenize(text)
+            self.ids.append(doc_id)
+            self.metadatas.append(metadata)
+            self.doc_lens.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, {})[pos] = tf
+
+    def search(self, query, top_k, k1=1.5, b=0.75):
+        n_docs = len(self.ids)
+        if not n_docs:
+            return []
+        avg_len = sum(self.doc_lens) / n_docs or 1.0
+        scores = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for pos, tf in posting.items():
+                norm = k1 * (1 - b + b * self.doc_lens[pos] / avg_len)
+                scores[pos] = scores.get(pos, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [{"id": self.ids[pos], "score": score, "metadata": self.metadatas[pos]} for pos, score in best]
+
+
+class LexicalIndex:
+    """
+    Per-namespace BM25 indexes: a pickled snapshot <directory>/<namespace>.bm25
+    plus an append log of the batches added since, cached in memory. add() only
+    appends to the log, so adding batch by batch stays linear; compact() folds
+    the log into a new snapshot.
+    """
+
+    def __init__(self, directory="lexical_index"):
+        self.directory = directory
+        self._loaded = {}   # namespace -> [snapshot mtime, _NamespaceIndex, bytes of the log read]
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, namespace):
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_.-]", "_", namespace or "default") + ".bm25")
+
+    def _load(self, namespace):
+        """Snapshot plus every complete record of its log (call with the lock held)"""
+        path = self._path(namespace)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._loaded.get(namespace)
+        if not cached or cached[0] != mtime:
+            with open(path, "rb") as f:
+                cached = self._loaded[namespace] = [mtime, pickle.load(f), 0]
+        index = cached[1]
+        log = getattr(index, "log", None)
+        if log and os.path.exists(os.path.join(self.directory, log)):
+            with open(os.path.join(self.directory, log), "rb") as f:
+                f.seek(cached[2])
+                while True:
+                    try:
+                        ids, texts, metadatas = pickle.load(f)
+                    except (EOFError, pickle.UnpicklingError, ValueError):
+                        break   # end of the log, or a record another process is still writing
+                    index.add(ids, texts, metadatas)
+                    cached[2] = f.tell()
+        return index
+
+    def _write_snapshot(self, namespace, index):
+        index.log = f"{os.path.basename(self._path(namespace))}.{uuid.uuid4().hex[:8]}.log"
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(namespace))
+        self._loaded[namespace] = [os.stat(self._path(namespace)).st_mtime_ns, index, 0]
+
+    def add(self, namespace, ids, texts, metadatas):
+        with self._lock:
+            index = self._load(namespace)
+            if index is None or not getattr(index, "log", None):
+                index = index or _NamespaceIndex()
+                self._write_snapshot(namespace, index)
+            with open(os.path.join(self.directory, index.log), "ab") as f:
+                pickle.dump((list(ids), list(texts), list(metadatas)), f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._load(namespace)   # picks up the record just written
+
+    def compact(self, namespace):
+        """Fold the append log into a new snapshot"""
+        with self._lock:
+            index = self._load(namespace)
+            if index is None:
+                return
+            old_log = getattr(index, "log", None)
+            self._write_snapshot(namespace, index)
+            if old_log and os.path.exists(os.path.join(self.directory, old_log)):
+                os.remove(os.path.join(self.directory, old_log))
+
+    def search(self, namespace, query, top_k=20):
+        # under the lock: loading the log adds to the same postings search reads
+        with self._lock:
+            index = self._load(namespace)
+            return index.search(query, top_k) if index is not None else []
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            index = self._load(namespace)
+            self._loaded.pop(namespace, None)
+            if index is not None and getattr(index, "log", None):
+                log = os.path.join(self.directory, index.log)
+                if os.path.exists(log):
+                    os.remove(log)
+            if os.path.exists(self._path(namespace)):
+                os.remove(self._path(namespace))
+
+
+# ------------------ FUSION + RERANK ------------------
+def reciprocal_rank_fusion(result_lists, k=RRF_K):
+    """Merge ranked match lists: score = sum of 1 / (k + rank) over the lists a chunk appears in"""
+    fused, by_id = {}, {}
+    for results in result_lists:
+        for rank, match in enumerate(results, start=1):
+            fused[match["id"]] = fused.get(match["id"], 0.0) + 1.0 / (k + rank)
+            by_id.setdefault(match["id"], match)
+    order = sorted(fused, key=fused.get, reverse=True)
+    return [{**by_id[i], "score": fused[i]} for i in order]
+
+
+def overlap_rerank(query, matches):
+    """
+    Cheap local reranker: fused score plus how much of the query the chunk
+    covers (distinct terms, rare identifiers, exact phrase).
+    """
+    query_terms = set(tokenize(query))
+    if not query_terms:
+        return matches
+    phrase = " ".join(re.findall(r"\w+", query.lower()))
+    top_score = max(m["score"] for m in matches) if matches else 1.0
+
+    def score(match):
+        text = match["metadata"].get("text", "")
+        terms = set(tokenize(text))
+        coverage = len(query_terms & terms) / len(query_terms)
+        identifiers = [t for t in query_terms if any(ch.isdigit() for ch in t)]
+        id_hit = sum(t in terms for t in identifiers) / len(identifiers) if identifiers else 0.0
+        exact = 1.0 if phrase and phrase in " ".join(re.findall(r"\w+", text.lower())) else 0.0
+        return match["score"] / top_score + coverage + 0.5 * id_hit + 0.5 * exact
+
+    return sorted(matches, key=score, reverse=True)
+
+
+def hybrid_search(query, query_vector, vector_store, lexical_index, namespace, top_k=6,
+                  candidates=20, rerank=True):
+    """Dense + BM25 candidates, fused with RRF, optionally reranked; best top_k matches"""
+    dense = vector_store.query(namespace, query_vector, top_k=candidates) if query_vector is not None else []
+    lexical = lexical_index.search(namespace, query, top_k=candidates)
+    fused = reciprocal_rank_fusion([dense, lexical])
+    if rerank:
+        fused = overlap_rerank(query, fused)
+    return fused[:top_k]
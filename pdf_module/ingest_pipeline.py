@@ -0,0 +1,220 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.schema import Document
+
+from .updated_chatwithpdf import compact_namespace, get_gemini_embeddings, store_vectors
+
+# ------------------ STREAMING INGEST ------------------
+# extract (process pool, page ranges) -> chunk (per page, as pages arrive)
+#   -> embed (EMBED_WORKERS threads) -> upsert (one thread)
+# Stages are joined by bounded queues, so a 500-page PDF never sits fully in
+# memory and the first chunks are queryable while later pages are still parsed.
+# Every batch is appended to the vector and BM25 indexes as soon as it is
+# embedded (searchable right away); the local indexes are compacted once at the end.
+
+PAGES_PER_TASK = 8           # pages one extraction task handles
+EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+MIN_PAGES_FOR_POOL = 16      # smaller PDFs are cheaper to read in-process
+EMBED_BATCH_SIZE = 100       # chunks per embedding request / upsert
+EMBED_WORKERS = 4
+QUEUE_SIZE = 8               # batches buffered between stages
+
+_DONE = object()
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+
+def _get_extract_pool():
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _extract_pool
+
+
+# ------------------ EXTRACT ------------------
+def _extract_pdf_range(file_path, start, end):
+    """Runs in a worker process: [(page number, text)] for pages start..end-1"""
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        return [(i + 1, pdf.pages[i].extract_text() or "") for i in range(start, min(end, len(pdf.pages)))]
+
+
+def iter_pages(file_path):
+    """Yield (page number or None, text) in page order, extracting ahead in the process pool"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".docx":
+        from docx import Document as DocxDocument
+        doc = DocxDocument(file_path)
+        yield None, "\n".join(para.text for para in doc.paragraphs if para.text.strip())
+        return
+    if ext != ".pdf":
+        print(f"❌ Unsupported file type: {file_path}")
+        return
+
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        n_pages = len(pdf.pages)
+    ranges = [(s, s + PAGES_PER_TASK) for s in range(0, n_pages, PAGES_PER_TASK)]
+
+    if n_pages < MIN_PAGES_FOR_POOL:
+        for start, end in ranges:
+            yield from _extract_pdf_range(file_path, start, end)
+        return
+
+    # Keep at most 2 tasks per worker in flight; yield in page order
+    pool = _get_extract_pool()
+    pending = []
+    for start, end in ranges:
+        pending.append(pool.submit(_extract_pdf_range, file_path, start, end))
+        if len(pending) >= 2 * EXTRACT_WORKERS:
+            yield from pending.pop(0).result()
+    for future in pending:
+        yield from future.result()
+
+
+# ------------------ METRICS ------------------
+class StageTimings:
+    """Busy seconds per stage plus time to the first stored chunk and total wall time"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.busy = {"extract": 0.0, "chunk": 0.0, "embed": 0.0, "upsert": 0.0}
+        self.first_queryable = None
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.busy[stage] += seconds
+
+    def mark_queryable(self):
+        with self._lock:
+            if self.first_queryable is None:
+                self.first_queryable = time.perf_counter() - self.started
+
+    def summary(self, **counts):
+        result = {f"{stage}_seconds": round(s, 3) for stage, s in self.busy.items()}
+        result["time_to_first_chunk_seconds"] = round(self.first_queryable, 3) if self.first_queryable else None
+        result["total_seconds"] = round(time.perf_counter() - self.started, 3)
+        result.update(counts)
+        return result
+
+
+# ------------------ PIPELINE ------------------
+def ingest_document(file_path, namespace, index_name, chunk_size=1000, chunk_overlap=100):
+    """
+    Extract, chunk, embed and store one PDF/DOCX. Returns stage timings and counts
+    (pages, chunks, stored, failed).
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ".", " ", ""]
+    )
+    timings = StageTimings()
+    counts = {"pages": 0, "chunks": 0, "stored": 0, "failed": 0}
+    chunk_q = queue.Queue(QUEUE_SIZE)
+    store_q = queue.Queue(QUEUE_SIZE)
+    errors = []
+
+    def produce():
+        """extract + chunk; pushes batches of chunks"""
+        try:
+            batch = []
+            pages = iter_pages(file_path)
+            while True:
+                start = time.perf_counter()
+                page = next(pages, None)
+                timings.add("extract", time.perf_counter() - start)
+                if page is None:
+                    break
+                page_no, text = page
+                counts["pages"] += 1
+                if not text:
+                    continue
+                start = time.perf_counter()
+                metadata = {"source": file_path} if page_no is None else {"page": page_no, "source": file_path}
+                batch.extend(splitter.split_documents([Document(page_content=text, metadata=metadata)]))
+                timings.add("chunk", time.perf_counter() - start)
+                while len(batch) >= EMBED_BATCH_SIZE:
+                    chunk_q.put(batch[:EMBED_BATCH_SIZE])
+                    batch = batch[EMBED_BATCH_SIZE:]
+            if batch:
+                chunk_q.put(batch)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for _ in range(EMBED_WORKERS):
+                chunk_q.put(_DONE)
+
+    def embed():
+        try:
+            while True:
+                batch = chunk_q.get()
+                if batch is _DONE:
+                    break
+                if errors:
+                    continue   # drain so the producer never blocks
+                start = time.perf_counter()
+                embeddings = get_gemini_embeddings([doc.page_content for doc in batch], max_workers=1)
+                timings.add("embed", time.perf_counter() - start)
+                store_q.put((batch, embeddings))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            store_q.put(_DONE)
+
+    def upsert():
+        finished = 0
+        while finished < EMBED_WORKERS:
+            item = store_q.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            if errors:
+                continue
+            batch, embeddings = item
+            try:
+                start = time.perf_counter()
+                store_vectors(batch, embeddings, namespace=namespace, index_name=index_name,
+                              batch_size=EMBED_BATCH_SIZE, compact=False)
+                timings.add("upsert", time.perf_counter() - start)
+            except Exception as e:
+                errors.append(e)
+                continue
+            # dense and BM25 entries of this batch are both searchable now
+            timings.mark_queryable()
+            stored = sum(e is not None for e in embeddings)
+            counts["chunks"] += len(batch)
+            counts["stored"] += stored
+            counts["failed"] += len(batch) - stored
+
+        if errors or not counts["chunks"]:
+            return
+        try:
+            start = time.perf_counter()
+            compact_namespace(namespace, index_name)
+            timings.add("upsert", time.perf_counter() - start)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [threading.Thread(target=embed, daemon=True) for _ in range(EMBED_WORKERS)]
+    threads.append(threading.Thread(target=upsert, daemon=True))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+
+    stats = timings.summary(**counts)
+    print("✅ Ingest timings:", stats)
+    return stats
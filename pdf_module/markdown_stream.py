@@ -0,0 +1,49 @@
+import markdown
+
+# ------------------ INCREMENTAL MARKDOWN ------------------
+# Streaming answers arrive a few characters at a time. Re-rendering the whole
+# text on every token is quadratic, so only finished blocks (up to the last
+# blank line outside a ``` fence) are rendered, once; the unfinished tail is
+# shown as plain text until its block completes. Blocks are joined with the
+# newline markdown puts between them, so the pieces add up to markdown(full text).
+
+
+class IncrementalMarkdown:
+    def __init__(self):
+        self._pending = ""
+        self._rendered = False   # a block was emitted already (the next one needs a separator)
+
+    def _cut(self):
+        """End of the last complete block in the pending text (0 if none)"""
+        cut, fences, pos = 0, 0, 0
+        while True:
+            blank = self._pending.find("\n\n", pos)
+            if blank == -1:
+                return cut
+            fences += self._pending.count("```", pos, blank)
+            if fences % 2 == 0:
+                cut = blank + 2
+            pos = blank + 2
+
+    def feed(self, delta):
+        """Add a token; returns (html for newly finished blocks, unfinished raw tail)"""
+        self._pending += delta
+        cut = self._cut()
+        if not cut:
+            return "", self._pending
+        block, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._render(block), self._pending
+
+    def finish(self):
+        """HTML for whatever is left once the stream ends"""
+        block, self._pending = self._pending, ""
+        return self._render(block)
+
+    def _render(self, block):
+        html = markdown.markdown(block)
+        if not html:
+            return ""
+        if self._rendered:
+            html = "\n" + html
+        self._rendered = True
+        return html
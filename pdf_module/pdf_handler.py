@@ -1,20 +1,26 @@
 import os
 import uuid
 import markdown
-from .updated_chatwithpdf import (
-    load_and_chunk_documents,
-    get_gemini_embeddings,
-    store_in_pinecone,
-    run_rag_pipeline
-)
 
-INDEX_NAME = "llm-chatbot"   # same as in your code
+from tracing import span
+from .updated_chatwithpdf import run_rag_pipeline
+from .ingest_pipeline import ingest_document
+from .markdown_stream import IncrementalMarkdown
+
+# Where chunk embeddings live: a Pinecone index name, or "local:<directory>" for
+# the in-process NumPy store (no network round trip per question, persisted on disk)
+INDEX_NAME = os.getenv("PDF_INDEX_NAME", "llm-chatbot")   # same as in your code
+
+# Retrieval: chunks sent to the LLM, dense + BM25 fusion, local reranking
+RAG_TOP_K = 6
+RAG_HYBRID = True
+RAG_RERANK = True
 
 
 def process_pdf_file(file_storage, upload_folder="uploads"):
     """
-    Save PDF/DOC file, chunk it, embed it, store in Pinecone.
-    Returns a namespace ID used for future queries.
+    Save PDF/DOC file, chunk it, embed it, store it in the vector index.
+    Returns a namespace ID used for future queries, plus per-stage ingest timings.
     """
     os.makedirs(upload_folder, exist_ok=True)
     file_path = os.path.join(upload_folder, file_storage.filename)
@@ -23,34 +29,47 @@ def process_pdf_file(file_storage, upload_folder="uploads"):
     # Use a random namespace so each upload is isolated
     namespace = str(uuid.uuid4())
 
-    # 1) Chunk
-    chunks = load_and_chunk_documents([file_path])
-    texts = [doc.page_content for doc in chunks]
-
-    # 2) Embeddings
-    embeddings = get_gemini_embeddings(texts, max_workers=8)
-
-    # 3) Store in Pinecone
-    store_in_pinecone(
-        chunks,
-        embeddings,
-        namespace=namespace,
-        index_name=INDEX_NAME,
-        batch_size=100,
-    )
+    # Extract (process pool) -> chunk -> embed -> store, streamed page by page
+    with span("ingest") as s:
+        stats = ingest_document(file_path, namespace, INDEX_NAME)
+        s.set(pages=stats["pages"], chunks=stats["chunks"], bytes=os.path.getsize(file_path))
+    failed = stats["failed"]
 
     print("✅ PDF/DOC processed, namespace:", namespace)
+    message = "PDF/DOC uploaded and processed successfully! Document module activated."
+    if failed:
+        message += f" ({failed} of {stats['chunks']} chunks could not be embedded and were skipped.)"
     return {
-        "message": "PDF/DOC uploaded and processed successfully! Document module activated.",
+        "message": message,
         "namespace": namespace,
+        "ingest_stats": stats,
     }
 
 
-def answer_pdf_question(query, namespace):
+def answer_pdf_question(query, namespace, progress=None, top_k=None, on_token=None):
     """
     Use RAG pipeline to answer from the uploaded document.
     Always returns text.
+    progress(stage) is called before the answer is generated (used by background chat jobs).
+    top_k overrides RAG_TOP_K for this question.
+    on_token(delta, html, tail) streams the answer: html is markdown for blocks
+    that just finished, tail the raw text of the block still being written.
     """
-    response = run_rag_pipeline(query, namespace=namespace, index_name=INDEX_NAME)
+    if progress:
+        progress("searching document")
+
+    stream = None
+    if on_token is not None:
+        renderer = IncrementalMarkdown()
+
+        def stream(delta):
+            html, tail = renderer.feed(delta)
+            on_token(delta, html, tail)
+
+    response = run_rag_pipeline(query, namespace=namespace, index_name=INDEX_NAME,
+                                top_k=top_k or RAG_TOP_K, hybrid=RAG_HYBRID, rerank=RAG_RERANK,
+                                on_token=stream)
+    if on_token is not None:
+        on_token("", renderer.finish(), "")
     nl_answer = markdown.markdown(response)
     return {"type": "text", "content": nl_answer}
@@ -1,14 +1,17 @@
 import os
 import uuid
+import threading
 import pdfplumber
 from docx import Document as DocxDocument  # ✅ New import for .docx
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
-import google.generativeai as genai
-from langchain_google_genai import ChatGoogleGenerativeAI
-from pinecone import Pinecone, ServerlessSpec
+import llm_provider
+from llm_provider import get_llm
+from tracing import span
+from .vector_store import open_vector_store
+from .embeddings import GeminiEmbeddingProvider, FakeEmbeddingProvider, EmbeddingCache, embed_texts
+from .hybrid_search import LexicalIndex, hybrid_search
 
 # Load environment variables
 load_dotenv()
@@ -16,10 +19,15 @@ load_dotenv()
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-# Configure APIs
-pc = Pinecone(api_key=PINECONE_API_KEY)
-genai.configure(api_key=GOOGLE_API_KEY)
-embedding_model = genai.embed_content
+# Configure APIs (the Pinecone client is only created if a Pinecone index is used)
+llm_provider.configure(GOOGLE_API_KEY)
+
+# "gemini", or "fake" for offline runs (deterministic hashed bag-of-words vectors)
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini")
+# Chunk embeddings are cached on disk by content hash; set to None to disable
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite")
+# Per-namespace BM25 indexes used next to the vector index for hybrid retrieval
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", "lexical_index")
 
 
 # -------------------- Load and Chunk Documents --------------------
@@ -58,63 +66,124 @@ def load_and_chunk_documents(file_paths, chunk_size=1000, chunk_overlap=100):
 
 
 # -------------------- Remaining Code (unchanged) --------------------
-def get_gemini_embedding(text, model="models/text-embedding-004", task_type="retrieval_document"):
-    try:
-        res = embedding_model(model=model, content=text, task_type=task_type, title="chunk")
-        return res["embedding"]
-    except Exception as e:
-        print(f"Embedding failed for a chunk: {e}")
-        return None
+def _embedding_provider(model, task_type):
+    if EMBEDDING_PROVIDER == "fake":
+        return FakeEmbeddingProvider()
+    return GeminiEmbeddingProvider(model, task_type)
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
 
 
-def get_gemini_embeddings(texts, model="models/text-embedding-004", task_type="retrieval_document", max_workers=4):
-    embeddings = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(get_gemini_embedding, txt, model, task_type) for txt in texts]
-        for future in futures:
-            embeddings.append(future.result())
-    return embeddings
-
-
-def store_in_pinecone(chunks, embeddings, namespace="default", index_name="conversational-bi-index-2", dimension=768, batch_size=100):
-    if index_name not in pc.list_indexes().names():
-        print(f"Index '{index_name}' not found. Creating new index...")
-        pc.create_index(
-            name=index_name,
-            dimension=dimension,
-            metric="cosine",
-            spec=ServerlessSpec(cloud="aws", region="us-east-1")
-        )
-        print(f"✅ Index '{index_name}' created successfully!")
-
-    index = pc.Index(index_name)
-    to_upsert = []
+def get_embedding_cache():
+    global _embedding_cache
+    if EMBEDDING_CACHE_PATH is None:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
+        return _embedding_cache
+
+
+_lexical_index = None
+
+
+def get_lexical_index():
+    global _lexical_index
+    with _embedding_cache_lock:
+        if _lexical_index is None:
+            _lexical_index = LexicalIndex(LEXICAL_INDEX_DIR)
+        return _lexical_index
+
+
+def get_gemini_embeddings(texts, model="models/text-embedding-004", task_type="retrieval_document", max_workers=4,
+                          use_cache=True):
+    """
+    Batched (up to 100 texts per request), retried and cached; None only for texts that kept failing.
+    use_cache=False skips the disk cache (one-off texts such as questions).
+    """
+    provider = _embedding_provider(model, task_type)
+    with span("embedding", texts=len(texts), bytes=sum(len(t) for t in texts)):
+        cache = get_embedding_cache() if use_cache else None
+        return embed_texts(texts, provider, cache=cache, max_workers=max_workers)
+
+
+def store_vectors(chunks, embeddings, namespace="default", index_name="conversational-bi-index-2", dimension=768,
+                  batch_size=100, compact=True):
+    """
+    Store chunk embeddings in index_name (a Pinecone index, or "local:<dir>" for the
+    in-process store) and every chunk's text in the namespace's BM25 index.
+    Both are appended to; compact=False leaves the local indexes' appended
+    segments for a later compact_namespace() (callers storing a document batch by batch).
+    """
+    store = open_vector_store(index_name, dimension)
+    ids, vectors, metadatas = [], [], []
+    lexical_ids, lexical_texts, lexical_metadatas = [], [], []
+
+    def flush():
+        store.append(namespace, ids, vectors, metadatas)
+        print(f"✅ Stored {len(ids)} vectors in index '{index_name}' under namespace '{namespace}'")
+        ids.clear()
+        vectors.clear()
+        metadatas.clear()
+
     for doc, embed in zip(chunks, embeddings):
+        chunk_id = str(uuid.uuid4())
+        metadata = {"text": doc.page_content, "page": doc.metadata.get("page", 0)}
+        # chunks whose embedding failed are still findable by keyword
+        lexical_ids.append(chunk_id)
+        lexical_texts.append(doc.page_content)
+        lexical_metadatas.append(metadata)
         if embed is not None:
-            vector = {
-                "id": str(uuid.uuid4()),
-                "values": embed,
-                "metadata": {"text": doc.page_content, "page": doc.metadata.get("page", 0)}
-            }
-            to_upsert.append(vector)
-            if len(to_upsert) >= batch_size:
-                index.upsert(vectors=to_upsert, namespace=namespace)
-                print(f"✅ Stored {len(to_upsert)} vectors in index '{index_name}' under namespace '{namespace}'")
-                to_upsert = []
-
-    if to_upsert:
-        index.upsert(vectors=to_upsert, namespace=namespace)
-        print(f"✅ Stored {len(to_upsert)} vectors in index '{index_name}' under namespace '{namespace}'")
+            ids.append(chunk_id)
+            vectors.append(embed)
+            metadatas.append(metadata)
+            if len(ids) >= batch_size:
+                flush()
+
+    if ids:
+        flush()
+    if lexical_ids:
+        get_lexical_index().add(namespace, lexical_ids, lexical_texts, lexical_metadatas)
+    if compact:
+        compact_namespace(namespace, index_name, dimension)
+
+
+def compact_namespace(namespace, index_name="conversational-bi-index-2", dimension=768):
+    """Merge what was appended to the namespace's vector and BM25 indexes (one rewrite each)"""
+    open_vector_store(index_name, dimension).compact(namespace)
+    get_lexical_index().compact(namespace)
+
+
+def retrieve_chunks(query, top_k=6, namespace="default", index_name="llm-chatbot", hybrid=True, rerank=True, candidates=20):
+    """
+    Texts of the top_k chunks for query. hybrid=True fuses the dense results with
+    the namespace's BM25 results (RRF), rerank=True reorders them by query overlap.
+    If the query cannot be embedded, only the BM25 results are used.
+    """
+    store = open_vector_store(index_name)
+    # questions are embedded as queries and not cached: they rarely repeat
+    query_embedding = get_gemini_embeddings([query], task_type="retrieval_query", use_cache=False)[0]
+    if query_embedding is None:
+        print("⚠️ Query embedding failed, falling back to keyword (BM25) search")
+    with span("retrieval") as s:
+        if hybrid or query_embedding is None:
+            matches = hybrid_search(query, query_embedding, store, get_lexical_index(), namespace,
+                                    top_k=top_k, candidates=max(candidates, top_k), rerank=rerank)
+        else:
+            matches = store.query(namespace, query_embedding, top_k=top_k)
+        texts = [match['metadata']['text'] for match in matches]
+        s.set(chunks=len(texts), bytes=sum(len(t) for t in texts))
+    return texts
 
 
-def retrieve_from_pinecone(query, top_k=6, namespace="default", index_name="llm-chatbot"):
-    index = pc.Index(index_name)
-    query_embedding = get_gemini_embeddings([query])[0]
-    results = index.query(vector=query_embedding, top_k=top_k, include_metadata=True, namespace=namespace)
-    return [match['metadata']['text'] for match in results['matches']]
+# old names, kept for existing callers
+store_in_pinecone = store_vectors
+retrieve_from_pinecone = retrieve_chunks
 
 
-def generate_response(question, context_chunks):
+def _rag_prompt(question, context_chunks):
     context = "\n\n".join(context_chunks)
     prompt_template = """
     You are a knowledgeable AI assistant. Answer the following question in detail, providing thorough explanations, examples, and key insights.
@@ -130,16 +199,42 @@ Provide a well-structured and comprehensive response in natural language. Use bu
 Base your answer strictly on the provided CONTEXT and if the answer is not found in the CONTEXT, 
 reply with "I couldn't find the answer in the provided document.
         """
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.2, max_output_tokens=512)
-    return llm.invoke(prompt_template.format(context=context, question=question)).content
+    return prompt_template.format(context=context, question=question)
+
+
+def _llm():
+    """Shared answer client (one per process, reused across requests)"""
+    return get_llm("gemini-2.0-flash", GOOGLE_API_KEY, temperature=0.2, max_output_tokens=512)
+
+
+def generate_response(question, context_chunks):
+    return _llm().generate(_rag_prompt(question, context_chunks))
+
+
+def stream_response(question, context_chunks):
+    """Same answer as generate_response, yielded piece by piece as the LLM produces it"""
+    yield from _llm().stream(_rag_prompt(question, context_chunks))
 
 
-def run_rag_pipeline(query, namespace="default", index_name="llm-chatbot"):
-    retrieved = retrieve_from_pinecone(query, namespace=namespace, index_name=index_name)
+def run_rag_pipeline(query, namespace="default", index_name="llm-chatbot", top_k=6, hybrid=True, rerank=True, on_token=None):
+    """
+    Retrieve context and answer. With on_token, the answer is streamed:
+    on_token(text) is called for every piece, and the full text is still returned.
+    """
+    retrieved = retrieve_chunks(query, top_k=top_k, namespace=namespace, index_name=index_name,
+                                hybrid=hybrid, rerank=rerank)
     print(f"Retrieved {len(retrieved)} chunks for query: '{query}'")
     if len(retrieved) > 0:
         print("Sample context snippet:", retrieved[0][:200])
     else:
-        print("⚠️ No relevant chunks found in Pinecone for this query.")
-    response=generate_response(query, retrieved)
-    return response
+        print(f"⚠️ No relevant chunks found in '{index_name}' for this query.")
+    with span("generation"):
+        if on_token is None:
+            response=generate_response(query, retrieved)
+            return response
+
+        pieces = []
+        for piece in stream_response(query, retrieved):
+            pieces.append(piece)
+            on_token(piece)
+        return "".join(pieces)
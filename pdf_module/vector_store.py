@@ -0,0 +1,348 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+# ------------------ VECTOR STORES ------------------
+# Both backends expose the same calls:
+#   upsert(namespace, ids, vectors, metadatas)
+#   append(namespace, ids, vectors, metadatas)   new ids only; cheap on the local store
+#   compact(namespace)                            merge appended segments (no-op on Pinecone)
+#   query(namespace, vector, top_k)   -> [{"id", "score", "metadata"}], best first
+#   delete_namespace(namespace)
+# open_vector_store(index_name) picks one: "local:<directory>" is the in-process
+# NumPy store, anything else is the name of a Pinecone index.
+
+LOCAL_PREFIX = "local:"
+
+
+class PineconeVectorStore:
+    """Pinecone serverless index. The client is imported and created on first use."""
+
+    def __init__(self, index_name, dimension=768, api_key=None, cloud="aws", region="us-east-1"):
+        self.index_name = index_name
+        self.dimension = dimension
+        self.api_key = api_key or os.getenv("PINECONE_API_KEY")
+        self.cloud = cloud
+        self.region = region
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _get_index(self):
+        with self._lock:
+            if self._index is None:
+                from pinecone import Pinecone, ServerlessSpec
+                pc = Pinecone(api_key=self.api_key)
+                # checked once per process instead of on every upload
+                if self.index_name not in pc.list_indexes().names():
+                    print(f"Index '{self.index_name}' not found. Creating new index...")
+                    pc.create_index(
+                        name=self.index_name,
+                        dimension=self.dimension,
+                        metric="cosine",
+                        spec=ServerlessSpec(cloud=self.cloud, region=self.region)
+                    )
+                    print(f"✅ Index '{self.index_name}' created successfully!")
+                self._index = pc.Index(self.index_name)
+            return self._index
+
+    def upsert(self, namespace, ids, vectors, metadatas):
+        vectors = [
+            {"id": i, "values": list(map(float, v)), "metadata": m}
+            for i, v, m in zip(ids, vectors, metadatas)
+        ]
+        self._get_index().upsert(vectors=vectors, namespace=namespace)
+
+    def append(self, namespace, ids, vectors, metadatas):
+        self.upsert(namespace, ids, vectors, metadatas)
+
+    def compact(self, namespace):
+        pass
+
+    def query(self, namespace, vector, top_k=6):
+        results = self._get_index().query(
+            vector=list(map(float, vector)), top_k=top_k, include_metadata=True, namespace=namespace
+        )
+        return [{"id": m["id"], "score": m["score"], "metadata": m["metadata"]} for m in results["matches"]]
+
+    def delete_namespace(self, namespace):
+        self._get_index().delete(delete_all=True, namespace=namespace)
+
+
+# ------------------ LOCAL STORE ------------------
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores, best first, without sorting everything"""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def train_ivf(vectors, n_lists, iterations=10, sample_size=20000, seed=0):
+    """
+    Spherical k-means over (a sample of) the normalized vectors.
+    Returns (centroids, assignment of every vector to its nearest centroid).
+    """
+    rng = np.random.default_rng(seed)
+    sample = vectors if len(vectors) <= sample_size else vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        lists, starts = np.unique(assign[order], return_index=True)
+        centroids[lists] = _normalize(np.add.reduceat(sample[order], starts, axis=0))
+
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), 50000):
+        block = vectors[start:start + 50000]
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return centroids, assign
+
+
+def _segment_names(path):
+    """Appended segments of a version directory, in order: seg-1, seg-2, ..."""
+    numbers = sorted(int(name[4:-4]) for name in os.listdir(path) if re.fullmatch(r"seg-\d+\.npy", name))
+    return [f"seg-{n}" for n in numbers]
+
+
+class _Namespace:
+    """
+    One loaded namespace: memory-mapped vectors, ids/metadata, optional IVF
+    lists over the base vectors, plus segments appended since the last rewrite
+    (searched exactly).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.ids = list(meta["ids"])
+        self.metadatas = list(meta["metadatas"])
+        self.segments = []
+        for name in _segment_names(path):
+            self.segments.append(np.load(os.path.join(path, name + ".npy"), mmap_mode="r"))
+            with open(os.path.join(path, name + ".json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.ids.extend(meta["ids"])
+            self.metadatas.extend(meta["metadatas"])
+        self.centroids = self.offsets = None
+        ivf_path = os.path.join(path, "ivf.npz")
+        if os.path.exists(ivf_path):
+            ivf = np.load(ivf_path)
+            self.centroids, self.offsets = ivf["centroids"], ivf["offsets"]
+
+    def all_vectors(self):
+        """Base and appended vectors as one array, in ids order"""
+        if not self.segments:
+            return np.asarray(self.vectors)
+        return np.concatenate([np.asarray(self.vectors)] + [np.asarray(seg) for seg in self.segments])
+
+    def search(self, query, top_k, n_probe=None):
+        """Best top_k rows as (indices, scores)"""
+        idx, scores = self._search_base(query, top_k, n_probe)
+        offset = len(self.vectors)
+        for seg in self.segments:
+            seg_scores = np.asarray(seg @ query)
+            best = _top_k(seg_scores, top_k)
+            idx, scores = np.concatenate([idx, best + offset]), np.concatenate([scores, seg_scores[best]])
+            offset += len(seg)
+        if self.segments:
+            best = _top_k(scores, top_k)
+            idx, scores = idx[best], scores[best]
+        return idx, scores
+
+    def _search_base(self, query, top_k, n_probe):
+        if self.centroids is None or n_probe is None:
+            scores = np.asarray(self.vectors @ query)
+            best = _top_k(scores, top_k)
+            return best, scores[best]
+        # IVF: vectors are stored grouped by list, so each probed list is one contiguous slice
+        lists = _top_k(self.centroids @ query, n_probe)
+        ranges = [np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists]
+        candidates = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+        candidate_scores = np.asarray(self.vectors[candidates] @ query) if len(candidates) else np.empty(0)
+        best = _top_k(candidate_scores, top_k)
+        return candidates[best], candidate_scores[best]
+
+
+class LocalVectorStore:
+    """
+    In-process vector store: one directory per namespace holding a float32
+    matrix of normalized vectors (searched through a memory map) and the
+    ids/metadata. Exact cosine top-k by default; namespaces with at least
+    ivf_min_vectors vectors also get an IVF index (k-means lists) that is
+    used when n_probe is set.
+
+    Every write creates a new version directory and flips a CURRENT pointer, so
+    readers in other processes never see half-written files. append() only
+    writes the new rows as a segment (earlier files are hard-linked into the
+    new version), so ingesting batch by batch stays linear; compact() folds
+    the segments back into one matrix and retrains IVF.
+    """
+
+    def __init__(self, directory="vector_index", dimension=768, ivf_min_vectors=20000, n_probe=None):
+        self.directory = directory
+        self.dimension = dimension
+        self.ivf_min_vectors = ivf_min_vectors
+        self.n_probe = n_probe
+        self._loaded = {}   # namespace -> (version, _Namespace)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _ns_dir(self, namespace):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace or "default")
+        return os.path.join(self.directory, safe)
+
+    def _current_version(self, namespace):
+        try:
+            with open(os.path.join(self._ns_dir(namespace), "CURRENT"), "r") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _load(self, namespace):
+        version = self._current_version(namespace)
+        if version is None:
+            return None
+        with self._lock:
+            cached = self._loaded.get(namespace)
+            if cached and cached[0] == version:
+                return cached[1]
+            ns = _Namespace(os.path.join(self._ns_dir(namespace), version))
+            self._loaded[namespace] = (version, ns)
+            return ns
+
+    def count(self, namespace):
+        ns = self._load(namespace)
+        return 0 if ns is None else len(ns.ids)
+
+    def upsert(self, namespace, ids, vectors, metadatas):
+        with self._write_lock:
+            self._upsert(namespace, ids, vectors, metadatas)
+
+    def _upsert(self, namespace, ids, vectors, metadatas):
+        vectors = _normalize(vectors).reshape(-1, self.dimension)
+        ids, metadatas = list(ids), list(metadatas)
+
+        old = self._load(namespace)
+        if old is not None:
+            # replace existing ids, append new ones
+            new_ids = set(ids)
+            keep = [i for i, vid in enumerate(old.ids) if vid not in new_ids]
+            vectors = np.concatenate([old.all_vectors()[keep], vectors])
+            ids = [old.ids[i] for i in keep] + ids
+            metadatas = [old.metadatas[i] for i in keep] + metadatas
+
+        ivf = None
+        if len(vectors) >= self.ivf_min_vectors:
+            n_lists = int(np.sqrt(len(vectors)))
+            centroids, assign = train_ivf(vectors, n_lists)
+            order = np.argsort(assign, kind="stable")
+            vectors = vectors[order]
+            ids = [ids[i] for i in order]
+            metadatas = [metadatas[i] for i in order]
+            offsets = np.searchsorted(assign[order], np.arange(n_lists + 1))
+            ivf = {"centroids": centroids, "offsets": offsets}
+
+        version_dir = self._new_version(namespace)
+        np.save(os.path.join(version_dir, "vectors.npy"), vectors)
+        if ivf is not None:
+            np.savez(os.path.join(version_dir, "ivf.npz"), **ivf)
+        with open(os.path.join(version_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "metadatas": metadatas}, f)
+        self._publish(version_dir)
+
+    def append(self, namespace, ids, vectors, metadatas):
+        """Add rows with new ids as one more segment; nothing already stored is rewritten"""
+        with self._write_lock:
+            current = self._current_version(namespace)
+            if current is None:
+                self._upsert(namespace, ids, vectors, metadatas)
+                return
+            vectors = _normalize(vectors).reshape(-1, self.dimension)
+            current_dir = os.path.join(self._ns_dir(namespace), current)
+            version_dir = self._new_version(namespace)
+            for name in os.listdir(current_dir):
+                try:
+                    os.link(os.path.join(current_dir, name), os.path.join(version_dir, name))
+                except OSError:   # no hard links on this filesystem
+                    shutil.copy2(os.path.join(current_dir, name), os.path.join(version_dir, name))
+            segment = f"seg-{len(_segment_names(current_dir)) + 1}"
+            np.save(os.path.join(version_dir, segment + ".npy"), vectors)
+            with open(os.path.join(version_dir, segment + ".json"), "w", encoding="utf-8") as f:
+                json.dump({"ids": list(ids), "metadatas": list(metadatas)}, f)
+            self._publish(version_dir)
+
+    def compact(self, namespace):
+        """Rewrite a namespace with appended segments as one matrix (and IVF lists when large enough)"""
+        with self._write_lock:
+            current = self._current_version(namespace)
+            if current is None or not _segment_names(os.path.join(self._ns_dir(namespace), current)):
+                return
+            self._upsert(namespace, [], np.empty((0, self.dimension), dtype=np.float32), [])
+
+    def _new_version(self, namespace):
+        version_dir = os.path.join(self._ns_dir(namespace), f"v{time.time_ns()}-{uuid.uuid4().hex[:6]}")
+        os.makedirs(version_dir)
+        return version_dir
+
+    def _publish(self, version_dir):
+        """Point CURRENT at version_dir and drop the older versions"""
+        ns_dir, version = os.path.split(version_dir)
+        pointer = os.path.join(ns_dir, f".CURRENT-{version}")
+        with open(pointer, "w") as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(ns_dir, "CURRENT"))
+
+        # Old versions can go: open memory maps keep working on POSIX
+        for name in os.listdir(ns_dir):
+            if name.startswith("v") and name != version:
+                shutil.rmtree(os.path.join(ns_dir, name), ignore_errors=True)
+
+    def query(self, namespace, vector, top_k=6, n_probe=None):
+        ns = self._load(namespace)
+        if ns is None:
+            return []
+        query = _normalize(vector).reshape(self.dimension)
+        idx, scores = ns.search(query, top_k, n_probe if n_probe is not None else self.n_probe)
+        return [
+            {"id": ns.ids[i], "score": float(score), "metadata": ns.metadatas[i]}
+            for i, score in zip(idx, scores)
+        ]
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            self._loaded.pop(namespace, None)
+        shutil.rmtree(self._ns_dir(namespace), ignore_errors=True)
+
+
+# ------------------ FACTORY ------------------
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_vector_store(index_name, dimension=768, **options):
+    """One store object per index_name per process ("local:<dir>" or a Pinecone index name)"""
+    with _stores_lock:
+        store = _stores.get(index_name)
+        if store is None:
+            if index_name.startswith(LOCAL_PREFIX):
+                store = LocalVectorStore(index_name[len(LOCAL_PREFIX):] or "vector_index", dimension, **options)
+            else:
+                store = PineconeVectorStore(index_name, dimension, **options)
+            _stores[index_name] = store
+        return store
@@ -0,0 +1,178 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# ------------------ PER-USER CHAT SESSIONS ------------------
+# Each browser gets a random session id in Flask's signed session cookie; the
+# store keeps that user's active dataset / namespace and a bounded chat history.
+
+MAX_HISTORY = 50   # messages kept per session
+
+
+def new_session():
+    return {"mode": None, "namespace": None, "filename": None, "history": []}
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+def new_message(question):
+    """History entry; "bot" is filled in once the answer is ready"""
+    return {"id": uuid.uuid4().hex, "user": question, "bot": None}
+
+
+def set_message_answer(store, sid, message_id, answer):
+    """Attach an answer to one history entry (safe while other requests update the session)"""
+    def mutate(data):
+        for msg in data["history"]:
+            if msg["id"] == message_id:
+                msg["bot"] = answer
+    store.update(sid, mutate)
+
+
+def _trim(data):
+    if len(data["history"]) > MAX_HISTORY:
+        data["history"] = data["history"][-MAX_HISTORY:]
+    return data
+
+
+class InMemorySessionStore:
+    """LRU of sessions inside this process (single worker, or tests)"""
+
+    def __init__(self, max_sessions=1000):
+        self.max_sessions = max_sessions
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, sid):
+        with self._lock:
+            data = self._data.get(sid)
+            if data is None:
+                return new_session()
+            self._data.move_to_end(sid)
+            return json.loads(json.dumps(data))   # callers get their own copy
+
+    def save(self, sid, data):
+        with self._lock:
+            self._data[sid] = json.loads(json.dumps(_trim(data)))
+            self._data.move_to_end(sid)
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+
+    def update(self, sid, mutate):
+        """Atomically load, mutate(data) and save a session"""
+        with self._lock:
+            data = self.get(sid)
+            mutate(data)
+            self.save(sid, data)
+            return data
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite file, shared by every worker process on the host.
+    Sessions idle for longer than ttl_seconds are dropped.
+    """
+
+    def __init__(self, path="sessions.db", ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data TEXT, updated_at REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _read(self, conn, sid):
+        row = conn.execute("SELECT data, updated_at FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        if row is None or row[1] < time.time() - self.ttl_seconds:
+            return new_session()
+        return json.loads(row[0])
+
+    def _write(self, conn, sid, data):
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO sessions (sid, data, updated_at) VALUES (?, ?, ?)",
+                     (sid, json.dumps(_trim(data)), now))
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,))
+
+    def get(self, sid):
+        conn = self._connect()
+        try:
+            return self._read(conn, sid)
+        finally:
+            conn.close()
+
+    def save(self, sid, data):
+        conn = self._connect()
+        try:
+            self._write(conn, sid, data)
+        finally:
+            conn.close()
+
+    def update(self, sid, mutate):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")   # write lock across processes
+            data = self._read(conn, sid)
+            mutate(data)
+            self._write(conn, sid, data)
+            conn.execute("COMMIT")
+            return data
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+class RedisSessionStore:
+    """
+    Sessions in Redis (or anything with the same get/set/watch API), for
+    multi-host deployments. Pass a client, e.g. redis.Redis.from_url(...).
+    """
+
+    def __init__(self, client, ttl_seconds=7 * 24 * 3600, prefix="chat_session:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, sid):
+        raw = self.client.get(self.prefix + sid)
+        return json.loads(raw) if raw else new_session()
+
+    def save(self, sid, data):
+        self.client.set(self.prefix + sid, json.dumps(_trim(data)), ex=self.ttl_seconds)
+
+    def update(self, sid, mutate):
+        key = self.prefix + sid
+        while True:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(key)   # optimistic lock: retry if another worker wrote meanwhile
+                    raw = pipe.get(key)
+                    data = json.loads(raw) if raw else new_session()
+                    mutate(data)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(_trim(data)), ex=self.ttl_seconds)
+                    pipe.execute()
+                    return data
+                except Exception as e:
+                    if type(e).__name__ != "WatchError":
+                        raise
+
+
+def create_session_store(backend="memory", **options):
+    """Build a store from config: "memory", "sqlite" (path=...) or "redis" (url=...)"""
+    if backend == "memory":
+        return InMemorySessionStore(**options)
+    if backend == "sqlite":
+        return SQLiteSessionStore(**options)
+    if backend == "redis":
+        import redis
+        url = options.pop("url", "redis://localhost:6379/0")
+        return RedisSessionStore(redis.Redis.from_url(url), **options)
+    raise ValueError(f"Unknown session backend '{backend}'. Use memory, sqlite or redis.")
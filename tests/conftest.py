@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# modules import each other as top-level packages (llm_provider, mysql_module, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """fake_llm(reply, **options): every get_llm() client is a fake_llm.FakeLLM (no delays by default)"""
+    import llm_provider
+
+    def install(reply=None, **options):
+        monkeypatch.setattr(llm_provider, "LLM_PROVIDER", "fake")
+        monkeypatch.setattr(llm_provider, "_clients", {})
+        monkeypatch.setattr(llm_provider, "FAKE_OPTIONS",
+                            dict({"first_token_ms": 0, "tokens_per_second": 0, "reply": reply}, **options))
+    return install
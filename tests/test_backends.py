@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from mysql_module.backends import DuckDBBackend, MySQLBackend
+
+FRAME = pd.DataFrame({
+    "Season": [2017] * 3 + [2018] * 3,
+    "City": ["Pune", "Mumbai", "Pune", "Chennai", "Mumbai", "A much longer city name"],
+    "Win by Runs": [10, 0, 5, 7, 0, 3],
+    "Date": ["2017-04-05", "2017-04-06", None, "2018-04-07", "2018-04-08", "2018-04-09"],
+})
+
+
+@pytest.mark.parametrize("chunksize", [None, 3])
+def test_url_config_loads_through_the_production_loader(tmp_path, chunksize):
+    path = tmp_path / "matches.csv"
+    FRAME.to_csv(path, index=False)
+    backend = MySQLBackend({"url": f"sqlite:///{tmp_path / 'bi.sqlite'}"})
+
+    schema = backend.load_file(str(path), "matches", str(tmp_path / "schema.json"), chunksize=chunksize)
+
+    assert list(schema) == ["season", "city", "win_by_runs", "date"]
+    df = backend.run_sql("SELECT city, SUM(win_by_runs) AS runs FROM matches GROUP BY city ORDER BY city")
+    assert df["city"].tolist() == ["A much longer city name", "Chennai", "Mumbai", "Pune"]
+    assert df["runs"].tolist() == [3, 7, 0, 15]
+    latest = backend.run_sql("SELECT MAX(date) AS latest, COUNT(date) AS dated FROM matches")
+    assert latest.iloc[0].tolist() == ["2018-04-09 00:00:00", 5]
+
+
+def test_duckdb_backend_closes_its_cursors(tmp_path, monkeypatch):
+    path = tmp_path / "matches.csv"
+    FRAME.to_csv(path, index=False)
+    backend = DuckDBBackend(":memory:", load_mode="table")
+    opened = []
+    make_cursor = backend._cursor
+    monkeypatch.setattr(backend, "_cursor", lambda: opened.append(make_cursor()) or opened[-1])
+
+    backend.load_file(str(path), "matches", str(tmp_path / "schema.json"))
+    backend.estimate_rows("SELECT * FROM matches")
+    assert len(backend.run_sql("SELECT * FROM matches")) == 6
+
+    assert len(opened) == 3
+    for cursor in opened:
+        with pytest.raises(Exception, match="closed"):
+            cursor.execute("SELECT 1")
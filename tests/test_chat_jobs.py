@@ -0,0 +1,70 @@
+import json
+import threading
+
+from chat_jobs import JobManager, SQLiteJobStore, sse_format
+
+
+def _answer(question, progress, on_token=None, release=None):
+    progress("querying")
+    if release is not None:
+        release.wait(5)
+    if on_token is not None:
+        on_token("Hi", "", "Hi")
+        on_token("", "<p>Hi</p>", "")
+    return {"type": "text", "content": f"answer to {question}"}
+
+
+def _stages(events):
+    return [(e["status"], e["stage"]) for e in events if "token" not in e]
+
+
+def test_job_lifecycle_and_callbacks():
+    jobs, done = JobManager(max_workers=1), []
+    job_id = jobs.submit(_answer, "q1", on_done=done.append)
+    events = list(jobs.events(job_id, timeout=10))
+
+    assert _stages(events) == [("queued", "queued"), ("running", "started"), ("running", "querying"),
+                               ("done", "done"), ("done", "finished")]
+    assert done == [{"type": "text", "content": "answer to q1"}]
+    assert jobs.status(job_id)["result"] == done[0]
+    assert jobs.status("no-such-job") is None
+
+
+def test_failed_job_reports_the_error():
+    def broken(question, progress):
+        raise RuntimeError("LLM unavailable")
+
+    jobs, errors = JobManager(max_workers=1), []
+    job_id = jobs.submit(broken, "q", on_error=errors.append)
+    events = list(jobs.events(job_id, timeout=10))
+
+    assert events[-1]["status"] == "error" and events[-1]["error"] == "LLM unavailable"
+    assert [str(e) for e in errors] == ["LLM unavailable"]
+
+
+def test_other_worker_reads_status_and_events_from_the_shared_store(tmp_path):
+    store_path = str(tmp_path / "sessions.db")
+    accepting = JobManager(max_workers=1, store=SQLiteJobStore(store_path))
+    polling = JobManager(max_workers=1, store=SQLiteJobStore(store_path), poll_seconds=0.01)
+    release = threading.Event()
+
+    job_id = accepting.submit(_answer, "q2", stream=True, release=release)
+    streamed = []
+    reader = threading.Thread(target=lambda: streamed.extend(polling.events(job_id, timeout=10)))
+    reader.start()
+    release.set()
+    reader.join(10)
+
+    local = list(accepting.events(job_id, timeout=10))
+    assert streamed == local
+    assert [e["token"] for e in streamed if "token" in e] == ["Hi", ""]
+    assert polling.status(job_id) == accepting.status(job_id)
+    assert polling.status(job_id)["partial"] == "<p>Hi</p>"
+    assert polling.status("no-such-job") is None
+
+
+def test_sse_format_is_one_data_message():
+    message = sse_format({"stage": "done", "token": "a\nb"})
+    assert message.count("\n") == 2   # the newline in the token is escaped by json
+    assert message.startswith("data: ") and message.endswith("\n\n")
+    assert json.loads(message[len("data: "):]) == {"stage": "done", "token": "a\nb"}
@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+
+import pytest
+
+from mysql_module import db_pool, strtomysql
+
+MYSQL_CONFIG = {"host": "127.0.0.1", "user": "bi", "password": "p#ss", "database": "edi"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_pools(monkeypatch):
+    monkeypatch.setattr(db_pool, "POOL_OPTIONS", dict(db_pool.POOL_OPTIONS))
+    monkeypatch.setattr(db_pool, "_engines", {})
+    monkeypatch.setattr(db_pool, "_waits", {})
+
+
+def test_query_engine_never_allows_local_infile(monkeypatch):
+    created = []
+    real_create_engine = db_pool.create_engine
+    monkeypatch.setattr(db_pool, "create_engine",
+                        lambda url, **kwargs: created.append(kwargs["connect_args"]) or real_create_engine(url, **kwargs))
+
+    query_engine = db_pool.get_engine(MYSQL_CONFIG)
+    load_engine = db_pool.get_engine(MYSQL_CONFIG, local_infile=True)
+
+    assert created == [{"local_infile": False}, {"local_infile": True}]
+    assert load_engine is not query_engine
+    assert db_pool.get_engine(MYSQL_CONFIG) is query_engine
+
+
+@pytest.mark.parametrize("strategy, local_infile", [("executemany", False), ("load_data", True)])
+def test_only_load_data_uploads_get_local_infile(tmp_path, monkeypatch, strategy, local_infile):
+    class Connection:
+        def cursor(self):
+            return self
+
+        def execute(self, statement):
+            pass
+
+    borrowed = []
+
+    @contextmanager
+    def fake_raw_connection(db_config, local_infile=False):
+        borrowed.append(local_infile)
+        yield Connection()
+
+    monkeypatch.setattr(strtomysql, "pooled_raw_connection", fake_raw_connection)
+    monkeypatch.setitem(strtomysql.BULK_LOADERS, strategy, lambda conn, df, table_name, batch_size: None)
+    path = tmp_path / "teams.csv"
+    path.write_text("team,titles\nCSK,5\nMI,5\n")
+
+    strtomysql.upload_to_mysql(str(path), "teams", schema_file=str(tmp_path / "schema.json"),
+                               load_strategy=strategy, db_config=MYSQL_CONFIG)
+    assert borrowed == [local_infile]
+
+
+def test_pool_stats_count_checkouts(tmp_path):
+    db_config = {"url": f"sqlite:///{tmp_path / 'stats.sqlite'}"}
+    for _ in range(3):
+        with db_pool.pooled_connection(db_config) as conn:
+            conn.exec_driver_sql("SELECT 1")
+
+    [stats] = db_pool.get_pool_stats()
+    assert stats["database"] == db_config["url"]
+    assert stats["checkouts"] == 3
+    assert stats["checked_out"] == 0
+    assert stats["local_infile"] is False
+
+
+def test_configure_pool_disposes_and_rebuilds_engines(tmp_path, monkeypatch):
+    db_config = {"url": f"sqlite:///{tmp_path / 'pool.sqlite'}"}
+    old_engine = db_pool.get_engine(db_config)
+    disposed = []
+    monkeypatch.setattr(old_engine, "dispose", lambda: disposed.append(True))
+
+    db_pool.configure_pool(pool_size=2)
+
+    assert disposed == [True]
+    new_engine = db_pool.get_engine(db_config)
+    assert new_engine is not old_engine
+    assert new_engine.pool.size() == 2
+    with pytest.raises(ValueError, match="pool_sise"):
+        db_pool.configure_pool(pool_sise=3)
@@ -0,0 +1,72 @@
+import pytest
+
+from mysql_module.index_advisor import rewrite_for_rollup
+
+ROLLUP = {"name": "rollup_matches_1", "table": "matches", "dims": ["season", "winningteam"], "columns": ["margin"]}
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT season, city, COUNT(*) AS n FROM matches GROUP BY season",
+    "SELECT season, COUNT(*) AS n FROM matches GROUP BY season ORDER BY city",
+    "SELECT season, COUNT(*) AS n FROM matches GROUP BY season HAVING MAX(venue) > 'A'",
+    "SELECT season, SUM(margin) AS m FROM matches WHERE city = 'Pune' GROUP BY season",
+])
+def test_columns_missing_from_the_rollup_are_not_rewritten(sql):
+    assert rewrite_for_rollup(sql, ROLLUP) is None
+
+
+def test_rewrite_keeps_dims_aliases_and_rebuilds_avg():
+    sql = ("SELECT season, COUNT(*) AS n, AVG(margin) AS m FROM matches "
+           "WHERE winningteam = 'Mumbai Indians' GROUP BY season HAVING n > 1 ORDER BY n DESC")
+    rewritten = rewrite_for_rollup(sql, ROLLUP)
+    assert "FROM rollup_matches_1" in rewritten
+    assert "SUM(sum_margin) / NULLIF(SUM(cnt_margin), 0)" in rewritten
+    assert "ORDER BY n DESC" in rewritten
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    import pandas as pd
+
+    from mysql_module.backends import MySQLBackend
+    from mysql_module.db_pool import get_engine
+
+    db_config = {"url": f"sqlite:///{tmp_path / 'advisor.sqlite'}"}
+    frame = pd.DataFrame({"season": [2008 + i % 10 for i in range(20000)],
+                          "margin": [float(i % 97) for i in range(20000)]})
+    frame.to_sql("matches", get_engine(db_config), index=False)
+    return MySQLBackend(db_config)
+
+
+def _advice(backend):
+    from mysql_module.index_advisor import IndexAdvisor
+
+    advisor = IndexAdvisor(min_queries=1, min_total_ms=0)
+    advisor.record("SELECT season, SUM(margin) AS s FROM matches GROUP BY season", 50.0)
+    return advisor, [a for a in advisor.recommend(backend.dialect) if a["kind"] == "rollup"]
+
+
+def _scripted_timings(advisor, monkeypatch, *ms):
+    """advisor._time still runs the query (results are compared) but reports ms in this order"""
+    timings, real_time = iter(ms), advisor._time
+    monkeypatch.setattr(advisor, "_time", lambda backend, sql, runs=3: (next(timings), real_time(backend, sql, 1)[1]))
+
+
+def test_rollup_slower_than_the_base_table_is_dropped(sqlite_backend, monkeypatch):
+    advisor, advice = _advice(sqlite_backend)
+    _scripted_timings(advisor, monkeypatch, 1.0, 2.0)   # base table 1 ms, rollup 2 ms
+
+    done = advisor.apply(sqlite_backend, advice)
+    assert "did not help" in done[0]["error"]
+    assert "rollup_" not in advisor.rewrite("SELECT season, SUM(margin) AS s FROM matches GROUP BY season")
+    tables = sqlite_backend.run_sql("SELECT name FROM sqlite_master WHERE name LIKE 'rollup_%'")
+    assert tables.empty
+
+
+def test_faster_rollup_is_kept_and_used(sqlite_backend, monkeypatch):
+    advisor, advice = _advice(sqlite_backend)
+    _scripted_timings(advisor, monkeypatch, 5.0, 1.0)
+
+    done = advisor.apply(sqlite_backend, advice)
+    assert done[0]["speedup"] == 5.0
+    assert advice[0]["name"] in advisor.rewrite("SELECT season, SUM(margin) AS s FROM matches GROUP BY season")
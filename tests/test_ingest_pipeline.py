@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("pdfplumber")
+pytest.importorskip("docx")
+pytest.importorskip("dotenv")
+
+from pdf_module import ingest_pipeline, updated_chatwithpdf  # noqa: E402
+from pdf_module.hybrid_search import LexicalIndex  # noqa: E402
+from pdf_module.vector_store import LocalVectorStore  # noqa: E402
+
+
+def test_batches_are_searchable_during_ingest_and_rewritten_once(tmp_path, monkeypatch):
+    pages = [(n, f"Page {n} talks about revenue, churn and region{n % 7}. " * 60) for n in range(1, 41)]
+    monkeypatch.setattr(ingest_pipeline, "iter_pages", lambda file_path: iter(pages))
+    monkeypatch.setattr(ingest_pipeline, "EMBED_BATCH_SIZE", 10)
+    monkeypatch.setattr(updated_chatwithpdf, "EMBEDDING_PROVIDER", "fake")
+    monkeypatch.setattr(updated_chatwithpdf, "EMBEDDING_CACHE_PATH", None)
+    lexical = LexicalIndex(str(tmp_path / "lexical"))
+    monkeypatch.setattr(updated_chatwithpdf, "_lexical_index", lexical)
+    index_name = "local:" + str(tmp_path / "vectors")
+    store = updated_chatwithpdf.open_vector_store(index_name)
+
+    rewrites, searchable = [], []
+    real_upsert, real_store_vectors = LocalVectorStore._upsert, ingest_pipeline.store_vectors
+
+    def counting_upsert(self, namespace, ids, *args):
+        rewrites.append(len(ids))
+        return real_upsert(self, namespace, ids, *args)
+
+    def checking_store_vectors(batch, embeddings, **kwargs):
+        real_store_vectors(batch, embeddings, **kwargs)
+        # what retrieve_chunks would see while later pages are still being processed
+        searchable.append((store.count("doc"), len(lexical.search("doc", "revenue churn", top_k=1000))))
+
+    monkeypatch.setattr(LocalVectorStore, "_upsert", counting_upsert)
+    monkeypatch.setattr(ingest_pipeline, "store_vectors", checking_store_vectors)
+
+    stats = ingest_pipeline.ingest_document("report.pdf", "doc", index_name)
+
+    assert stats["chunks"] > 2 * ingest_pipeline.EMBED_BATCH_SIZE
+    assert searchable[0] == (ingest_pipeline.EMBED_BATCH_SIZE, ingest_pipeline.EMBED_BATCH_SIZE)
+    assert [n for n, _ in searchable] == sorted(n for n, _ in searchable)
+    # first batch creates the namespace, every other batch is appended, compact rewrites once
+    assert rewrites == [ingest_pipeline.EMBED_BATCH_SIZE, 0]
+    assert store.count("doc") == stats["stored"]
+    assert len(lexical.search("doc", "revenue churn", top_k=1000)) == stats["chunks"]
+    assert stats["time_to_first_chunk_seconds"] is not None
@@ -0,0 +1,63 @@
+import pytest
+
+from mysql_module import mysql_handler
+from mysql_module.answer_cache import AnswerCache
+
+
+@pytest.fixture
+def handler(monkeypatch, tmp_path):
+    monkeypatch.setattr(mysql_handler, "SCHEMA_FILE", str(tmp_path / "schema_registry.json"))
+    monkeypatch.setattr(mysql_handler, "ANSWER_CACHE", AnswerCache(64, 3600))
+    return mysql_handler
+
+
+def _llm_down_once(answer):
+    """reply() raising like a transient Gemini error on the first call, then answering"""
+    prompts = []
+
+    def reply(prompt):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            raise ConnectionError("503 model overloaded")
+        return answer
+    return reply, prompts
+
+
+def test_failed_two_step_classification_is_not_cached(handler, fake_llm, monkeypatch):
+    monkeypatch.setattr(handler, "USE_COMBINED_ROUTER", False)
+    reply, prompts = _llm_down_once("False")
+    fake_llm(reply)
+
+    first = handler.answer_mysql_question("which city hosted the 2017 final")
+    assert first["content"] == handler.CLASSIFY_FAILED_REPLY
+    assert handler.ANSWER_CACHE.stats()["intent"]["entries"] == 0
+
+    handler.answer_mysql_question("which city hosted the 2017 final")
+    assert "classification assistant" in prompts[1]   # classified again, not read from the cache
+
+
+def test_failed_routing_is_not_cached(handler, fake_llm):
+    reply, prompts = _llm_down_once('{"intent": "chat", "sql": null, "reply": "Hello from the data desk!"}')
+    fake_llm(reply)
+
+    first = handler.answer_mysql_question("which city hosted the 2017 final")
+    assert first["content"] == handler.CLASSIFY_FAILED_REPLY
+    assert handler.ANSWER_CACHE.stats()["intent"]["entries"] == 0
+
+    second = handler.answer_mysql_question("which city hosted the 2017 final")
+    assert second["content"] == "Hello from the data desk!"
+    assert len(prompts) == 2
+
+
+def test_cached_chat_intent_reuses_the_reply(handler, fake_llm):
+    prompts = []
+
+    def reply(prompt):
+        prompts.append(prompt)
+        return '{"intent": "chat", "sql": null, "reply": "Happy to help with your data."}'
+    fake_llm(reply)
+
+    for _ in range(3):
+        answer = handler.answer_mysql_question("tell me something nice about cricket fans")
+        assert answer["content"] == "Happy to help with your data."
+    assert len(prompts) == 1   # no handle_greetings call once the intent is cached
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+
+from pdf_module.hybrid_search import LexicalIndex
+from pdf_module.vector_store import LocalVectorStore
+
+DIM = 8
+
+
+def _rows(start, n, seed):
+    vectors = np.random.default_rng(seed).normal(size=(n, DIM))
+    return [f"c{i}" for i in range(start, start + n)], vectors, [{"text": f"chunk {i}"} for i in range(start, start + n)]
+
+
+def test_appended_segments_search_like_one_upsert(tmp_path):
+    appended = LocalVectorStore(str(tmp_path / "appended"), DIM)
+    whole = LocalVectorStore(str(tmp_path / "whole"), DIM)
+    batches = [_rows(30 * b, 30, seed=b) for b in range(4)]
+    for ids, vectors, metadatas in batches:
+        appended.append("doc", ids, vectors, metadatas)
+    whole.upsert("doc", *(sum((list(b[i]) for b in batches), []) for i in range(3)))
+
+    query = np.random.default_rng(9).normal(size=DIM)
+    expected = whole.query("doc", query, top_k=10)
+    assert appended.count("doc") == 120
+    assert appended.query("doc", query, top_k=10) == expected
+
+    appended.compact("doc")
+    version = open(tmp_path / "appended" / "doc" / "CURRENT").read()
+    assert not [name for name in os.listdir(tmp_path / "appended" / "doc" / version) if name.startswith("seg-")]
+    assert appended.query("doc", query, top_k=10) == expected
+
+
+def test_segments_appended_after_an_ivf_rewrite_are_searched(tmp_path):
+    store = LocalVectorStore(str(tmp_path), DIM, ivf_min_vectors=100, n_probe=64)
+    store.upsert("doc", *_rows(0, 200, seed=1))
+    ids, vectors, metadatas = _rows(200, 5, seed=2)
+    store.append("doc", ids, vectors, metadatas)
+
+    assert store.query("doc", vectors[3], top_k=1)[0]["id"] == "c203"
+
+
+def test_bm25_batches_are_logged_and_seen_by_other_readers(tmp_path):
+    writer, reader = LexicalIndex(str(tmp_path)), LexicalIndex(str(tmp_path))
+    writer.add("doc", ["a"], ["invoice INV-2041 for Pune"], [{"text": "a"}])
+    assert [m["id"] for m in reader.search("doc", "inv-2041")] == ["a"]
+
+    writer.add("doc", ["b"], ["second invoice for Mumbai"], [{"text": "b"}])
+    with open(os.path.join(str(tmp_path), writer._load("doc").log), "ab") as f:
+        f.write(b"\x80\x05\x95")   # a record another process is still writing
+    assert {m["id"] for m in reader.search("doc", "invoice")} == {"a", "b"}
+
+    writer.compact("doc")
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".log")] == []
+    assert {m["id"] for m in LexicalIndex(str(tmp_path)).search("doc", "invoice")} == {"a", "b"}
+
+    writer.delete_namespace("doc")
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,60 @@
+import os
+import time
+
+import pandas as pd
+
+from mysql_module import mysql_handler
+from mysql_module.plot_store import PlotStore
+
+FRAME = pd.DataFrame({"team": ["CSK", "MI"], "wins": [5, 5]})
+
+
+def _writer(size):
+    def render(path):
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+    return render
+
+
+def test_same_result_and_spec_render_once(tmp_path):
+    store, renders = PlotStore(str(tmp_path), url_prefix="plots"), []
+
+    def render(path):
+        renders.append(path)
+        return _writer(10)(path)
+
+    first = store.get_or_render(FRAME, {"kind": "bar"}, render)
+    assert store.get_or_render(FRAME.copy(), {"kind": "bar"}, render) == first
+    assert store.get_or_render(FRAME, {"kind": "pie"}, render) != first
+    assert len(renders) == 2
+    assert first.startswith("plots/") and store.contains(first)
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 2
+
+
+def test_eviction_drops_least_recently_used_then_expired(tmp_path):
+    store = PlotStore(str(tmp_path), max_bytes=250, max_age_seconds=3600)
+    paths = [store.get_or_render(FRAME, {"n": n}, _writer(100)) for n in range(2)]
+    old = time.time() - 60
+    os.utime(os.path.join(str(tmp_path), os.path.basename(paths[0])), (old, old))
+    store.get_or_render(FRAME, {"n": 0}, _writer(100))   # hit: refreshes the first chart
+
+    third = store.get_or_render(FRAME, {"n": 2}, _writer(100))   # 300 bytes > 250
+    assert [store.contains(p) for p in paths + [third]] == [True, False, True]
+
+    stale = time.time() - 7200
+    os.utime(os.path.join(str(tmp_path), os.path.basename(third)), (stale, stale))
+    assert store.evict() == 1
+    assert not store.contains(third)
+    assert store.stats()["evicted"] == 2
+
+
+def test_cached_image_answers_check_the_configured_plot_directory(tmp_path, monkeypatch):
+    store = PlotStore(str(tmp_path / "charts"), url_prefix="plots")
+    monkeypatch.setattr(mysql_handler, "PLOT_STORE", store)
+    path = store.get_or_render(FRAME, {"kind": "bar"}, _writer(10))
+
+    assert mysql_handler._answer_still_valid({"type": "image", "path": path})
+    os.remove(os.path.join(str(tmp_path / "charts"), os.path.basename(path)))
+    assert not mysql_handler._answer_still_valid({"type": "image", "path": path})
+    assert mysql_handler._answer_still_valid({"type": "text", "content": "5 wins"})
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from mysql_module.render_pool import RenderPool
+
+SLOW_PLOT = "import time\ntime.sleep({seconds})\nplt.plot(df['x'])\nplt.savefig({path!r})\n"
+
+
+def test_time_queued_behind_other_renders_does_not_count(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    # one worker, three 0.6 s renders: the last waits ~1.2 s, longer than the 1 s timeout
+    pool = RenderPool(workers=1, timeout_seconds=1)
+    df = pd.DataFrame({"x": [1, 2, 3]})
+    paths = [str(tmp_path / f"chart{i}.png") for i in range(3)]
+    try:
+        pool.run_code(df, "pass", str(tmp_path / "warmup.png"))   # spawn the worker first
+        with ThreadPoolExecutor(3) as threads:
+            results = list(threads.map(
+                lambda path: pool.run_code(df, SLOW_PLOT.format(seconds=0.6, path=path), path), paths))
+    finally:
+        pool.shutdown()
+    assert results == paths
+    assert pool.stats()["timeouts"] == 0 and pool.stats()["restarts"] == 0
+
+
+def test_render_running_too_long_restarts_the_pool(tmp_path):
+    pool = RenderPool(workers=1, timeout_seconds=0.5)
+    path = str(tmp_path / "chart.png")
+    try:
+        assert pool.run_code(pd.DataFrame({"x": [1]}), SLOW_PLOT.format(seconds=5, path=path), path) is None
+    finally:
+        pool.shutdown()
+    assert pool.stats()["timeouts"] == 1 and pool.stats()["restarts"] == 1
@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("pdfplumber")
+pytest.importorskip("docx")
+pytest.importorskip("dotenv")
+
+from pdf_module import updated_chatwithpdf  # noqa: E402
+from pdf_module.hybrid_search import LexicalIndex  # noqa: E402
+
+TEXTS = ["Invoice INV-2041 was paid in March.", "Churn fell in the north region.", "Revenue grew 12%."]
+
+
+@pytest.fixture
+def namespace(tmp_path, monkeypatch):
+    monkeypatch.setattr(updated_chatwithpdf, "EMBEDDING_PROVIDER", "fake")
+    monkeypatch.setattr(updated_chatwithpdf, "EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.sqlite"))
+    monkeypatch.setattr(updated_chatwithpdf, "_embedding_cache", None)
+    monkeypatch.setattr(updated_chatwithpdf, "_lexical_index", LexicalIndex(str(tmp_path / "lexical")))
+    index_name = "local:" + str(tmp_path / "vectors")
+
+    class Chunk:
+        def __init__(self, text):
+            self.page_content, self.metadata = text, {"page": 1}
+
+    embeddings = updated_chatwithpdf.get_gemini_embeddings(TEXTS)   # document chunks do go to the cache
+    updated_chatwithpdf.store_vectors([Chunk(t) for t in TEXTS], embeddings, namespace="doc", index_name=index_name)
+    return index_name
+
+
+def _cached_vectors(tmp_path):
+    with sqlite3.connect(str(tmp_path / "embeddings.sqlite")) as conn:
+        return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+def test_queries_are_embedded_as_queries_and_not_cached(namespace, tmp_path, monkeypatch):
+    task_types = []
+    real_provider = updated_chatwithpdf._embedding_provider
+    monkeypatch.setattr(updated_chatwithpdf, "_embedding_provider",
+                        lambda model, task_type: task_types.append(task_type) or real_provider(model, task_type))
+
+    for question in ("when was invoice INV-2041 paid?", "what happened to churn?"):
+        updated_chatwithpdf.retrieve_chunks(question, namespace="doc", index_name=namespace)
+
+    assert task_types == ["retrieval_query", "retrieval_query"]
+    assert _cached_vectors(tmp_path) == len(TEXTS)
+
+
+@pytest.mark.parametrize("hybrid", [True, False])
+def test_failed_query_embedding_falls_back_to_bm25(namespace, monkeypatch, hybrid):
+    monkeypatch.setattr(updated_chatwithpdf, "get_gemini_embeddings", lambda texts, **kwargs: [None] * len(texts))
+
+    texts = updated_chatwithpdf.retrieve_chunks("invoice INV-2041", top_k=1, namespace="doc",
+                                                index_name=namespace, hybrid=hybrid)
+    assert texts == [TEXTS[0]]
@@ -0,0 +1,25 @@
+from mysql_module.schema_retriever import SchemaRetriever
+
+
+def _col(name):
+    return {"name": name, "type": "varchar(50)", "samples": []}
+
+
+def test_wide_table_keeps_best_columns_ahead_of_key_and_date_columns():
+    # 30 id / date columns come first in the table and would fill the cap on their own
+    names = [f"ref{i}_id" for i in range(15)] + [f"step{i}_date" for i in range(15)]
+    names += [f"filler{i}" for i in range(20)] + ["revenue", "churn_rate"]
+    retriever = SchemaRetriever({"accounts": {"columns": [_col(n) for n in names]}})
+
+    columns = [c["name"] for c in retriever.select("revenue and churn rate", max_columns=10)["accounts"]]
+
+    assert len(columns) == 10
+    assert {"revenue", "churn_rate"} <= set(columns)
+    # remaining room goes to key / date columns, in schema order
+    assert columns[:8] == names[:8]
+
+
+def test_narrow_table_is_sent_whole():
+    names = ["id", "name", "created_date"]
+    retriever = SchemaRetriever({"users": {"columns": [_col(n) for n in names]}})
+    assert [c["name"] for c in retriever.select("user name")["users"]] == names
@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from session_store import (MAX_HISTORY, InMemorySessionStore, RedisSessionStore, SQLiteSessionStore,
+                           create_session_store, new_message, set_message_answer)
+
+
+def test_memory_store_evicts_least_recently_used_and_returns_copies():
+    store = InMemorySessionStore(max_sessions=2)
+    for sid in ("a", "b"):
+        store.save(sid, {"mode": sid, "namespace": None, "filename": None, "history": []})
+    store.get("a")            # "b" is now the least recently used
+    store.save("c", store.get("c"))
+
+    assert store.get("a")["mode"] == "a"
+    assert store.get("b")["mode"] is None
+    copy = store.get("a")
+    copy["history"].append(new_message("hi"))
+    assert store.get("a")["history"] == []
+
+
+def test_sqlite_store_is_shared_between_instances_and_expires(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    writer, reader = SQLiteSessionStore(path), SQLiteSessionStore(path, ttl_seconds=60)
+    writer.save("s1", {"mode": "pdf", "namespace": "ns", "filename": "a.pdf", "history": []})
+
+    assert reader.get("s1")["namespace"] == "ns"
+    time.sleep(0.05)
+    assert SQLiteSessionStore(path, ttl_seconds=0.01).get("s1")["mode"] is None
+
+
+def test_sqlite_update_is_atomic_across_instances(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    stores = [SQLiteSessionStore(path) for _ in range(4)]
+
+    def add(store, n):
+        for i in range(10):
+            store.update("s1", lambda data: data["history"].append(new_message(f"{n}-{i}")))
+
+    threads = [threading.Thread(target=add, args=(store, n)) for n, store in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(stores[0].get("s1")["history"]) == 40
+
+
+def test_history_is_trimmed_and_answers_attach_by_id():
+    store = InMemorySessionStore()
+    messages = [new_message(f"q{i}") for i in range(MAX_HISTORY + 5)]
+    store.update("s1", lambda data: data["history"].extend(messages))
+
+    history = store.get("s1")["history"]
+    assert len(history) == MAX_HISTORY
+    assert history[0]["user"] == "q5"
+
+    set_message_answer(store, "s1", messages[-1]["id"], {"type": "text", "text": "done"})
+    set_message_answer(store, "s1", "unknown", {"type": "text", "text": "ignored"})
+    history = store.get("s1")["history"]
+    assert history[-1]["bot"] == {"type": "text", "text": "done"}
+    assert all(msg["bot"] is None for msg in history[:-1])
+
+
+class WatchError(Exception):
+    """Matched by name, like redis.exceptions.WatchError"""
+
+
+class _FakePipeline:
+    """Enough of redis-py's pipeline for WATCH / MULTI / EXEC; fails the first exec once"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, key):
+        pass
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def multi(self):
+        pass
+
+    def set(self, key, value, ex=None):
+        self.pending = (key, value, ex)
+
+    def execute(self):
+        if self.client.conflicts:
+            self.client.conflicts -= 1
+            raise WatchError("key changed")
+        self.client.set(*self.pending)
+
+
+class _FakeRedis:
+    def __init__(self, conflicts=0):
+        self.data, self.ttls, self.conflicts = {}, {}, conflicts
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key], self.ttls[key] = value, ex
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+def test_redis_store_retries_update_after_a_concurrent_write():
+    client = _FakeRedis(conflicts=1)
+    store = RedisSessionStore(client, ttl_seconds=30, prefix="t:")
+    calls = []
+
+    data = store.update("s1", lambda data: calls.append(1) or data.update(mode="mysql"))
+
+    assert len(calls) == 2
+    assert data["mode"] == "mysql"
+    assert store.get("s1")["mode"] == "mysql"
+    assert client.ttls["t:s1"] == 30
+
+
+def test_unknown_backend_is_rejected():
+    assert isinstance(create_session_store("memory", max_sessions=5), InMemorySessionStore)
+    with pytest.raises(ValueError):
+        create_session_store("memcached")
@@ -0,0 +1,23 @@
+import pytest
+
+from mysql_module.temp import classify_small_talk
+
+
+@pytest.mark.parametrize("question", [
+    "hi, who won the 2017 final?",
+    "thanks, and what about mumbai indians?",
+    "cool, and for 2019?",
+])
+def test_greeting_followed_by_a_question_reaches_the_llm(question):
+    assert classify_small_talk(question) is None
+
+
+@pytest.mark.parametrize("question, kind", [
+    ("hi", "greeting"),
+    ("Good morning!", "greeting"),
+    ("thank you so much", "thanks"),
+    ("bye", "bye"),
+    ("what can you do?", "capabilities"),
+])
+def test_pure_small_talk_is_answered_locally(question, kind):
+    assert classify_small_talk(question) == kind
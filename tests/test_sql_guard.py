@@ -0,0 +1,39 @@
+import pytest
+
+from mysql_module.backends import explain_rows
+from mysql_module.sql_guard import SQLRejected, validate_sql
+
+
+def _row(select_id, select_type, table, rows):
+    return {"id": select_id, "select_type": select_type, "table": table, "rows": rows}
+
+
+def test_scalar_subquery_adds_instead_of_multiplying():
+    # EXPLAIN SELECT * FROM t WHERE margin = (SELECT MAX(margin) FROM t)
+    plan = [_row(1, "PRIMARY", "t", 100000), _row(2, "SUBQUERY", "t", 100000)]
+    assert explain_rows(plan) == 200000
+
+
+def test_join_multiplies_within_one_select():
+    # EXPLAIN SELECT ... FROM orders o JOIN customers c ON c.id = o.customer_id
+    plan = [_row(1, "SIMPLE", "o", 50000), _row(1, "SIMPLE", "c", 1)]
+    assert explain_rows(plan) == 50000
+
+
+def test_union_and_missing_rows():
+    plan = [_row(1, "PRIMARY", "a", 10), _row(1, "PRIMARY", "b", 20),
+            _row(2, "UNION", "c", 30), _row(None, "UNION RESULT", "<union1,2>", None)]
+    assert explain_rows(plan) == 10 * 20 + 30
+
+
+def test_implicit_join_on_unqualified_columns_is_not_cartesian():
+    pytest.importorskip("sqlglot")
+    validate_sql("SELECT * FROM matches, teams WHERE WinningTeam = TeamName", 100)
+    validate_sql("SELECT * FROM matches m, teams t WHERE m.WinningTeam = t.TeamName", 100)
+
+
+def test_join_without_condition_is_rejected():
+    pytest.importorskip("sqlglot")
+    with pytest.raises(SQLRejected) as e:
+        validate_sql("SELECT * FROM matches, teams WHERE Season = 2020", 100)
+    assert "teams" in str(e.value)
@@ -0,0 +1,41 @@
+import markdown
+import pytest
+
+from chat_jobs import JobManager
+from fake_llm import FakeLLM
+from pdf_module.markdown_stream import IncrementalMarkdown
+
+ANSWER = (
+    "## Summary\n\nRevenue grew **12%** in the north region.\n\n"
+    "- churn fell\n- margins held\n\n"
+    "```sql\nSELECT region, SUM(revenue)\n\nFROM sales GROUP BY region\n```\n\n"
+    "That is all the document says."
+)
+
+
+@pytest.mark.parametrize("reply", [ANSWER, None])
+def test_streamed_blocks_add_up_to_the_full_render(reply):
+    llm = FakeLLM(first_token_ms=0, tokens_per_second=0, reply=reply)
+    prompt = "Context: revenue churn margins by region\n\nQuestion: how did revenue do?"
+    renderer = IncrementalMarkdown()
+    html = "".join(renderer.feed(token)[0] for token in llm.stream(prompt)) + renderer.finish()
+    assert html == markdown.markdown(llm.generate(prompt))
+
+
+def test_pdf_answer_streams_token_events_through_a_job(fake_llm, monkeypatch):
+    for module in ("langchain", "pdfplumber", "docx", "dotenv"):
+        pytest.importorskip(module)
+    from pdf_module import pdf_handler, updated_chatwithpdf
+
+    fake_llm(ANSWER, first_token_ms=20, tokens_per_second=500)
+    monkeypatch.setattr(updated_chatwithpdf, "retrieve_chunks", lambda query, **kwargs: ["Revenue grew 12%."])
+
+    jobs = JobManager(max_workers=1)
+    job_id = jobs.submit(pdf_handler.answer_pdf_question, "how did revenue do?", "ns", stream=True)
+    events = list(jobs.events(job_id, timeout=30))
+
+    assert events[-1]["status"] == "done"
+    tokens = [e for e in events if "token" in e]
+    assert [e["token"] for e in tokens if e["token"]] == FakeLLM(reply=ANSWER).tokens("")
+    assert "".join(e["html"] for e in tokens) == markdown.markdown(ANSWER)
+    assert events[-1]["result"]["content"] == markdown.markdown(ANSWER)
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from mysql_module import strtomysql
+
+
+class RecordingConnection:
+    """DB-API connection stand-in that records the DDL the streaming upload issues"""
+
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _upload(tmp_path, monkeypatch, frame, chunksize):
+    path = tmp_path / "matches.csv"
+    frame.to_csv(path, index=False)
+    inserted = []
+    monkeypatch.setitem(strtomysql.BULK_LOADERS, "recording",
+                        lambda conn, chunk, table_name, batch_size: inserted.append(len(chunk)))
+    conn = RecordingConnection()
+    schema, _ = strtomysql._stream_file_to_mysql(conn, str(path), "matches", chunksize, "recording", 1000)
+    return schema, conn.statements, inserted
+
+
+def test_all_null_chunk_does_not_widen_columns(tmp_path, monkeypatch):
+    frame = pd.DataFrame({
+        "id": range(8),
+        "date": ["2017-05-21"] * 4 + [None] * 4,
+        "city": ["Hyderabad"] * 4 + [None] * 4,
+        "margin": [1, 2, 3, 4, None, None, None, None],
+    })
+    schema, statements, inserted = _upload(tmp_path, monkeypatch, frame, chunksize=4)
+
+    assert not [s for s in statements if s.startswith("ALTER TABLE")]
+    assert schema["date"] == "DATETIME"
+    assert inserted == [4, 4]
+
+
+def test_column_null_in_the_first_chunk_takes_the_later_type(tmp_path, monkeypatch):
+    frame = pd.DataFrame({"date": [None] * 4 + ["2017-05-21"] * 4, "margin": range(8)})
+    schema, statements, _ = _upload(tmp_path, monkeypatch, frame, chunksize=4)
+
+    assert schema["date"] == "DATETIME"
+    assert statements[-1] == "ALTER TABLE matches MODIFY COLUMN `date` DATETIME;"
@@ -0,0 +1,189 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ------------------ PIPELINE TRACING ------------------
+# with span("sql_generation"): ...  times one pipeline stage. Every span feeds a
+# process-wide latency histogram (served as Prometheus text on /metrics); spans
+# opened inside trace() are also kept per request for the chat timing footer.
+# Numeric span attributes (tokens, bytes, rows) are summed into counters.
+#
+#   TRACING=0  turns it off: span() returns a shared no-op object, nothing is timed
+
+TRACING_ENABLED = os.getenv("TRACING", "1") != "0"
+METRIC_PREFIX = "chatbi"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current = contextvars.ContextVar("trace", default=None)
+_lock = threading.Lock()
+_histograms = {}    # stage -> [bucket counts..., +Inf count, sum]
+_counters = {}      # (stage, unit) -> total
+_errors = {}        # stage -> count
+
+
+# ------------------ SPANS ------------------
+class Span:
+    __slots__ = ("name", "attrs", "started", "ms", "depth", "_trace")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.ms = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, **counts):
+        for key, value in counts.items():
+            self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def __enter__(self):
+        self._trace = _current.get()
+        self.depth = 0
+        if self._trace is not None:
+            self.depth = len(self._trace.stack)
+            self._trace.stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        self.ms = round(1000 * seconds, 1)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        if self._trace is not None:
+            self._trace.stack.remove(self)
+            self._trace.spans.append(self)
+        _observe(self.name, seconds, self.attrs, exc_type is not None)
+        return False
+
+    def to_dict(self):
+        return {"name": self.name, "ms": self.ms, "depth": self.depth, **self.attrs}
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, **counts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **attrs):
+    """Context manager timing one stage; attrs (rows, bytes, ...) are attached to it"""
+    if not TRACING_ENABLED:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def record(**counts):
+    """Add counts (e.g. prompt_tokens) to the innermost open span of this request"""
+    current = _current.get()
+    if current is not None and current.stack:
+        current.stack[-1].add(**counts)
+
+
+# ------------------ PER-REQUEST TRACES ------------------
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.spans = []     # finished spans, in finishing order
+        self.stack = []     # spans still open
+        self.started = time.perf_counter()
+        self.total_ms = None
+
+    def summary(self):
+        """Total time plus every span in start order (for the timing footer)"""
+        spans = sorted(self.spans, key=lambda s: s.started)
+        return {"total_ms": self.total_ms, "spans": [s.to_dict() for s in spans]}
+
+
+@contextmanager
+def trace(name):
+    """
+    with trace("mysql") as t: ... collects the spans of one request (this thread).
+    t is None when tracing is off.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+    current = Trace(name)
+    token = _current.set(current)
+    failed = False
+    try:
+        yield current
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        _current.reset(token)
+        seconds = time.perf_counter() - current.started
+        current.total_ms = round(1000 * seconds, 1)
+        _observe(f"request_{name}", seconds, {}, failed)
+
+
+# ------------------ METRICS ------------------
+def _observe(name, seconds, attrs, failed):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+        histogram[-2] += 1
+        histogram[-1] += seconds
+        for key, value in attrs.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                _counters[(name, key)] = _counters.get((name, key), 0) + value
+        if failed:
+            _errors[name] = _errors.get(name, 0) + 1
+
+
+def render_metrics():
+    """All stage metrics in the Prometheus text exposition format"""
+    p = METRIC_PREFIX
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+        errors = dict(_errors)
+
+    lines = [f"# HELP {p}_stage_seconds Latency of one pipeline stage or request",
+             f"# TYPE {p}_stage_seconds histogram"]
+    for stage, h in sorted(histograms.items()):
+        for bound, count in zip(BUCKETS, h):
+            lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h[-2]}')
+        lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {h[-1]:.6f}')
+        lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {h[-2]}')
+
+    lines += [f"# HELP {p}_stage_units_total Tokens, bytes and rows handled per stage",
+              f"# TYPE {p}_stage_units_total counter"]
+    for (stage, unit), total in sorted(counters.items()):
+        lines.append(f'{p}_stage_units_total{{stage="{stage}",unit="{unit}"}} {total}')
+
+    lines += [f"# HELP {p}_stage_errors_total Stages that raised",
+              f"# TYPE {p}_stage_errors_total counter"]
+    for stage, count in sorted(errors.items()):
+        lines.append(f'{p}_stage_errors_total{{stage="{stage}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _errors.clear()